@@ -10,25 +10,40 @@ Allows you to do bulk/individual modifications to a set of egg files, including
 """
 from __future__ import annotations
 
+import codecs
 import copy
+import hashlib
+import locale
 import logging
+import pickle
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from enum import Enum
 from typing import Set
 
-from panda3d.core import Filename
+from panda3d.core import Filename, StringStream
 from panda3d.egg import *
 from dataclasses import dataclass, field
 import os, sys
 from pathlib import Path
 
 from eggtools.EggExceptions import EggAccessViolation, EggImproperArgType
-from eggtools.EggManConfig import DecalConfig, DualConfig, NodeNameConfig
+from eggtools.EggManConfig import DecalConfig, DualConfig, NodeNameConfig, VertexPrecisionConfig
 from eggtools.AttributeDefs import DefinedAttributes, ObjectTypeDefs
 from eggtools.attributes.EggAlphaAttribute import EggAlphaAttribute
 from eggtools.attributes.EggAttribute import EggAttribute
+from eggtools.attributes.EggAttributeVisitor import EggAttributeVisitor
 from eggtools.attributes.EggUVNameAttribute import EggUVNameAttribute
 from eggtools.config.EggVariableConfig import GAMEASSETS_MAPS_PATH, GAMEASSETS_DIR
+from eggtools.utils.EggBamConverter import BamConversionReport, convert_egg_data, get_bam_path, is_bam_up_to_date
+from eggtools.utils.EggFileWriter import PZ_COMPRESSION_LEVEL, iter_egg_chunks, write_chunks_if_changed, \
+    write_if_changed
 from eggtools.utils.EggNameResolver import EggNameResolver
+from eggtools.utils.EggNodeIndex import EggNodeIndex
+from eggtools.utils.EggPrescanner import EggPrescanner
+from eggtools.utils.EggPzipIO import EggPzipIO, read_egg_contents
+from eggtools.utils.EggScanCache import EggScanCache, EggScanRecord
+from eggtools.utils.EggTextureIndex import EggTextureIndex, EggTextureRef
+from eggtools.utils.EggVertexPoolWriter import EggVertexPoolWriter
 
 BASE_PATH = GAMEASSETS_MAPS_PATH
 
@@ -58,15 +73,26 @@ class EggContext:
     egg_timestamp_old: int = field(default_factory=lambda: False)
     egg_save_timestamp: bool = field(default_factory=lambda: False)
     egg_ext_file_refs: Set = field(default_factory=lambda: set())
+    # <ObjectType>s as they were read, before being expanded into their attributes
+    egg_object_types: Set = field(default_factory=lambda: set())
+
+    # Lazily registered eggs are not read until something needs their contents.
+    loaded: bool = field(default_factory=lambda: True)
+    # Stat info recorded at registration time
+    file_size: int = field(default_factory=lambda: 0)
+    file_mtime: float = field(default_factory=lambda: 0.0)
+    # Name, type, TRef & parent lookups for the egg's nodes, filled during the registration scan
+    node_index: EggNodeIndex = field(default_factory=lambda: EggNodeIndex(), repr=False, compare=False)
+    # Set when a lazily registered egg turns out to be unreadable. It is kept (empty) but never written or converted.
+    failed: bool = field(default_factory=lambda: False)
+    # Scan summary from parallel registration, used until the egg is loaded
+    scan_record: EggScanRecord = field(default_factory=lambda: None, repr=False, compare=False)
 
     def __hash__(self):
         return hash(str(self))
 
 
 class EggMan(object):
-    # This is used to quickly grab EggData via a texture name
-    _egg_name_2_egg_data = dict()
-
     def __str__(self):
         out = f"Eggman ({id(self)})\n"
         for egg in self.egg_datas.keys():
@@ -86,7 +112,16 @@ class EggMan(object):
         return verify
 
     def __init__(self, egg_filepaths: list, search_paths: list[str] = None,
-                 loglevel: logging = logging.CRITICAL) -> None:
+                 loglevel: logging = logging.CRITICAL, workers: int = 1, lazy: bool = False,
+                 scan_cache: EggScanCache = None, compression_level: int = PZ_COMPRESSION_LEVEL) -> None:
+        """
+        :param int workers: Number of processes used to scan eggs during registration.
+            Anything above 1 enables parallel registration, which is meant for read-only use (see register_eggs).
+        :param bool lazy: If true, eggs are only read the first time something needs their contents.
+        :param EggScanCache scan_cache: Stores registration scans & prescans on disk, so that unchanged eggs
+            don't have to be scanned again.
+        :param int compression_level: zlib level (0-9) used when writing .pz eggs.
+        """
         logging.basicConfig(level=loglevel)
         if not search_paths:
             search_paths = [BASE_PATH]
@@ -97,27 +132,332 @@ class EggMan(object):
         # filename is stored in EggContext.filename
         self.egg_datas = dict()  # { EggData : EggContext }
         self.defined_attributes = DefinedAttributes
+        self.scan_cache = scan_cache
+        self.prescanner = EggPrescanner()
+        # Decompresses .pz eggs ahead of time while eggs are read one after another
+        self.pzip = EggPzipIO(compression_level=compression_level)
+
+        # This is used to quickly grab EggData via its file name.
+        # Kept per instance, otherwise every EggMan would resolve names to the eggs of the last one created.
+        self._egg_name_2_egg_data = dict()  # { str : EggData }
 
-        self.register_eggs(egg_filepaths)
+        # Eggs that could not be registered, and why
+        self.failed_eggs = dict()  # { Filename : str }
+        # Eggs that could not be written the last time they were written, and why
+        self.failed_writes = dict()  # { Filename : str }
 
-    def register_eggs(self, egg_filepaths: list[Filename | str]) -> None:
+        # Which eggs use which textures, see get_texture_index
+        self.texture_index = EggTextureIndex()
+
+        self.register_eggs(egg_filepaths, workers=workers, lazy=lazy)
+
+    def register_eggs(self, egg_filepaths: list[Filename | str], workers: int = 1, lazy: bool = False) -> None:
+        """
+        Reads and registers a list of egg files.
+
+        Eggs that fail to load are logged and recorded in failed_eggs instead of stopping the whole batch.
+
+        :param int workers: If above 1, eggs are parsed & scanned across a process pool of this size.
+            Only their scan summary comes back, so this suits read-only queries (texture lookups, audits...).
+            Anything that needs the contents reads the egg again, see _register_eggs_parallel.
+        :param bool lazy: If true, only the filename & stat info are recorded. The registered EggData is an empty
+            placeholder that gets filled in place the first time it is needed (see load_egg).
+        """
         if not egg_filepaths:
             return
+        filepaths = list()
         for fp in egg_filepaths:
             if not isinstance(fp, Filename):
                 fp = Filename.fromOsSpecific(fp)
             if fp.getExtension() not in ("egg", "pz"):  # pz: pzip
                 print(f"{fp.getBasenameWoExtension()} does not have egg extension, not registering {fp.getFullpath()}")
                 continue
-            egg_data = EggData()
-            egg_data.read(fp)
-            self.egg_datas[egg_data] = EggContext(fp)
-            ctx = self.egg_datas[egg_data]
-            ctx.egg_texture_collection.findUsedTextures(egg_data)
-            self._traverse_egg(egg_data, ctx)
-            self._egg_name_2_egg_data[fp.getBasename()] = egg_data
+            filepaths.append(fp)
+
+        if lazy:
+            if workers > 1:
+                logging.warning(f"Lazily registered eggs are not read during registration, ignoring workers={workers}")
+            for fp in filepaths:
+                self._register_lazy_egg(fp)
+        elif workers > 1 and len(filepaths) > 1:
+            self._register_eggs_parallel(filepaths, workers)
+        else:
+            for fp, contents, error in self.pzip.iter_contents(filepaths):
+                if error:
+                    self._register_failure(fp, error)
+                    continue
+                egg_data = EggData()
+                if not self._read_egg(egg_data, fp, contents):
+                    self._register_failure(fp, "EggData could not read the file")
+                    continue
+                self._register_egg_data(fp, egg_data)
+        self.save_scan_cache()
+
+    @staticmethod
+    def _read_egg(egg_data: EggData, fp: Filename, contents: bytes = None) -> bool:
+        """
+        :param bytes contents: Already decompressed contents of a .pz egg, see EggPzipIO.iter_contents.
+        """
+        if contents is not None:
+            return read_egg_contents(egg_data, fp, contents)
+        return egg_data.read(fp)
+
+    def _register_eggs_parallel(self, filepaths: list[Filename], workers: int) -> None:
+        """
+        Parses and scans eggs in worker processes, then registers the results in their original order.
+
+        Workers only send back a summary of their scan, the eggs are registered like lazy eggs from it.
+        Their contents are read the first time something needs them (see load_egg), which parses & scans
+        the egg a second time. Don't use this when every egg is going to be modified anyway.
+        """
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_scan_egg_worker, fp.toOsSpecific()) for fp in filepaths]
+            for fp, future in zip(filepaths, futures):
+                try:
+                    record, dirty = future.result()
+                except Exception as e:
+                    self._register_failure(fp, str(e))
+                    continue
+                if record is None:
+                    self._register_failure(fp, "EggData could not read the file")
+                    continue
+                self._register_scanned_egg(fp, record, dirty)
+
+    def _register_scanned_egg(self, fp: Filename, record: EggScanRecord, dirty: bool) -> None:
+        """
+        :param EggScanRecord record: Registration scan summary of the egg, made by a worker process.
+        :param bool dirty: Whether the scan altered the egg, it will again once the egg is loaded.
+        """
+        egg_data = self._register_lazy_egg(fp)
+        if egg_data is None:
+            return
+        ctx = self.egg_datas[egg_data]
+        ctx.dirty = dirty
+        ctx.scan_record = record
+        self.texture_index.set_egg(egg_data, [
+            EggTextureRef(egg_data, None, tref, texture_path) for tref, texture_path in record.textures.items()
+        ])
+        if self.scan_cache:
+            self.scan_cache.put(fp, record)
+
+    def _register_egg_data(self, fp: Filename, egg_data: EggData) -> EggContext:
+        self.egg_datas[egg_data] = EggContext(fp)
+        ctx = self.egg_datas[egg_data]
+        self._stat_egg(ctx)
+        self._scan_egg(egg_data, ctx)
+        self._egg_name_2_egg_data[fp.getBasename()] = egg_data
+        return ctx
+
+    def _scan_egg(self, egg_data: EggData, ctx: EggContext) -> None:
+        ctx.egg_texture_collection.findUsedTextures(egg_data)
+        ctx.node_index.clear()
+        ctx.node_index.stale = False
+        # <ObjectType>s are expanded before their group's children are indexed, so the index stays accurate
+        self._traverse_egg(egg_data, ctx)
+        self._index_egg_textures(egg_data, ctx)
+        if self.scan_cache:
+            self.scan_cache.put(ctx.filename, EggScanRecord.from_context(ctx))
+
+    def _index_egg_textures(self, egg_data: EggData, ctx: EggContext) -> None:
+        """
+        Brings the texture index up-to-date for an egg, call this whenever its textures change.
+        """
+        self.texture_index.set_egg(egg_data, [
+            EggTextureRef(egg_data, egg_texture, egg_texture.getName(), egg_texture.getFilename().getFullpath())
+            for egg_texture in ctx.egg_textures
+        ])
+
+    def get_texture_index(self) -> EggTextureIndex:
+        """
+        Gets the index of the textures used by every registered egg.
+
+        Lazily registered eggs that haven't been loaded are indexed through a prescan (or the scan cache),
+        their entries have no EggTexture until they are loaded.
+        """
+        unindexed = {
+            self.egg_datas[egg_data].filename: egg_data for egg_data in self.egg_datas
+            if egg_data not in self.texture_index
+        }
+        if unindexed:
+            for fp, record in self.prescan_eggs(list(unindexed)).items():
+                egg_data = unindexed[fp]
+                self.texture_index.set_egg(egg_data, [
+                    EggTextureRef(egg_data, None, tref, texture_path)
+                    for tref, texture_path in record.textures.items()
+                ])
+            self.save_scan_cache()
+        return self.texture_index
+
+    def _register_lazy_egg(self, fp: Filename) -> EggData | None:
+        """
+        :return: The registered placeholder, or None if the file could not be found.
+        """
+        ctx = EggContext(fp, loaded=False)
+        try:
+            self._stat_egg(ctx, strict=True)
+        except OSError as e:
+            self._register_failure(fp, str(e))
+            return None
+        egg_data = EggData()
+        egg_data.setEggFilename(fp)
+        self.egg_datas[egg_data] = ctx
+        self._egg_name_2_egg_data[fp.getBasename()] = egg_data
+        return egg_data
+
+    @staticmethod
+    def _stat_egg(ctx: EggContext, strict: bool = False) -> None:
+        try:
+            stat = os.stat(ctx.filename.toOsSpecific())
+        except OSError:
+            if strict:
+                raise
+            return
+        ctx.file_size = stat.st_size
+        ctx.file_mtime = stat.st_mtime
+
+    def load_egg(self, egg: EggData, contents: bytes = None) -> EggContext:
+        """
+        Makes sure that a registered egg has been read and scanned, reading it now if it was registered lazily.
+
+        :param bytes contents: Already decompressed contents of a .pz egg, see EggPzipIO.iter_contents.
+        :return: The EggContext for the egg
+        """
+        ctx = self.egg_datas[egg]
+        if ctx.loaded:
+            return ctx
+        logging.debug(f"loading lazily registered egg {ctx.filename}")
+        # Reading into the placeholder keeps every existing reference to it valid.
+        if not self._read_egg(egg, ctx.filename, contents):
+            self._fail_load(egg, "EggData could not read the file")
+            return ctx
+        ctx.loaded = True
+        self._scan_egg(egg, ctx)
+        return ctx
+
+    def _fail_load(self, egg: EggData, reason: str) -> None:
+        """
+        Like a failed registration, but the egg stays registered so existing references to it keep working.
+        Whatever got read is thrown away, and the egg is refused by mark_dirty, the writers and write_bams.
+        """
+        ctx = self.egg_datas[egg]
+        self._register_failure(ctx.filename, reason)
+        egg.clear()
+        ctx.loaded = True
+        ctx.failed = True
+        ctx.dirty = False
+
+    def load_eggs(self, eggs: list[EggData]) -> None:
+        """
+        Loads the given eggs one after another, decompressing the next .pz eggs in the background meanwhile.
+        """
+        unloaded = {self.egg_datas[egg].filename: egg for egg in eggs if not self.egg_datas[egg].loaded}
+        for fp, contents, error in self.pzip.iter_contents(list(unloaded)):
+            if error:
+                # Like load_egg does for eggs that can't be read, the egg is marked unusable instead of read empty
+                self._fail_load(unloaded[fp], error)
+                continue
+            self.load_egg(unloaded[fp], contents)
+
+    def load_all_eggs(self) -> None:
+        self.load_eggs(list(self.egg_datas.keys()))
+        self.save_scan_cache()
+
+    def unload_egg(self, egg: EggData) -> None:
+        """
+        Releases the contents of a registered egg, turning it back into a lazily registered placeholder.
+        It will be read again from disk the next time something needs it.
+
+        Unwritten changes on dirty eggs are lost.
+        """
+        ctx = self.egg_datas[egg]
+        if not ctx.loaded:
+            return
+        if ctx.dirty:
+            logging.warning(f"Unloading {ctx.filename} while it still has unwritten changes")
+        egg.clear()
+        self.texture_index.remove_egg(egg)
+        new_ctx = EggContext(ctx.filename, loaded=False)
+        # The file was most likely rewritten since we last looked at it
+        self._stat_egg(new_ctx)
+        self.egg_datas[egg] = new_ctx
+
+    def iter_egg_windows(self, max_eggs: int = 0, max_bytes: int = 0):
+        """
+        Splits the registered eggs into consecutive windows, to be processed & released one window at a time.
+
+        A window always holds at least one egg, even if that egg alone goes over max_bytes.
+
+        :param int max_eggs: Maximum number of eggs per window, 0 for no limit.
+        :param int max_bytes: Maximum combined file size of the eggs in a window, 0 for no limit.
+        :return: Generator of lists of EggData
+        """
+        window = list()
+        window_bytes = 0
+        for egg_data, ctx in list(self.egg_datas.items()):
+            if window and (
+                    (max_eggs and len(window) >= max_eggs) or
+                    (max_bytes and window_bytes + ctx.file_size > max_bytes)
+            ):
+                yield window
+                window = list()
+                window_bytes = 0
+            window.append(egg_data)
+            window_bytes += ctx.file_size
+        if window:
+            yield window
+
+    def get_scan_record(self, egg: EggData) -> EggScanRecord:
+        """
+        Gets the registration scan summary of an egg. Lazily registered eggs are never read for this,
+        they are answered from the scan cache or a prescan of the file instead.
+        """
+        ctx = self.egg_datas[egg]
+        if ctx.loaded:
+            return EggScanRecord.from_context(ctx)
+        if ctx.scan_record:
+            return ctx.scan_record
+        return self.prescan_eggs([ctx.filename])[ctx.filename]
+
+    def prescan_eggs(self, egg_filepaths: list[Filename | str] = None) -> dict[Filename, EggScanRecord]:
+        """
+        Streams through egg files to summarize their textures, <File> refs, <ObjectType>s, materials & UV names,
+        without reading them into EggData. The egg files don't have to be registered.
+
+        Valid scan cache entries are used as is, and new prescans are stored in the scan cache.
+
+        :param egg_filepaths: Egg files to prescan, defaults to every registered egg.
+        :return: { Filename : EggScanRecord }
+        """
+        if egg_filepaths is None:
+            egg_filepaths = [ctx.filename for ctx in self.egg_datas.values()]
+        records = dict()
+        for fp in egg_filepaths:
+            if not isinstance(fp, Filename):
+                fp = Filename.fromOsSpecific(fp)
+            record = self.scan_cache.get(fp) if self.scan_cache else None
+            if not record:
+                # The prescan goes through every byte of the file anyway
+                hasher = hashlib.sha1()
+                try:
+                    record = self.prescanner.prescan(fp, hasher)
+                except OSError as e:
+                    logging.error(f"Failed to prescan {fp.getFullpath()} ({e})")
+                    continue
+                if self.scan_cache:
+                    self.scan_cache.put(fp, record, hasher.hexdigest())
+            records[fp] = record
+        return records
+
+    def save_scan_cache(self) -> None:
+        if self.scan_cache:
+            self.scan_cache.save()
 
-    def _register_egg_texture(self, ctx: EggContext, target_node: EggTexture) -> None:
+    def _register_failure(self, fp: Filename, reason: str) -> None:
+        logging.error(f"Failed to register {fp.getFullpath()} ({reason})")
+        self.failed_eggs[fp] = reason
+
+    @staticmethod
+    def _register_egg_texture(ctx: EggContext, target_node: EggTexture) -> None:
         """
         Register an egg texture with the given EggContext. This is used when traversing down the egg.
         """
@@ -127,29 +467,43 @@ class EggMan(object):
             uvAttr = EggUVNameAttribute(uvName)
             ctx.egg_attributes.add(uvAttr)
 
-    def _traverse_egg(self, egg: EggData | EggGroup, ctx: EggContext) -> None:
+    @classmethod
+    def _traverse_egg(cls, egg: EggData | EggGroup, ctx: EggContext) -> None:
         """
         Traverses down an egg tree and records data mapped to the ctx key.
+        Only the ctx is touched, so worker processes can scan eggs without an EggMan of their own.
 
         :param EggData | EggGroup egg: Egg to traverse
         :param EggContext ctx: The original EggContext, required to keep things in order during recursion.
         """
         # we ask for ctx just to keep things in order
         for child in egg.getChildren():
+            ctx.node_index.add_node(child, egg)
             if isinstance(child, EggGroup):
                 # print(f"ObjectTypes for {child.getName()} - {child.getObjectTypes()}")
-                self._replace_object_types(ctx, child)
-                self._traverse_egg(child, ctx)
+                ctx.egg_object_types.update(child.getObjectTypes())
+                cls._replace_object_types(ctx, child)
+            if isinstance(child, EggGroupNode):
+                cls._traverse_egg(child, ctx)
             # <Material> { ... }
             if isinstance(child, EggMaterial):
                 ctx.egg_materials.add(child)
             # <Texture> { blah.png }
             if isinstance(child, EggTexture):
-                self._register_egg_texture(ctx, child)
+                cls._register_egg_texture(ctx, child)
             # <File> { filename.egg }
             if isinstance(child, EggExternalReference):
                 ctx.egg_ext_file_refs.add(child)
 
+    def get_node_index(self, egg: EggData) -> EggNodeIndex:
+        """
+        :return: The egg's node index, rebuilt first if something made it stale.
+        """
+        ctx = self.load_egg(egg)
+        if ctx.node_index.stale:
+            ctx.node_index.build(egg)
+        return ctx.node_index
+
     def merge_eggs(self, destination_egg: EggData, target_eggs: list[EggData] | EggData) -> None:
         """
         Source egg(s) will be removed from egg datas and cannot be searched for anymore.
@@ -159,13 +513,25 @@ class EggMan(object):
         if not isinstance(target_eggs, list):
             target_eggs = [target_eggs]
 
+        destination_ctx = self.load_egg(destination_egg)
         for sacrifice in target_eggs:
-            ctx = self.egg_datas[sacrifice]
+            ctx = self.load_egg(sacrifice)
             # Remove old egg from dict
             del self._egg_name_2_egg_data[ctx.filename.getBasename()]
             destination_egg.merge(sacrifice)
+            # The merged nodes now belong to the destination egg
+            destination_ctx.egg_textures.update(ctx.egg_textures)
+            destination_ctx.egg_materials.update(ctx.egg_materials)
+            destination_ctx.egg_attributes.update(ctx.egg_attributes)
+            destination_ctx.egg_ext_file_refs.update(ctx.egg_ext_file_refs)
+            destination_ctx.egg_object_types.update(ctx.egg_object_types)
+            self.texture_index.remove_egg(sacrifice)
             del self.egg_datas[sacrifice]
 
+        destination_ctx.egg_texture_collection.clear()
+        destination_ctx.egg_texture_collection.findUsedTextures(destination_egg)
+        destination_ctx.node_index.stale = True
+        self._index_egg_textures(destination_egg, destination_ctx)
         self.mark_dirty(destination_egg)
 
     """
@@ -220,30 +586,25 @@ class EggMan(object):
                     return name.rstrip(suffix)
             return name
 
-        def traverse_egg(egg: EggNode, ctx: EggContext):
-            """
-            Traverses down an egg tree and records data mapped to the ctx key.
+        node_index = self.get_node_index(egg)
+        if recurse:
+            # Only groups nested in other groups, same as walking down the groups would find
+            groups = [
+                group for group in node_index.get_nodes_by_type(EggGroup)
+                if all(isinstance(parent, EggGroup) for parent in node_index.get_ancestors(group)[:-1])
+            ]
+        else:
+            groups = [child for child in egg.getChildren() if isinstance(child, EggGroup)]
 
-            :param egg: Egg to traverse
-            :type egg: EggData | EggGroup
-            :param ctx: The original EggContext, required to keep things in order during recursion.
-            :type ctx: EggContext
-            """
-            # we ask for ctx just to keep things in order
-            for child in egg.getChildren():
-                if isinstance(child, EggGroup):
-                    if rename_type == EggGroupRenameType.RenamePrefixes:
-                        child.set_name(strip_group_prefix(child, substrings))
-                    elif rename_type == EggGroupRenameType.RenameSuffixes:
-                        child.set_name(strip_group_suffix(child, substrings))
-                    else:
-                        # replace all
-                        new_name = child.get_name().replace(substrings[0], substrings[1])
-                        child.set_name(new_name)
-                    if recurse:
-                        traverse_egg(child, ctx)
-
-        traverse_egg(egg, self.egg_datas[egg])
+        for group in groups:
+            if rename_type == EggGroupRenameType.RenamePrefixes:
+                new_name = strip_group_prefix(group, substrings)
+            elif rename_type == EggGroupRenameType.RenameSuffixes:
+                new_name = strip_group_suffix(group, substrings)
+            else:
+                # replace all
+                new_name = group.get_name().replace(substrings[0], substrings[1])
+            node_index.rename_node(group, new_name)
 
     """
     Egg Attribute Management
@@ -258,36 +619,33 @@ class EggMan(object):
 
     @verify_integrity
     def apply_attributes(self, egg_base: EggData, egg_attributes: dict[EggAttribute] = None) -> None:
-        ctx = self.egg_datas.get(egg_base)
+        ctx = self.load_egg(egg_base)
 
         if not egg_attributes:
             egg_attributes = dict()
 
-        dirty = False
+        attribute_entries = [(attribute, egg_attributes[attribute]) for attribute in egg_attributes.keys()]
+        attribute_entries += [(attribute, None) for attribute in ctx.egg_attributes]
+        if not attribute_entries:
+            return
 
-        for attribute in egg_attributes.keys():
-            node_entries = egg_attributes[attribute]
-            attribute.apply(egg_base, ctx, node_entries)
-            dirty = True
-        for attribute in ctx.egg_attributes:
-            attribute.apply(egg_base, ctx)
-            dirty = True
-        if dirty:
-            self.mark_dirty(egg_base)
+        # Applies every attribute in a single walk down the egg (where it's safe to do so)
+        EggAttributeVisitor(attribute_entries, node_index=self.get_node_index(egg_base)).apply(egg_base, ctx)
+        self.mark_dirty(egg_base)
 
-    def _replace_object_types(self, ctx: EggContext, target_node: EggGroup) -> None:
+    @staticmethod
+    def _replace_object_types(ctx: EggContext, target_node: EggGroup) -> None:
         if not hasattr(target_node, "getObjectTypes"):
             return
-        # Hack- Find egg data from ctx (reverse operation)
-        egg_base = list(filter(lambda x: self.egg_datas[x] == ctx, self.egg_datas))[0]
         for object_type_name in target_node.getObjectTypes():
             object_type_def = ObjectTypeDefs.get(object_type_name, list())
             # If we don't have an <ObjectType> defined for this instance, just keep it on the egg file and move on.
             if not object_type_def:
                 continue
             for attribute in object_type_def:
-                # Apply EggAttribute equivalents defined for this object type
-                attribute.apply(egg_base, ctx, node_entries=[target_node.getName()])
+                # Apply EggAttribute equivalents defined for this object type.
+                # The <ObjectType> only describes the group declaring it, so there's no need to look further.
+                attribute.apply_to_subtree(target_node, ctx, node_entries=[target_node.getName()])
             target_node.removeObjectType(object_type_name)
             ctx.dirty = True
 
@@ -389,24 +747,43 @@ class EggMan(object):
 
         Recursively replaces an EggTexture with another in a EggData instance.
         """
+        self.replace_textures(egg, {old_tex: new_tex})
 
-        def traverse_egg(egg, ctx):
-            """
-            Traverses down an egg tree and records data mapped to the ctx key.
+    def replace_textures(self, egg: EggData, texture_mapping: dict[EggTexture, EggTexture]) -> None:
+        """
+        Replaces several EggTextures at once. Each polygon's texture list is rewritten at most once,
+        and polygons that don't use any of the old textures are left alone.
 
-            :param egg: Egg to traverse
-            :type egg: EggData | EggGroup
-            :param ctx: The original EggContext, required to keep things in order during recursion.
-            :type ctx: EggContext
-            """
-            # we ask for ctx just to keep things in order
-            for child in egg.getChildren():
-                if isinstance(child, EggGroupNode):
-                    traverse_egg(child, ctx)
-                if isinstance(child, EggPolygon):
-                    self._replace_poly_tref(child, new_tex, old_tex)
+        Like _replace_poly_tref, polygon textures that aren't one of the old textures but share its filename
+        are replaced as well.
 
-        traverse_egg(egg, self.egg_datas[egg])
+        :param dict texture_mapping: { old EggTexture : new EggTexture }
+        """
+        if not texture_mapping:
+            return
+        node_index = self.get_node_index(egg)
+        filename_mapping = dict()
+        for old_tex, new_tex in texture_mapping.items():
+            filename_mapping.setdefault(old_tex.getFilename().getFullpath(), new_tex)
+
+        # { texture used by polygons : texture to use instead }
+        replacements = dict()
+        for egg_texture in node_index.polygons_by_texture:
+            new_tex = texture_mapping.get(egg_texture)
+            if new_tex is None:
+                new_tex = filename_mapping.get(egg_texture.getFilename().getFullpath())
+            if new_tex is not None and new_tex != egg_texture:
+                replacements[egg_texture] = new_tex
+
+        egg_polygons = dict()
+        for egg_texture in replacements:
+            egg_polygons.update(dict.fromkeys(node_index.get_polygons(egg_texture)))
+        for egg_polygon in egg_polygons:
+            old_textures = egg_polygon.getTextures()
+            egg_polygon.clearTexture()
+            for egg_texture in old_textures:
+                egg_polygon.addTexture(replacements.get(egg_texture, egg_texture))
+            node_index.update_polygon_textures(egg_polygon, old_textures)
 
     def repath_egg_texture(self, egg: EggData, egg_texture: EggTexture, filename: Filename) -> None:
         """
@@ -421,17 +798,60 @@ class EggMan(object):
         self.mark_dirty(egg)
 
         test_tref = "test_tref"
-        ctx = self.egg_datas[egg]
+        ctx = self.load_egg(egg)
         # gotta iterate through the texture set to find our particular EggTexture
+        texture_mapping = dict()
         for egg_tex in ctx.egg_textures:
             if egg_tex != egg_texture:
                 continue
             temp_tex = EggTexture(egg_texture)
             temp_tex.assign(self.rebase_egg_texture(test_tref, filename, egg_tex))
-            self.do_tex_replace(egg, new_tex=temp_tex, old_tex=egg_tex)
+            texture_mapping[egg_tex] = temp_tex
+        self.replace_textures(egg, texture_mapping)
+        for egg_tex in texture_mapping:
             egg_tex.setFilename(filename)
+        # Also brings the texture index up-to-date
         self.rename_trefs(egg)
 
+    def get_texture_abspath(self, egg: EggData | EggContext, texture_path: str | Filename) -> str:
+        """
+        Resolves a texture path as written in an egg to an absolute, OS specific path.
+        Relative texture paths are relative to the directory of the egg.
+        """
+        ctx = egg if isinstance(egg, EggContext) else self.egg_datas[egg]
+        if not isinstance(texture_path, Filename):
+            texture_path = Filename(texture_path)
+        egg_dir = os.path.dirname(os.path.abspath(ctx.filename.toOsSpecific()))
+        return os.path.normpath(os.path.join(egg_dir, texture_path.toOsSpecific()))
+
+    def repath_texture_files(self, egg: EggData, path_mapping: dict[str, str]) -> int:
+        """
+        Points every EggTexture whose file is one of the old paths at the new file. TRefs are left alone.
+
+        New paths are written relative to the egg, unless they are on another drive.
+
+        :param dict path_mapping: { absolute old texture path : absolute new texture path }
+        :return: number of textures repathed
+        """
+        ctx = self.load_egg(egg)
+        egg_dir = os.path.dirname(os.path.abspath(ctx.filename.toOsSpecific()))
+        repathed = 0
+        for egg_texture in ctx.egg_textures:
+            new_path = path_mapping.get(self.get_texture_abspath(ctx, egg_texture.getFilename()))
+            if not new_path:
+                continue
+            try:
+                new_path = os.path.relpath(new_path, egg_dir)
+            except ValueError:
+                # Different drive, keep it absolute
+                pass
+            egg_texture.setFilename(Filename.fromOsSpecific(new_path))
+            repathed += 1
+        if repathed:
+            self.mark_dirty(ctx)
+            self._index_egg_textures(egg, ctx)
+        return repathed
+
     def get_tref(self, egg: EggData, egg_texture: EggTexture) -> str:
         """
         Gets the name of the tref for the given EggTexture
@@ -441,16 +861,17 @@ class EggMan(object):
             <TRef> { texture1 }
         will return 'texture1'
         """
-        ctx = self.egg_datas[egg]
+        ctx = self.load_egg(egg)
         # Ya I know, looks ugly, but don't blame me! There's no way to get the TRef from the Egg API!
         return repr(
             ctx.egg_texture_collection.findFilename(egg_texture.getFilename())
         ).replace("EggTexture ", "", 1)
 
     def _replace_tref(self, egg: EggData, old_tex: EggTexture, new_tex: EggTexture) -> None:
-        ctx = self.egg_datas[egg]
+        ctx = self.load_egg(egg)
         self.do_tex_replace(egg, new_tex, old_tex)
         old_tex.assign(new_tex)
+        self._index_egg_textures(egg, ctx)
         self.mark_dirty(ctx)
 
     def rename_trefs(self, egg: EggData) -> None:
@@ -461,13 +882,17 @@ class EggMan(object):
         <Texture> texture1 { ... }
         <TRef> texture1
         """
-        ctx = self.egg_datas[egg]
+        ctx = self.load_egg(egg)
+        texture_mapping = dict()
         for egg_tex in ctx.egg_textures:
             self.mark_dirty(ctx)
             egg_fn = egg_tex.getFilename().getBasenameWoExtension()
-            new_tex = self.rebase_egg_texture(egg_fn, egg_tex.getFullpath(), egg_tex)
-            self.do_tex_replace(egg, new_tex, egg_tex)
+            texture_mapping[egg_tex] = self.rebase_egg_texture(egg_fn, egg_tex.getFullpath(), egg_tex)
+        # Every polygon gets its textures swapped in one go
+        self.replace_textures(egg, texture_mapping)
+        for egg_tex, new_tex in texture_mapping.items():
             egg_tex.assign(new_tex)
+        self._index_egg_textures(egg, ctx)
         # Guarantees that each texture in the collection has a unique TRef name
         # Hmm, maybe we shouldn't put it here just yet. This leads ot .ref1.png files getting exported.
         # ctx.egg_texture_collection.uniquifyTrefs()
@@ -485,7 +910,7 @@ class EggMan(object):
 
     def get_current_textures(self, egg: EggData) -> list[EggTexture]:
         # workaround attempt
-        ctx = self.egg_datas[egg]
+        ctx = self.load_egg(egg)
         egg_textures = []
         for texture in ctx.egg_textures:
             egg_textures.append(texture)
@@ -493,21 +918,23 @@ class EggMan(object):
 
     def get_texture_filepaths(self, egg: EggData) -> list[Filename]:
         ctx = self.egg_datas[egg]
+        if not ctx.loaded:
+            # Lazily registered, see if we can get away with not reading it.
+            return self.get_scan_record(egg).get_texture_filepaths()
         # test = list(lambda texname: texname.getFilename() for texname in ctx.egg_textures)
         return [texname.getFilename() for texname in ctx.egg_textures]
 
     def get_texture_basenames(self, egg: EggData, include_extension: bool = True) -> list[str]:
-        ctx = self.egg_datas[egg]
-        # test = list(lambda texname: texname.getFilename() for texname in ctx.egg_textures)
+        texture_filepaths = self.get_texture_filepaths(egg)
         if include_extension:
-            return [texname.getFilename().getBasename() for texname in ctx.egg_textures]
-        return [texname.getFilename().getBasenameWoExtension() for texname in ctx.egg_textures]
+            return [texture_filepath.getBasename() for texture_filepath in texture_filepaths]
+        return [texture_filepath.getBasenameWoExtension() for texture_filepath in texture_filepaths]
 
     def get_texture_by_name(self, egg: EggData, texture_name: str) -> EggTexture:
         """
         Ensure that texture_name is the Basename (.getBasename()))
         """
-        ctx = self.egg_datas[egg]
+        ctx = self.load_egg(egg)
         for egg_texture in ctx.egg_textures:
             if texture_name in egg_texture.getFilename().getBasename():
                 return egg_texture
@@ -557,10 +984,12 @@ class EggMan(object):
     """
 
     def mark_dirty(self, egg: EggData | EggContext) -> None:
-        if isinstance(egg, EggContext):
-            egg.dirty = True
-        else:
-            self.egg_datas[egg].dirty = True
+        ctx = egg if isinstance(egg, EggContext) else self.egg_datas[egg]
+        if ctx.failed:
+            # Whatever is in memory is not what's on the disk, it must never be written over the file
+            logging.warning(f"{ctx.filename} could not be read, not marking it dirty")
+            return
+        ctx.dirty = True
 
     def resolve_egg_textures(self, egg: EggData, want_auto_resolve: bool = True, try_names: bool = True) -> None:
         def auto_resolve(tex_path: str):
@@ -570,19 +999,18 @@ class EggMan(object):
             tex_file = Path(tex_path).name
             if try_names:
                 tex_file = self.NameResolver.try_different_names(tex_file)
-            for search_path in self.NameResolver.search_paths:
-                new_tex_file = Filename.fromOsSpecific(os.path.join(search_path, tex_file))
-                if not os.path.isfile(new_tex_file):
-                    continue
-                logging.info(f"Rebasing texture path for {tex_file} to {search_path}")
+            # Looked up in the resolver's index of the search paths, the first search path having it wins
+            new_tex_file = self.NameResolver.find_file(tex_file)
+            if new_tex_file:
+                logging.info(f"Rebasing texture path for {tex_file} to {os.path.dirname(new_tex_file)}")
                 tex_path = os.path.relpath(
                     new_tex_file, os.path.dirname(os.path.abspath(ctx.filename))
                 ).replace(os.sep, '/')
-                logging.debug(f"new tex path--> {tex_path} ({search_path}")
+                logging.debug(f"new tex path--> {tex_path} ({os.path.dirname(new_tex_file)}")
                 self.mark_dirty(ctx)
             return tex_path
 
-        ctx = self.egg_datas[egg]
+        ctx = self.load_egg(egg)
 
         for egg_texture in ctx.egg_textures:
             fixed_path = os.path.abspath(os.path.join(os.path.dirname(ctx.filename), egg_texture.getFullpath()))
@@ -624,9 +1052,10 @@ class EggMan(object):
                 logging.info(f"Found texture {egg_texture.getFilename()}")
                 logging.debug(f"(filepath){os.path.abspath(egg_texture.getFullpath())}")
                 logging.debug(f"(fixedpath){fixed_path}")
+        self._index_egg_textures(egg, ctx)
 
     def resolve_external_refs(self, egg: EggData):
-        ctx = self.egg_datas[egg]
+        ctx = self.load_egg(egg)
         for external_ref in ctx.egg_ext_file_refs:
             # TODO, can copy what was done w/ ensuring texture
             pass
@@ -638,9 +1067,14 @@ class EggMan(object):
     def remove_texture_duplicates(self, egg: EggData = None):
         if not egg:
             for egg_data in self.egg_datas.keys():
-                egg_data.collapseEquivalentTextures()
-        else:
-            egg.collapseEquivalentTextures()
+                self.remove_texture_duplicates(egg_data)
+            return
+        ctx = self.load_egg(egg)
+        ctx.node_index.stale = True
+        egg.collapseEquivalentTextures()
+        # Collapsed textures are removed from the egg
+        ctx.egg_textures = {egg_texture for egg_texture in ctx.egg_textures if egg_texture.getParent()}
+        self._index_egg_textures(egg, ctx)
 
     def remove_timestamps(self, egg: EggData = None) -> None:
         if not egg:
@@ -650,7 +1084,7 @@ class EggMan(object):
             self.remove_timestamp(egg)
 
     def remove_timestamp(self, egg: EggData = None) -> None:
-        ctx = self.egg_datas[egg]
+        ctx = self.load_egg(egg)
         ctx.egg_timestamp_old = egg.getEggTimestamp()
         egg.setEggTimestamp(1)
         self.mark_dirty(egg)
@@ -667,7 +1101,7 @@ class EggMan(object):
             self.resolve_egg_textures(egg)
 
     def remove_egg_materials(self, egg: EggData) -> None:
-        ctx = self.egg_datas[egg]
+        ctx = self.load_egg(egg)
         for material in ctx.egg_materials:
             material.clearAmb()
             material.clearBase()
@@ -682,11 +1116,12 @@ class EggMan(object):
 
         egg.collapseEquivalentMaterials()
         ctx.egg_materials = set()
+        ctx.node_index.stale = True
         self.mark_dirty(ctx)
 
     def remove_all_egg_materials(self) -> None:
         for egg in self.egg_datas.keys():
-            ctx = self.egg_datas[egg]
+            ctx = self.load_egg(egg)
             for material in ctx.egg_materials:
                 material.clearAmb()
                 material.clearBase()
@@ -701,6 +1136,7 @@ class EggMan(object):
 
             egg.collapseEquivalentMaterials()
             ctx.egg_materials = set()
+            ctx.node_index.stale = True
             self.mark_dirty(ctx)
 
     def purge_all_comments(self, egg: EggData = None) -> None:
@@ -713,6 +1149,7 @@ class EggMan(object):
     def purge_comments(self, egg: EggData) -> None:
         # We can probably actually put EggComments anywhere in the egg file, but people mostly
         # put them in the beginning of the egg file not in a nested group.
+        self.load_egg(egg)
         for child in egg.getChildren():
             if isinstance(child, EggComment):
                 # idk how to completely get rid of Comments rn
@@ -724,113 +1161,370 @@ class EggMan(object):
     Write/Output Methods
     """
 
-    def write_all_eggs(self, custom_suffix="", dryrun=False):
+    def write_all_eggs(self, custom_suffix="", dryrun=False, workers: int = 1) -> dict[Filename, str]:
         """
         Writes egg files through the EggData writeEgg method.
 
         Not always guaranteed to output changes made to the egg file, and will export floating point values
         up to the number defined in your Config file.
+
+        :param int workers: Number of eggs written at once, see write_eggs.
+        :return: { Filename : reason } for every egg that could not be written.
         """
-        for egg_data in self.egg_datas.keys():
-            self.write_egg(egg_data, custom_suffix=custom_suffix, dryrun=dryrun)
+        return self.write_eggs(list(self.egg_datas.keys()), custom_suffix=custom_suffix, dryrun=dryrun,
+                               workers=workers)
 
-    def write_egg(self, egg, filename: Filename = None, custom_suffix="", dryrun=False):
+    def write_egg(self, egg, filename: Filename = None, custom_suffix="", dryrun=False) -> bool:
         """
         Writes egg files through the EggData writeEgg method.
 
         Not always guaranteed to output changes made to the egg file, and will export floating point values
         up to the number defined in your Config file.
+
+        :return: False if the egg could not be written.
         """
-        if not filename:
-            filename = egg.egg_filename
-        filename = Filename(filename.getFullpath() + custom_suffix)
-        ctx = self.egg_datas[egg]
-        if ctx.dirty:
-            if not dryrun:
-                # If we put uniquifyTRefs here, it will not generate .tref.png files.
-                ctx.egg_texture_collection.uniquifyTrefs()
-                if not ctx.egg_save_timestamp:
-                    self.remove_timestamp(egg)
-                # We get a PermissionDenied error once in a while with models that are not scoped to the target env.
-                if not egg.writeEgg(filename + custom_suffix):
-                    logging.error(f"something went wrong when trying to write {egg.egg_filename}")
-            else:
-                print(egg)
-        else:
-            logging.debug(f"{egg.egg_filename} was not dirty, not writing anything")
+        return not self._write_eggs([(egg, filename)], custom_suffix, manually=False, dryrun=dryrun)
 
-    def write_all_eggs_manually(self, custom_suffix=""):
+    def write_all_eggs_manually(self, custom_suffix="", dryrun=False, workers: int = 1,
+                                precision: VertexPrecisionConfig = None) -> dict[Filename, str]:
         """
         Exports all of the Egg files in EggMan manually. This will guarantee that something does get exported.
-        By default, floating point values will be truncated to .4f
+        By default, floating point values are written with Panda's 6 significant digits.
+
+        :param int workers: Number of eggs written at once, see write_eggs.
+        :param VertexPrecisionConfig precision: Decimals written per vertex channel, see EggVertexPoolWriter.
+        :return: { Filename : reason } for every egg that could not be written.
         """
         # I don't think this is going to cause any visual dislocation issues. The precision comes from
         # a floating point error nonetheless. We are also talking about a 0.0000xxxxxx difference.
-        for egg_data in self.egg_datas.keys():
-            self.write_egg_manually(egg_data, custom_suffix=custom_suffix)
+        return self.write_eggs(list(self.egg_datas.keys()), custom_suffix=custom_suffix, manually=True,
+                               dryrun=dryrun, workers=workers, precision=precision)
 
-    def write_egg_manually(self, egg, filename="", custom_suffix="", ):
+    def write_egg_manually(self, egg, filename="", custom_suffix="", precision: VertexPrecisionConfig = None) -> bool:
         """
         Don't know why this currently happens, but there are instances where trying to save the egg a la writeEgg
         doesn't work. This is the alternative manual approach, where we just write out a string.
 
-        Floating point values will be truncated to .4f
+        Floating point values are written with Panda's 6 significant digits, unless a precision is given.
+
+        :param VertexPrecisionConfig precision: Decimals written per vertex channel, see EggVertexPoolWriter.
+        :return: False if the egg could not be written.
+        """
+        return not self._write_eggs([(egg, filename)], custom_suffix, manually=True, precision=precision)
+
+    def write_eggs(self, eggs: list[EggData], custom_suffix="", manually=False, dryrun=False,
+                   workers: int = 1, precision: VertexPrecisionConfig = None) -> dict[Filename, str]:
+        """
+        Writes the dirty eggs out of the given ones over their own files (plus custom_suffix).
+
+        The eggs are prepared for writing one after another, then serialized & written by a thread pool.
+        Panda holds the GIL while it serializes an egg, so the eggs are still serialized one at a time,
+        only their hashing, compression & file I/O overlap.
+        An egg that fails to write doesn't stop the others, the reason is logged and kept in failed_writes.
+
+        :param bool manually: Write the eggs like write_egg_manually instead of write_egg.
+        :param int workers: Number of eggs whose hashing, compression & file I/O may overlap.
+        :param VertexPrecisionConfig precision: Decimals written per vertex channel, only for manual writes.
+        :return: { Filename : reason } for every egg that could not be written.
         """
+        return self._write_eggs([(egg, None) for egg in eggs], custom_suffix, manually, dryrun, workers, precision)
+
+    def _prepare_write(self, egg: EggData, filename, custom_suffix: str, dryrun: bool) -> Filename | None:
+        """
+        :return: Where the egg should be written, or None if there's nothing to write.
+            Eggs that turned out to be unreadable are returned too, so that the caller can report them.
+        """
+        ctx = self.egg_datas[egg]
         if not filename:
             filename = egg.egg_filename
+        elif not isinstance(filename, Filename):
+            filename = Filename.fromOsSpecific(filename)
         filename = Filename(filename.getFullpath() + custom_suffix)
-        ctx = self.egg_datas[egg]
-        if ctx.dirty:
-            # If we put uniquifyTRefs here, it will not generate .tref.png files.
-            ctx.egg_texture_collection.uniquifyTrefs()
-            if not ctx.egg_save_timestamp:
-                self.remove_timestamp(egg)
-            # We get a PermissionDenied error once in a while with models that are not scoped to the target env.
-            try:
-                with open(filename, "w") as egg_file:
-                    logging.info(f"trying to write {filename}")
-                    egg_file.write(str(egg))
-            except Exception as e:
-                print(f"Failed to save file ({e})")
+        if not ctx.dirty:
+            logging.debug(f"{filename} was not dirty, not writing anything")
+            return None
+        if self.load_egg(egg).failed:
+            return filename
+        if dryrun:
+            print(egg)
+            return None
+        # If we put uniquifyTRefs here, it will not generate .tref.png files.
+        ctx.egg_texture_collection.uniquifyTrefs()
+        if not ctx.egg_save_timestamp:
+            self.remove_timestamp(egg)
+        return filename
+
+    @staticmethod
+    def serialize_egg(egg: EggData) -> bytes:
+        """
+        :return: The egg file's contents, as write_egg would write them to disk.
+        """
+        stream = StringStream()
+        if not egg.writeEgg(stream):
+            raise OSError("EggData could not serialize the egg")
+        return stream.getData().replace(b"\n", os.linesep.encode())
+
+    @staticmethod
+    def stream_egg(egg: EggData, precision: VertexPrecisionConfig = None):
+        """
+        Serializes the egg like write_egg_manually, one node at a time, so that the whole text of
+        a large egg never has to sit in memory.
+
+        :param VertexPrecisionConfig precision: Decimals written per vertex channel, see EggVertexPoolWriter.
+        :return: Iterator over the chunks of the egg file's contents.
+        """
+        # Same encoding as a file opened in text mode
+        encoding = codecs.lookup(locale.getpreferredencoding(False)).name
+        pool_writer = EggVertexPoolWriter(precision) if precision else None
+        for chunk in iter_egg_chunks(egg, pool_writer=pool_writer):
+            if encoding != "utf-8":
+                chunk = chunk.decode("utf-8").encode(encoding)
+            yield chunk.replace(b"\n", os.linesep.encode())
+
+    @staticmethod
+    def _write_egg_file(egg: EggData, filename: Filename, manually: bool,
+                        precision: VertexPrecisionConfig = None,
+                        compression_level: int = PZ_COMPRESSION_LEVEL) -> str | None:
+        """
+        Only touches the egg itself, so several eggs can be written from different threads.
+
+        Files that already hold the same contents are left untouched (not even their timestamps change),
+        everything else is written to a temporary file first and then renamed over the old one.
+
+        :return: Why the egg could not be written, or None if it was.
+        """
+        # We get a PermissionDenied error once in a while with models that are not scoped to the target env.
+        try:
+            if manually:
+                logging.info(f"trying to write {filename}")
+                written = write_chunks_if_changed(filename.toOsSpecific(), EggMan.stream_egg(egg, precision),
+                                                  compression_level)
+            else:
+                written = write_if_changed(filename.toOsSpecific(), EggMan.serialize_egg(egg), compression_level)
+            if not written:
+                logging.debug(f"{filename} is already up-to-date, not writing anything")
+        except Exception as e:
+            return str(e)
+        return None
+
+    def _write_eggs(self, egg_filenames: list, custom_suffix: str, manually: bool, dryrun: bool = False,
+                    workers: int = 1, precision: VertexPrecisionConfig = None) -> dict[Filename, str]:
+        """
+        :param list egg_filenames: [(EggData, Filename or None for the egg's own file)]
+        """
+        # Preparing touches shared state (texture collections, the node & texture indexes), so it stays serial.
+        writes = list()
+        failures = dict()
+        for egg, filename in egg_filenames:
+            filename = self._prepare_write(egg, filename, custom_suffix, dryrun)
+            if not filename:
+                continue
+            ctx = self.egg_datas[egg]
+            if ctx.failed:
+                failures[filename] = self.failed_eggs.get(ctx.filename, "The egg could not be read")
+                logging.error(f"Not writing {filename.getFullpath()} ({failures[filename]})")
+                continue
+            writes.append((egg, filename))
+
+        def write_egg_file(write):
+            egg, filename = write
+            return self._write_egg_file(egg, filename, manually, precision, self.pzip.compression_level)
+
+        # Not a process pool: handing an EggData to another process means pickling it, which serializes it here
+        # anyway and rounds its vertices to the 6 significant digits Panda writes, losing precision writes.
+        if workers > 1 and len(writes) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                errors = list(executor.map(write_egg_file, writes))
         else:
-            pass
-            # logging.debug(f"not rewriting {filename}")
+            errors = [write_egg_file(write) for write in writes]
+
+        for (egg, filename), error in zip(writes, errors):
+            if error:
+                logging.error(f"Failed to write {filename.getFullpath()} ({error})")
+                failures[filename] = error
+            else:
+                self._mark_written(self.egg_datas[egg], filename)
+                self.failed_writes.pop(filename, None)
+        self.failed_writes.update(failures)
+        return failures
+
+    @staticmethod
+    def _mark_written(ctx: EggContext, filename: Filename) -> None:
+        # If the egg was written over its own file, what's on the disk is now up-to-date.
+        if filename == ctx.filename:
+            ctx.dirty = False
 
     @staticmethod
-    def rewrite_egg_manually(eggfile):
+    def rewrite_egg_manually(eggfile, precision: VertexPrecisionConfig = None,
+                             compression_level: int = PZ_COMPRESSION_LEVEL):
         """
         Open, read, and re-write an egg file.
 
-        Since we are doing the manual approach, floating point values will be .4f by default.
+        :param VertexPrecisionConfig precision: Decimals written per vertex channel, see EggVertexPoolWriter.
+        :param int compression_level: zlib level (0-9) used when writing .pz eggs.
         """
         if isinstance(eggfile, EggData):
             egg_data = eggfile
-            filename = egg_data.getFilename()
+            filename = egg_data.getEggFilename()
         else:
             egg_data = EggData()
             egg_data.read(eggfile)
             filename = eggfile
+        if isinstance(filename, Filename):
+            filename = filename.toOsSpecific()
         try:
-            with open(filename, "w") as egg_file:
-                egg_file.write(str(egg_data))
+            write_chunks_if_changed(str(filename), EggMan.stream_egg(egg_data, precision), compression_level)
         except Exception as e:
             print(f"Failed to save file ({e})")
 
+    def write_bams(self, eggs: list[EggData] = None, workers: int = 1, force: bool = False,
+                   output_dir: str = None, root: str = None, release: bool = False) -> BamConversionReport:
+        """
+        Converts eggs into .bam files in-process, through Panda's egg loader.
+
+        Loaded eggs are converted from what is in memory, so dirty eggs don't have to be written out first.
+        Eggs that aren't dirty and whose .bam is newer than the egg file are skipped.
+        An egg that fails to convert doesn't stop the others, the reason is logged and kept in the report.
+        Eggs whose .bam would overwrite the .bam of an egg registered before them (like a.egg and a.egg.pz)
+        are not converted either.
+
+        :param int workers: If above 1, eggs are converted across a process pool of this size.
+        :param bool force: Convert eggs even if their .bam is up-to-date.
+        :param str output_dir: Directory the .bam files go into, keeping their path relative to root.
+            Defaults to each egg's own directory.
+        :param str root: See output_dir, defaults to the deepest folder all of the registered eggs are in.
+        :param bool release: Let the egg loader take the contents of loaded eggs that aren't dirty instead of
+            converting a copy. Those eggs are unloaded afterwards (see unload_egg). Only used without workers.
+        :return: The BamConversionReport
+        """
+        if eggs is None:
+            eggs = list(self.egg_datas.keys())
+        report = BamConversionReport()
+        # Looked up for every registered egg, so that eggs converted in different calls (windows) can't collide
+        if output_dir and not root and self.egg_datas:
+            root = os.path.commonpath([
+                os.path.dirname(os.path.abspath(ctx.filename.toOsSpecific())) for ctx in self.egg_datas.values()
+            ])
+        bam_owners = dict()  # { bam path : path of the egg that gets to write it }
+        for ctx in self.egg_datas.values():
+            if not ctx.failed:
+                egg_filepath = ctx.filename.toOsSpecific()
+                bam_key = os.path.normcase(os.path.abspath(get_bam_path(egg_filepath, output_dir, root)))
+                bam_owners.setdefault(bam_key, egg_filepath)
+
+        conversions = list()
+        for egg in eggs:
+            ctx = self.egg_datas[egg]
+            egg_filepath = ctx.filename.toOsSpecific()
+            if ctx.failed:
+                report.failed_files[egg_filepath] = self.failed_eggs.get(ctx.filename, "The egg could not be read")
+                continue
+            bam_path = get_bam_path(egg_filepath, output_dir, root)
+            bam_owner = bam_owners[os.path.normcase(os.path.abspath(bam_path))]
+            if bam_owner != egg_filepath:
+                report.failed_files[egg_filepath] = f"{bam_path} is already written for {bam_owner}"
+                logging.error(f"Not converting {egg_filepath} ({report.failed_files[egg_filepath]})")
+                continue
+            if not (force or ctx.dirty) and is_bam_up_to_date(egg_filepath, bam_path):
+                logging.debug(f"{bam_path} is already up-to-date, not converting {ctx.filename}")
+                report.skipped_files.append(egg_filepath)
+                continue
+            conversions.append((egg, egg_filepath, bam_path))
+
+        if workers > 1 and len(conversions) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = list()
+                for egg, egg_filepath, bam_path in conversions:
+                    ctx = self.egg_datas[egg]
+                    # Eggs that match their file are cheaper to read again in the worker than to send over
+                    egg_data = egg if ctx.dirty else None
+                    futures.append(executor.submit(_convert_egg_worker, egg_data, egg_filepath, bam_path))
+                errors = list()
+                for future in futures:
+                    try:
+                        errors.append(future.result())
+                    except Exception as e:
+                        errors.append(str(e))
+        else:
+            errors = list()
+            for egg, egg_filepath, bam_path in conversions:
+                ctx = self.egg_datas[egg]
+                if not ctx.loaded:
+                    egg_data = None
+                elif release and not ctx.dirty:
+                    egg_data = egg
+                else:
+                    # The egg loader takes the contents of the EggData it is given
+                    egg_data = pickle.loads(pickle.dumps(egg))
+                errors.append(_convert_egg_worker(egg_data, egg_filepath, bam_path))
+                if egg_data is egg:
+                    self.unload_egg(egg)
+
+        for (egg, egg_filepath, bam_path), error in zip(conversions, errors):
+            if error:
+                logging.error(f"Failed to convert {egg_filepath} into {bam_path} ({error})")
+                report.failed_files[egg_filepath] = error
+            else:
+                report.converted_files.append((egg_filepath, bam_path))
+        return report
+
+
+def _read_egg_worker(egg_filepath: str) -> tuple[EggData | None, EggContext | None]:
+    """
+    Reads & scans a single egg so that <ObjectType> expansion happens in the worker.
+    Only the registration traversal is run, building a whole EggMan (search path index & all) per egg is not needed.
+
+    :return: The scanned EggData and its EggContext, or (None, None) if it could not be read.
+    """
+    fp = Filename.fromOsSpecific(egg_filepath)
+    egg_data = EggData()
+    if not egg_data.read(fp):
+        return None, None
+    ctx = EggContext(fp)
+    EggMan._traverse_egg(egg_data, ctx)
+    return egg_data, ctx
+
+
+def _scan_egg_worker(egg_filepath: str) -> tuple[EggScanRecord | None, bool]:
+    """
+    Process pool entry point for parallel registration.
+
+    :return: The egg's scan summary (None if it could not be read), and whether the scan dirtied it.
+    """
+    egg_data, ctx = _read_egg_worker(egg_filepath)
+    if egg_data is None:
+        return None, False
+    return EggScanRecord.from_context(ctx), ctx.dirty
+
+
+def _convert_egg_worker(egg_data: EggData | None, egg_filepath: str, bam_path: str) -> str | None:
+    """
+    Process pool entry point for write_bams.
+
+    :param EggData egg_data: Egg to convert, its contents are taken by the egg loader.
+        If None, the egg file is read & scanned like during registration.
+    :return: Why the egg could not be converted, or None if it was.
+    """
+    if egg_data is None:
+        egg_data, _ = _read_egg_worker(egg_filepath)
+        if egg_data is None:
+            return "EggData could not read the file"
+    # The egg filename does not survive pickling
+    egg_data.setEggFilename(Filename.fromOsSpecific(egg_filepath))
+    try:
+        return convert_egg_data(egg_data, bam_path)
+    except OSError as e:
+        return str(e)
+
 
 """
 Test module
 """
 
 if __name__ == "__main__":
-    import os
-
-    file_list = []
+    from eggtools.utils.EggCrawler import crawl_eggs
 
-    target_path = os.getcwd()
-    for dirpath, _, filenames in os.walk(os.path.join(target_path)):
-        for file in filenames:
-            if file.endswith(".egg"):
-                print(f"adding file {file}")
-                file_list.append(os.path.abspath(os.path.join(dirpath, file)))
+    file_list = crawl_eggs(os.getcwd())
+    print(f"found {len(file_list)} egg files")
 
     eggman = EggMan(file_list)
@@ -1,6 +1,48 @@
-import fnmatch
+import os
+import re
 from dataclasses import dataclass, field
 
+# Characters that turn a NodeNameConfig term into a glob pattern
+GLOB_CHARS = set("*?[")
+
+# Names remembered per NodeNameConfig before the memo starts over
+MAX_MEMOIZED_NAMES = 1 << 16
+
+NAME_RULE_TYPES = ("prefix", "suffix", "regex")
+
+# NodeNameConfig fields holding name terms
+NODE_TERM_FIELDS = frozenset({"NODE_INCLUDES", "NODE_STARTSWITH", "NODE_ENDSWITH", "NODE_GLOBS"})
+
+
+def glob_to_regex(pattern: str) -> str:
+    """
+    Translates a glob pattern (*, ?, [seq], [!seq]) into a regex that has to match the whole name.
+    """
+    out = list()
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        i += 1
+        if char == "*":
+            out.append(".*")
+        elif char == "?":
+            out.append(".")
+        elif char == "[":
+            end = pattern.find("]", i + 1 if pattern[i:i + 1] in ("!", "]") else i)
+            if end == -1:
+                out.append(re.escape(char))
+                continue
+            contents = pattern[i:end].replace("\\", "\\\\")
+            if contents.startswith("!"):
+                contents = "^" + contents[1:]
+            elif contents.startswith("^"):
+                contents = "\\" + contents
+            out.append(f"[{contents}]")
+            i = end + 1
+        else:
+            out.append(re.escape(char))
+    return "".join(out)
+
 
 @dataclass
 class NodeNameConfig:
@@ -9,32 +51,135 @@ class NodeNameConfig:
         - Replacing characters that start/end with a certain character (renaming)
         - Applying certain attributes to nodes that contain a certain string.
             - Don't use STARTS/ENDSWITH for configs related to attributes.
+
+    Terms containing *, ? or [ ] are glob patterns: coll_* in NODE_ENDSWITH matches any name with a coll_ in it.
+    NODE_GLOBS patterns have to match the whole name.
+
+    The terms are stored as tuples, assign new ones to change them (config.NODE_GLOBS += ("gate*",)).
     """
-    NODE_INCLUDES: list
-    NODE_STARTSWITH: list = field(default_factory=list)
-    NODE_ENDSWITH: list = field(default_factory=list)
-
-    def _populate(self, node_name):
-        self.NODE_INCLUDES = {
-            node for term in self.NODE_INCLUDES for node in fnmatch.filter([node_name], "*" + term + "*")
-        }
-        # self.NODE_INCLUDES.add(node_name)
-        self.NODE_STARTSWITH = {
-            node for term in self.NODE_STARTSWITH for node in fnmatch.filter([node_name], term + "*")
-        }
-        self.NODE_ENDSWITH = {
-            node for term in self.NODE_ENDSWITH for node in fnmatch.filter([node_name], "*" + term)
-        }
+    NODE_INCLUDES: tuple
+    NODE_STARTSWITH: tuple = ()
+    NODE_ENDSWITH: tuple = ()
+    NODE_GLOBS: tuple = ()
+
+    # Compiled from the terms the first time a name is checked after they were set, see _get_matcher
+    _matcher: object = field(default=None, init=False, repr=False, compare=False)
+    _compiled: bool = field(default=False, init=False, repr=False, compare=False)
+    _memo: dict = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def __setattr__(self, name, value):
+        if name in NODE_TERM_FIELDS:
+            value = tuple(value)
+            object.__setattr__(self, "_compiled", False)
+        object.__setattr__(self, name, value)
+
+    @staticmethod
+    def _term_to_regex(term: str) -> str:
+        if GLOB_CHARS.intersection(term):
+            return glob_to_regex(term)
+        return re.escape(term)
+
+    def _compile(self):
+        patterns = [f".*{self._term_to_regex(str(term))}.*" for term in self.NODE_INCLUDES]
+        patterns += [f"{self._term_to_regex(str(term))}.*" for term in self.NODE_STARTSWITH]
+        patterns += [f".*{self._term_to_regex(str(term))}" for term in self.NODE_ENDSWITH]
+        patterns += [glob_to_regex(str(term)) for term in self.NODE_GLOBS]
+        if not patterns:
+            return None
+        return re.compile("|".join(f"(?:{pattern})" for pattern in patterns), re.DOTALL)
+
+    def _get_matcher(self):
+        # The terms can't be edited in place, so setting one of them is the only thing that makes this stale
+        if not self._compiled:
+            self._matcher = self._compile()
+            self._compiled = True
+            self._memo = dict()
+        return self._matcher
 
     def check(self, name):
-        # TODO: fix
-        # self._populate(name)
-        # print(self.NODE_INCLUDES)
-        return (
-                any(term in name for term in self.NODE_INCLUDES) or
-                any(name.startswith(term) for term in self.NODE_STARTSWITH) or
-                any(name.endswith(term) for term in self.NODE_ENDSWITH)
-        )
+        matcher = self._get_matcher()
+        if matcher is None:
+            return False
+        result = self._memo.get(name)
+        if result is None:
+            if len(self._memo) >= MAX_MEMOIZED_NAMES:
+                self._memo = dict()
+            result = self._memo[name] = matcher.fullmatch(name) is not None
+        return result
+
+
+@dataclass
+class NameRewriteRule:
+    """
+    Rewrites a texture filename into another filename worth looking for, see EggNameResolver.
+
+        - prefix: Swaps the PATTERN prefix for REPLACEMENT. An empty PATTERN prepends REPLACEMENT instead,
+            unless the filename already starts with it.
+        - suffix: Same as prefix, at the end of the filename without its extension.
+        - regex: re.sub(PATTERN, REPLACEMENT, filename)
+
+    Rules that don't change the filename give no candidate.
+    """
+    RULE_TYPE: str
+    PATTERN: str
+    REPLACEMENT: str = ""
+
+    _regex: object = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if self.RULE_TYPE not in NAME_RULE_TYPES:
+            raise ValueError(f"Unknown name rule type {self.RULE_TYPE}, expected one of {NAME_RULE_TYPES}")
+        if self.RULE_TYPE == "regex":
+            self._regex = re.compile(self.PATTERN)
+
+    @classmethod
+    def from_dict(cls, rule: dict) -> "NameRewriteRule":
+        """
+        :param dict rule: {"type": ..., "pattern": ..., "replacement": ...}, as found in a config file.
+        """
+        return cls(rule["type"], rule.get("pattern", ""), rule.get("replacement", ""))
+
+    def rewrite(self, filename: str):
+        """
+        :return: The rewritten filename, or None if the rule doesn't apply.
+        """
+        if self.RULE_TYPE == "regex":
+            new_filename = self._regex.sub(self.REPLACEMENT, filename)
+            return new_filename if new_filename != filename else None
+        if self.RULE_TYPE == "prefix":
+            if self.PATTERN:
+                if not filename.startswith(self.PATTERN):
+                    return None
+                new_filename = self.REPLACEMENT + filename[len(self.PATTERN):]
+            elif filename.startswith(self.REPLACEMENT):
+                return None
+            else:
+                new_filename = self.REPLACEMENT + filename
+        else:
+            name, extension = os.path.splitext(filename)
+            if self.PATTERN:
+                if not name.endswith(self.PATTERN):
+                    return None
+                new_filename = name[:len(name) - len(self.PATTERN)] + self.REPLACEMENT + extension
+            elif name.endswith(self.REPLACEMENT):
+                return None
+            else:
+                new_filename = name + self.REPLACEMENT + extension
+        return new_filename if new_filename != filename else None
+
+
+@dataclass
+class VertexPrecisionConfig:
+    """
+    Decimals written for each vertex channel when eggs are written with a precision, see EggVertexPoolWriter.
+    Trailing zeros are left out.
+
+    NORMAL also covers the tangents & binormals of UVs. Morphs & aux data keep Panda's own formatting.
+    """
+    POSITION: int = 4
+    NORMAL: int = 4
+    UV: int = 5
+    COLOR: int = 3
 
 
 DualConfig = NodeNameConfig(
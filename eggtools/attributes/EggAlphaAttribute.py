@@ -27,6 +27,8 @@ name2id = {
 
 
 class EggAlphaAttribute(EggAttribute):
+    inherited_state = frozenset({"alpha"})
+
     def __init__(self, alpha_name, overwrite=False):
         """
         <Scalar> alpha { alpha_name }
@@ -6,6 +6,18 @@ from eggtools.EggManConfig import NodeNameConfig
 
 
 class EggAttribute(ABC):
+    # Whether the attribute can share a single egg traversal with other attributes (see EggAttributeVisitor).
+    # Attributes that modify anything other than the node they are visiting must set this to False.
+    fusable = True
+
+    # Render states that the attribute reads from the node's ancestors (determineAlphaMode etc.) or writes.
+    # Two attributes whose inherited states overlap are never applied in the same traversal.
+    inherited_state = frozenset()
+
+    # Whether _modify_node & _modify_polygon leave alone every node & TRef that get_name_targets/get_tref_targets
+    # don't accept. Lets EggAttributeVisitor go straight to the targeted nodes through the egg's EggNodeIndex.
+    targets_by_name = True
+
     def __hash__(self):
         return hash(f"{self.entry_type}_{self.name}{'_' if self.name else ''}{self.contents}")
 
@@ -33,37 +45,65 @@ class EggAttribute(ABC):
             node_entries += self.base_node_config.NODE_INCLUDES
         self.target_nodes = NodeNameConfig(node_entries)
 
+    def get_name_targets(self) -> list:
+        """
+        :return: [NodeNameConfig] that _modify_node checks node names against
+        """
+        return [self.target_nodes]
+
+    def get_tref_targets(self) -> list:
+        """
+        :return: [NodeNameConfig] that _modify_polygon checks TRef names against
+        """
+        return [self.target_nodes]
+
+    def prepare(self, node_entries=None):
+        """
+        Sets up the attribute's targets before it starts visiting the nodes of an egg.
+        """
+        if not node_entries:
+            node_entries = list()
+        self.set_target_nodes(node_entries)
+
     def apply(self, egg_base, egg_ctx, node_entries=None):
         # For now we will skip checking to see if we have already applied an EggAttribute with a given node
         # if egg_ctx in self.appliedToCtx:
         #     return
         if not egg_base:
             return
-        if not node_entries:
-            node_entries = list()
-        self.set_target_nodes(node_entries)
+        self.prepare(node_entries)
+        self._traverse_egg(egg_base, egg_ctx)
+
+    def apply_to_subtree(self, egg_node, egg_ctx, node_entries=None):
+        """
+        Same as apply, but only visits egg_node itself and the nodes below it instead of the whole egg.
+        """
+        if egg_node is None:
+            return
+        self.prepare(node_entries)
+        self._modify_node(egg_node)
+        if isinstance(egg_node, EggGroupNode):
+            self._traverse_egg(egg_node, egg_ctx)
 
-        def traverse_egg(egg, ctx):
-            """
-            Traverses down an egg tree and records data mapped to the ctx key.
-
-            :param egg: Egg to traverse
-            :type egg: EggData | EggGroup
-            :param ctx: The original EggContext, required to keep things in order during recursion.
-            :type ctx: EggContext
-            """
-            # we ask for ctx just to keep things in order
-            for child in egg.getChildren():
-                if isinstance(child, EggNode):
-                    self._modify_node(child)
-                if isinstance(child, EggGroupNode):
-                    traverse_egg(child, ctx)
-                if isinstance(child, EggPolygon):
-                    poly_textures = child.getTextures()
-                    for texture_ref in poly_textures:
-                        self._modify_polygon(child, texture_ref)
-
-        traverse_egg(egg_base, egg_ctx)
+    def _traverse_egg(self, egg, ctx):
+        """
+        Traverses down an egg tree and records data mapped to the ctx key.
+
+        :param egg: Egg to traverse
+        :type egg: EggData | EggGroup
+        :param ctx: The original EggContext, required to keep things in order during recursion.
+        :type ctx: EggContext
+        """
+        # we ask for ctx just to keep things in order
+        for child in egg.getChildren():
+            if isinstance(child, EggNode):
+                self._modify_node(child)
+            if isinstance(child, EggGroupNode):
+                self._traverse_egg(child, ctx)
+            if isinstance(child, EggPolygon):
+                poly_textures = child.getTextures()
+                for texture_ref in poly_textures:
+                    self._modify_polygon(child, texture_ref)
 
     @abstractmethod
     def _modify_polygon(self, egg_polygon, tref):
@@ -0,0 +1,107 @@
+"""
+Applies several EggAttributes to an egg with a single traversal.
+
+EggAttribute.apply walks the whole egg every time it is called, so applying N attributes costs N traversals.
+EggAttributeVisitor walks the egg once and hands every node (and every polygon's textures) to each attribute,
+in the same order the attributes would have been applied one after another.
+
+Given the egg's EggNodeIndex, attributes that only act on nodes they target by name skip the walk entirely
+and only visit those nodes.
+"""
+from panda3d.egg import EggGroupNode, EggPolygon, EggNode
+
+from eggtools.utils.EggNodeIndex import EggNodeIndex
+
+
+class EggAttributeVisitor:
+    def __init__(self, attribute_entries: list, node_index: EggNodeIndex = None):
+        """
+        :param list attribute_entries: [(EggAttribute, node_entries)] in the order they should be applied.
+        :param EggNodeIndex node_index: Index of the egg the attributes will be applied to.
+        """
+        self.attribute_entries = attribute_entries
+        self.node_index = node_index
+
+    def apply(self, egg_base, egg_ctx) -> None:
+        for attributes in self._group_passes():
+            if len(attributes) == 1 and not attributes[0][0].fusable:
+                attribute, node_entries = attributes[0]
+                attribute.apply(egg_base, egg_ctx, node_entries)
+                if self.node_index:
+                    # No telling what it did to the egg's structure
+                    self.node_index.stale = True
+                continue
+            for attribute, node_entries in attributes:
+                attribute.prepare(node_entries)
+            attributes = [attribute for attribute, _ in attributes]
+            if self.node_index and all(attribute.targets_by_name for attribute in attributes):
+                if self.node_index.stale:
+                    self.node_index.build(egg_base)
+                self._visit_targets(attributes)
+            else:
+                self._visit(egg_base, attributes)
+
+    def _group_passes(self) -> list:
+        """
+        Splits the attribute entries into traversals that give the same result as applying them one by one.
+
+        Consecutive fusable attributes share a traversal. A new traversal is started for attributes that can't be
+        fused, when an attribute shows up twice, or when two attributes share an inherited state.
+        (A later attribute could otherwise change an ancestor before an earlier one looks at it.)
+        """
+        passes = list()
+        current = list()
+        for attribute, node_entries in self.attribute_entries:
+            if not attribute.fusable:
+                if current:
+                    passes.append(current)
+                    current = list()
+                passes.append([(attribute, node_entries)])
+                continue
+            conflicts = any(
+                attribute is other or
+                not attribute.inherited_state.isdisjoint(other.inherited_state)
+                for other, _ in current
+            )
+            if conflicts:
+                passes.append(current)
+                current = list()
+            current.append((attribute, node_entries))
+        if current:
+            passes.append(current)
+        return passes
+
+    def _visit(self, egg, attributes: list) -> None:
+        for child in egg.getChildren():
+            if isinstance(child, EggPolygon):
+                # Only ask for the textures once, rather than once per attribute
+                poly_textures = child.getTextures()
+                for attribute in attributes:
+                    attribute._modify_node(child)
+                    for texture_ref in poly_textures:
+                        attribute._modify_polygon(child, texture_ref)
+                continue
+            if isinstance(child, EggNode):
+                for attribute in attributes:
+                    attribute._modify_node(child)
+            if isinstance(child, EggGroupNode):
+                self._visit(child, attributes)
+
+    def _visit_targets(self, attributes: list) -> None:
+        """
+        Visits only the nodes & polygons targeted by the attributes, in the same order _visit would reach them.
+        """
+        name_targets = [name_config for attribute in attributes for name_config in attribute.get_name_targets()]
+        tref_targets = [tref_config for attribute in attributes for tref_config in attribute.get_tref_targets()]
+        targets = self.node_index.find_nodes(name_targets) + self.node_index.find_polygons(tref_targets)
+        for child in sorted(set(targets), key=self.node_index.order.__getitem__):
+            if isinstance(child, EggPolygon):
+                poly_textures = child.getTextures()
+                for attribute in attributes:
+                    attribute._modify_node(child)
+                    for texture_ref in poly_textures:
+                        attribute._modify_polygon(child, texture_ref)
+                continue
+            if isinstance(child, EggNode):
+                for attribute in attributes:
+                    attribute._modify_node(child)
@@ -0,0 +1,98 @@
+import os
+
+from panda3d.core import Filename
+from panda3d.egg import EggData
+
+from eggtools.attributes.EggAlphaAttribute import name2id
+from eggtools.attributes.EggAttribute import EggAttribute
+from eggtools.utils.EggAlphaAnalyzer import ALPHA_MODE_RANKS, EggAlphaAnalyzer
+
+
+class EggAutoAlphaAttribute(EggAttribute):
+    # Also reads the inherited bin, see _modify_polygon
+    inherited_state = frozenset({"alpha", "bin"})
+
+    # Polygons are picked by the pixels of their textures, not by name
+    targets_by_name = False
+
+    def __init__(self, analyzer: EggAlphaAnalyzer = None, assign_bins=True, overwrite=False):
+        """
+        <Scalar> alpha { off | binary | dual | blend } and <Scalar> bin { opaque | transparent },
+        chosen by looking at the alpha channel of each polygon's textures.
+
+        If node entries are given, only textures with a matching TRef are looked at.
+
+        :param EggAlphaAnalyzer analyzer: Share one between attributes & runs to avoid reading textures again.
+        :param bool assign_bins: Also put the polygons in the opaque or transparent bin.
+        :param bool overwrite: Replace alpha modes & bins that are already set on the polygon or its parents.
+        """
+        self.analyzer = analyzer or EggAlphaAnalyzer()
+        self.assign_bins = assign_bins
+        self.overwrite = overwrite
+        super().__init__(entry_type="Scalar", name="alpha", contents="auto")
+        self._all_textures = True
+        self._texture_modes = dict()  # { EggTexture : alpha mode name | None }
+        self._egg_dir = None
+
+    def prepare(self, node_entries=None):
+        super().prepare(node_entries)
+        self._all_textures = not node_entries
+        self._texture_modes = dict()
+        self._egg_dir = None
+
+    def _get_egg_dir(self, egg_polygon) -> str:
+        # Looked up from the polygon, the EggTextures it uses may not be part of the egg anymore (see rename_trefs).
+        # Every polygon visited between two prepare() calls is in the same egg.
+        if self._egg_dir is None:
+            root = egg_polygon
+            while root.getParent() is not None:
+                root = root.getParent()
+            self._egg_dir = ""
+            if isinstance(root, EggData):
+                self._egg_dir = Filename(root.getEggFilename().getDirname()).toOsSpecific()
+        return self._egg_dir
+
+    def _get_texture_path(self, egg_texture) -> str:
+        # Relative texture paths are relative to the egg they are in
+        return os.path.join(self._egg_dir or "", egg_texture.getFullpath().toOsSpecific())
+
+    def _get_texture_mode(self, egg_texture):
+        if egg_texture not in self._texture_modes:
+            alpha_path = None
+            if egg_texture.hasAlphaFilename():
+                alpha_path = os.path.join(
+                    os.path.dirname(self._get_texture_path(egg_texture)),
+                    egg_texture.getAlphaFullpath().toOsSpecific()
+                )
+            analysis = self.analyzer.analyze(self._get_texture_path(egg_texture), alpha_path)
+            self._texture_modes[egg_texture] = self.analyzer.get_alpha_mode(analysis) if analysis else None
+        return self._texture_modes[egg_texture]
+
+    def _modify_polygon(self, egg_polygon, tref):
+        egg_textures = egg_polygon.getTextures()
+        if tref != egg_textures[0]:
+            # Each polygon is decided once, by the most demanding of its textures
+            return
+        self._get_egg_dir(egg_polygon)
+        alpha_modes = [
+            self._get_texture_mode(egg_texture) for egg_texture in egg_textures
+            if self._all_textures or self.target_nodes.check(egg_texture.getName())
+        ]
+        alpha_modes = [alpha_mode for alpha_mode in alpha_modes if alpha_mode]
+        if not alpha_modes:
+            return
+        alpha_name = max(alpha_modes, key=ALPHA_MODE_RANKS.__getitem__)
+        if self.overwrite or not egg_polygon.determineAlphaMode():
+            egg_polygon.setAlphaMode(name2id[alpha_name])
+        if self.assign_bins:
+            bin_name = self.analyzer.get_bin(alpha_name)
+            if bin_name and (self.overwrite or not egg_polygon.determineBin()):
+                egg_polygon.setBin(bin_name)
+
+    def _modify_node(self, egg_node):
+        pass
+
+
+class EggAutoAlpha(EggAutoAlphaAttribute):
+    def __init__(self, analyzer: EggAlphaAnalyzer = None, assign_bins=True, overwrite=False):
+        super().__init__(analyzer, assign_bins, overwrite)
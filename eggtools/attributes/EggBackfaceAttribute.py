@@ -9,6 +9,8 @@ class EggBackfaceAttribute(EggAttribute):
     If this is true, the polygon will be rendered so that both faces are visible;
     if it is false, only the front face of the polygon will be visible.
     """
+    # Sets the flag on every node below the targeted one
+    fusable = False
 
     def __init__(self, want_backface=True):
         self.backface = want_backface
@@ -2,6 +2,8 @@ from eggtools.attributes.EggAttribute import EggAttribute
 
 
 class EggBinAttribute(EggAttribute):
+    inherited_state = frozenset({"bin"})
+
     def __init__(self, bin_name):
         # if bin_name is None, that means we clear the bin
         super().__init__(entry_type="Scalar", name="bin", contents=bin_name)
@@ -101,6 +101,11 @@ class EggCollideAttribute(EggAttribute):
 
         super().__init__(entry_type="Collide", name=name, contents=csname + (' ' if flags else '') + ' '.join(flags))
 
+    @property
+    def fusable(self):
+        # Removing UV data reaches into the node's children
+        return self.preserve_uv_data
+
     def _modify_polygon(self, egg_polygon, tref=None):
         # print(egg_polygon.hasColor())
         pass
@@ -4,10 +4,15 @@ from eggtools.EggManConfig import DecalConfig
 
 
 class EggDecalAttribute(EggAttribute):
+    inherited_state = frozenset({"decal"})
+
     def __init__(self, apply=True):
         # <Scalar> decal { 1 }
         super().__init__(entry_type="Scalar", name="decal", contents=int(apply))
 
+    def get_name_targets(self) -> list:
+        return [DecalConfig, self.target_nodes]
+
     def _modify_polygon(self, egg_polygon, tref):
         pass
 
@@ -9,6 +9,8 @@ name2id = {
 
 
 class EggDepthWriteAttribute(EggAttribute):
+    inherited_state = frozenset({"depth-write"})
+
     def __init__(self, depth_type, overwrite=False):
         self.overwrite = overwrite
         if not isinstance(depth_type, str):
@@ -70,6 +70,8 @@ class EggExtFileAttribute(EggAttribute):
     Instead, polygon data is resourced from an input <File> -- when called, it will substitute the <File>
     group with the contents of the egg file, if it can be found.
     """
+    # Adds children to the nodes it visits
+    fusable = False
 
     def __init__(self, filename: str, node_name: str = "", file_locations: List[str] = None):
         """
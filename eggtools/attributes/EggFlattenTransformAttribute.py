@@ -13,6 +13,7 @@ class EggFlattenTransformAttribute(EggAttribute):
     Since this function may result in duplicated vertices,
     it may be a good idea to call remove_unused_vertices() after calling this.
     """
+    fusable = False
 
     def __init__(self, flatten_billboards: bool = False, flatten_dcs: bool = False):
         # Not a real attribute
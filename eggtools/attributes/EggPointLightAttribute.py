@@ -6,6 +6,7 @@ class EggPointLightAttribute(EggAttribute):
     """
     ima be honest and tell you idk what this does theres not enough info in the documentation
     """
+    fusable = False
 
     def __init__(self, thickness: float = 1.0, perspective: bool = False):
         """
@@ -4,6 +4,8 @@ from eggtools.attributes.EggSwitchAttribute import EggSwitchAttribute
 
 
 class EggSequenceAttribute(EggSwitchAttribute, EggFPSAttribute):
+    targets_by_name = False
+
     def __init__(self, fps_rate=24.0, enable=1):
         """
         Combination of both:
@@ -21,6 +21,7 @@ class EggTriangulateAttribute(EggAttribute):
     If flags contains T_polygon and T_convex, both concave and convex polygons will be subdivided into triangles;
     with only T_polygon, only concave polygons will be subdivided, and convex polygons will be largely unchanged.
     """
+    fusable = False
 
     def __init__(self, flag):
         # Not a real attribute
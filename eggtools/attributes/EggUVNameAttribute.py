@@ -4,6 +4,9 @@ from eggtools.attributes.EggAttribute import EggAttribute
 
 
 class EggUVNameAttribute(EggAttribute):
+    # Renames every UV name it comes across, no matter the node's name
+    targets_by_name = False
+
     def __init__(self, uv_name='UVMap', new_uv_name=''):
         """
         <Scalar> uv-name { uv_name }
@@ -0,0 +1,94 @@
+"""
+Strips the alpha channel off textures that are fully opaque, and updates the eggs that use them.
+
+Usage:
+python -m eggtools.scripts.EggAlphaStrip [eggs or directories]
+"""
+import argparse
+import os
+import sys
+
+from eggtools.EggMan import EggMan
+from eggtools.utils.EggAlphaAnalyzer import EggAlphaAnalyzer
+from eggtools.utils.EggAlphaStripper import EggAlphaStripper
+from eggtools.utils.EggCrawler import crawl_eggs
+
+parser = argparse.ArgumentParser(
+    prog='egg-alpha-strip',
+    epilog='Rewrites textures whose alpha channel is fully opaque as plain RGB images, drops the alpha from their '
+           'egg texture formats and alpha modes, and reports how many bytes were saved.',
+    description='python -m eggtools.scripts.EggAlphaStrip models/ other.egg -o stripped/'
+)
+
+parser.add_argument(
+    'inputs', nargs="+", action="extend", type=str,
+    help='Egg files, or directories to search for egg files.',
+)
+
+parser.add_argument(
+    '-o',
+    '--output-dir',
+    type=str,
+    default=None,
+    help='Write the stripped images here instead of over the originals, and repath the eggs to them.',
+)
+
+parser.add_argument(
+    '--root',
+    type=str,
+    default=None,
+    help='Stripped images keep their path relative to this folder inside the output directory.',
+)
+
+parser.add_argument(
+    '--cache',
+    type=str,
+    default=None,
+    help='JSON file that texture analyses are kept in between runs.',
+)
+
+parser.add_argument(
+    '--tolerance',
+    type=int,
+    default=0,
+    help='Alpha values this close to 255 still count as fully opaque.',
+)
+
+parser.add_argument(
+    '-j',
+    '--workers',
+    type=int,
+    default=4,
+    help='Number of images analyzed & rewritten at once.',
+)
+
+parser.add_argument(
+    '--dryrun',
+    action='store_true',
+    help='Only report what would be stripped.',
+)
+
+args = parser.parse_args()
+
+all_eggs = list()
+for input_path in args.inputs:
+    if os.path.isdir(input_path):
+        all_eggs += crawl_eggs(input_path, workers=args.workers)
+    else:
+        all_eggs.append(input_path)
+
+if not all_eggs:
+    print("Error: No egg files were found!")
+    sys.exit()
+
+# Only the eggs using a stripped texture get read
+eggman = EggMan(all_eggs, lazy=True)
+stripper = EggAlphaStripper(EggAlphaAnalyzer(cache_path=args.cache, tolerance=args.tolerance), workers=args.workers)
+report = stripper.strip_eggs(eggman, output_dir=args.output_dir, root=args.root, dryrun=args.dryrun)
+failures = dict()
+if not args.dryrun:
+    failures = eggman.write_eggs(report.updated_eggs, manually=True, workers=args.workers)
+print(report.format())
+for filename, error in failures.items():
+    print(f"{filename}: failed to write ({error})")
+sys.exit(1 if failures else 0)
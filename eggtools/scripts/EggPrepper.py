@@ -9,6 +9,7 @@ import sys
 # argparse setup
 import argparse
 
+from eggtools.EggManConfig import VertexPrecisionConfig
 from eggtools.utils.EggMaintenanceUtil import EggMaintenanceUtil
 
 parser = argparse.ArgumentParser(
@@ -26,6 +27,72 @@ parser.add_argument(
     'other_egg_filepaths', nargs="*", action="extend", type=str,
 )
 
+parser.add_argument(
+    '--window-size',
+    type=int,
+    default=0,
+    help='Load, prepare and write the eggs this many at a time, to keep memory usage down.',
+)
+
+parser.add_argument(
+    '--window-bytes',
+    type=int,
+    default=0,
+    help='Load, prepare and write the eggs in batches of at most this many bytes on disk.',
+)
+
+parser.add_argument(
+    '--write-workers',
+    type=int,
+    default=1,
+    help='Number of egg files written at once. Only their compression & file I/O overlap.',
+)
+
+parser.add_argument(
+    '--precision',
+    type=int,
+    nargs=4,
+    metavar=('POSITION', 'NORMAL', 'UV', 'COLOR'),
+    help='Write vertex positions, normals, UVs and colors with this many decimals each.',
+)
+
+parser.add_argument(
+    '--compression-level',
+    type=int,
+    default=6,
+    choices=range(10),
+    metavar='{0-9}',
+    help='zlib level used when writing .pz eggs.',
+)
+
+parser.add_argument(
+    '--bam',
+    action='store_true',
+    help='Also convert the prepared eggs into .bam files, skipping those whose .bam is already newer.',
+)
+
+parser.add_argument(
+    '--bam-dir',
+    type=str,
+    default=None,
+    help='Directory the .bam files go into, defaults to each egg\'s own directory.',
+)
+
+parser.add_argument(
+    '--bam-root',
+    type=str,
+    default=None,
+    help='The .bam files keep their path relative to this folder inside the .bam directory. '
+         'Defaults to the deepest folder all of the eggs are in.',
+)
+
+parser.add_argument(
+    '--bam-workers',
+    type=int,
+    default=1,
+    help='Number of processes used to convert the eggs into .bam files.',
+)
+
 args = parser.parse_args()
 
 input_egg = args.input_egg
@@ -38,5 +105,11 @@ all_eggs = [input_egg]
 if args.other_egg_filepaths:
     all_eggs += args.other_egg_filepaths
 
-maintainer = EggMaintenanceUtil(file_list=all_eggs)
-maintainer.perform_general_maintenance()
+windowed = bool(args.window_size or args.window_bytes)
+maintainer = EggMaintenanceUtil(file_list=all_eggs, lazy=windowed,
+                                compression_level=args.compression_level)
+precision = VertexPrecisionConfig(*args.precision) if args.precision else None
+maintainer.perform_general_maintenance(window_size=args.window_size, window_bytes=args.window_bytes,
+                                       write_workers=args.write_workers, precision=precision,
+                                       bake=args.bam, bam_workers=args.bam_workers, bam_dir=args.bam_dir,
+                                       bam_root=args.bam_root)
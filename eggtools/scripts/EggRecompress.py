@@ -0,0 +1,66 @@
+"""
+Recompresses pzipped (.pz) eggs at a chosen zlib level.
+
+Usage:
+python -m eggtools.scripts.EggRecompress [eggs or directories]
+"""
+import argparse
+import os
+import sys
+
+from eggtools.utils.EggCrawler import crawl_eggs
+from eggtools.utils.EggPzipIO import EggPzipIO
+
+parser = argparse.ArgumentParser(
+    prog='egg-recompress',
+    epilog='Recompresses .pz eggs on several threads. Files that would come out the same are left untouched.',
+    description='python -m eggtools.scripts.EggRecompress models/ other.egg.pz -l 9'
+)
+
+parser.add_argument(
+    'inputs', nargs="+", action="extend", type=str,
+    help='.pz eggs, or directories to search for them.',
+)
+
+parser.add_argument(
+    '-l',
+    '--level',
+    type=int,
+    default=9,
+    choices=range(10),
+    metavar='{0-9}',
+    help='zlib compression level.',
+)
+
+parser.add_argument(
+    '-j',
+    '--workers',
+    type=int,
+    default=4,
+    help='Number of files recompressed at once.',
+)
+
+parser.add_argument(
+    '--dryrun',
+    action='store_true',
+    help='Only report what would change.',
+)
+
+args = parser.parse_args()
+
+pzip = EggPzipIO(workers=args.workers, compression_level=args.level)
+all_eggs = list()
+for input_path in args.inputs:
+    if os.path.isdir(input_path):
+        all_eggs += crawl_eggs(input_path, workers=args.workers)
+    else:
+        all_eggs.append(input_path)
+
+report = pzip.recompress(all_eggs, dryrun=args.dryrun)
+for filepath, old_size, new_size in report.recompressed_files:
+    print(f"{filepath}: {old_size} -> {new_size} bytes")
+for filepath, error in report.failed_files.items():
+    print(f"{filepath}: failed ({error})")
+print(f"{len(report.recompressed_files)} recompressed, {len(report.unchanged_files)} unchanged, "
+      f"{len(report.failed_files)} failed, {report.bytes_saved} bytes saved")
+sys.exit(1 if report.failed_files else 0)
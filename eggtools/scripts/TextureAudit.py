@@ -0,0 +1,52 @@
+"""
+Reports missing & badly pathed textures without touching any egg.
+
+Usage:
+python -m eggtools.scripts.TextureAudit [eggs or directories]
+"""
+import argparse
+import os
+import sys
+
+from eggtools.EggMan import EggMan
+from eggtools.utils.EggCrawler import crawl_eggs
+from eggtools.utils.EggTextureAuditor import EggTextureAuditor
+
+parser = argparse.ArgumentParser(
+    prog='egg-texture-audit',
+    epilog='Lists missing, absolute, cross-drive and case-mismatched texture paths per egg. '
+           'Exits with 1 if any were found.',
+    description='python -m eggtools.scripts.TextureAudit models/ other.egg'
+)
+
+parser.add_argument(
+    'inputs', nargs="+", action="extend", type=str,
+    help='Egg files, or directories to search for egg files.',
+)
+
+parser.add_argument(
+    '-j',
+    '--workers',
+    type=int,
+    default=8,
+    help='Number of threads used to look up texture files.',
+)
+
+args = parser.parse_args()
+
+all_eggs = list()
+for input_path in args.inputs:
+    if os.path.isdir(input_path):
+        all_eggs += crawl_eggs(input_path, workers=args.workers)
+    else:
+        all_eggs.append(input_path)
+
+if not all_eggs:
+    print("Error: No egg files were found!")
+    sys.exit()
+
+# Lazy eggs are only prescanned for their textures, nothing is read into EggData
+eggman = EggMan(all_eggs, lazy=True)
+report = EggTextureAuditor(workers=args.workers).audit(eggman)
+print(report.format())
+sys.exit(1 if report.eggs else 0)
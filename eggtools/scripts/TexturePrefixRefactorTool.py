@@ -14,6 +14,7 @@ if there is a duplicate <UV> with same name, only keep one (but hard to determin
 might be fine to pick the first instance since thats what will be used in egg2bam
 
 """
+from eggtools.utils.EggCrawler import crawl_eggs
 from eggtools.utils.EggMaintenanceUtil import EggMaintenanceUtil
 
 if __name__ == "__main__":
@@ -31,21 +32,17 @@ if __name__ == "__main__":
     # this will be passed into EggMaintenanceUtil
     _textureRenames = {}
 
-    file_list = []
-
     target_path = GAMEASSETS_PATH
     print(f"target ={target_path}")
 
-    for dirpath, _, filenames in os.walk(os.path.join(target_path)):
-        for fileName in filenames:
-            # if fileName.endswith(".png"):
-            #     for prefixName in prefixRepaths.keys():
-            #         if prefixName in fileName:
-            #             newName = fileName.replace(prefixName, prefixRepaths[prefixName])
-            #             _textureRenames[fileName] = newName
-            if fileName.endswith(".egg"):
-                print(f"adding file {fileName}")
-                file_list.append(os.path.abspath(os.path.join(dirpath, fileName)))
+    # for texturePath in crawl_eggs(target_path, includes=["*.png"], eggs_only=False):
+    #     fileName = os.path.basename(texturePath)
+    #     for prefixName in prefixRepaths.keys():
+    #         if prefixName in fileName:
+    #             newName = fileName.replace(prefixName, prefixRepaths[prefixName])
+    #             _textureRenames[fileName] = newName
+    file_list = crawl_eggs(target_path, workers=8)
+    print(f"found {len(file_list)} egg files")
 
     eggmaint = EggMaintenanceUtil(file_list, base_path=target_path, custom_rename_list=prefixRepaths)
     # Use put_into_tex_folder if we are operating on drive assets
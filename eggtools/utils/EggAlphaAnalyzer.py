@@ -0,0 +1,191 @@
+"""
+Looks at the alpha channel of texture images to tell which alpha mode & bin they actually need.
+
+NumPy is used for the pixel checks when it is installed, otherwise the alpha bytes are counted with bytes.count,
+which is slower but still doesn't loop over the pixels in Python.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+from dataclasses import dataclass, asdict
+
+from panda3d.core import Filename, PNMImage, Texture
+
+from eggtools.utils.EggScanCache import hash_file
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Bump this whenever AlphaAnalysis changes shape, old caches will be thrown away.
+CACHE_VERSION = 1
+
+# Alpha modes from least to most expensive to render
+ALPHA_MODE_RANKS = {"off": 0, "binary": 1, "dual": 2, "blend": 3}
+
+
+@dataclass
+class AlphaAnalysis:
+    """
+    Pixel counts of a texture's alpha channel.
+    """
+    total_pixels: int = 0
+    transparent_pixels: int = 0
+    partial_pixels: int = 0
+    # Number of channels in the image, images without an alpha channel count as fully opaque
+    channels: int = 0
+
+    @property
+    def opaque_pixels(self) -> int:
+        return self.total_pixels - self.transparent_pixels - self.partial_pixels
+
+    @property
+    def has_alpha_channel(self) -> bool:
+        return self.channels in (2, 4)
+
+
+def count_alpha(alpha: bytes, tolerance: int = 0, channels: int = 4) -> AlphaAnalysis:
+    """
+    :param bytes alpha: One byte per pixel.
+    :param int tolerance: Alpha values this close to 0 or 255 still count as fully transparent/opaque.
+    """
+    if numpy is not None:
+        values = numpy.frombuffer(alpha, dtype=numpy.uint8)
+        transparent = int(numpy.count_nonzero(values <= tolerance))
+        opaque = int(numpy.count_nonzero(values >= 255 - tolerance))
+    else:
+        transparent = sum(alpha.count(value) for value in range(tolerance + 1))
+        opaque = sum(alpha.count(value) for value in range(255 - tolerance, 256))
+    return AlphaAnalysis(len(alpha), transparent, len(alpha) - transparent - opaque, channels)
+
+
+class EggAlphaAnalyzer:
+    def __init__(self, cache_path: str = None, tolerance: int = 0, dual_threshold: float = 0.25):
+        """
+        Reads each texture once and remembers the result by its content hash, so copies of a texture
+        and unchanged textures are never read again.
+
+        :param str cache_path: JSON file the results are kept in between runs, see save().
+        :param int tolerance: Alpha values this close to 0 or 255 still count as fully transparent/opaque.
+        :param float dual_threshold: Textures with partially transparent pixels get dual if at most this fraction
+            of their pixels is partially transparent (soft edges on a cutout), blend otherwise.
+        """
+        self.cache_path = cache_path
+        self.tolerance = tolerance
+        self.dual_threshold = dual_threshold
+        self._by_hash = dict()  # { content hash : AlphaAnalysis }
+        self._by_path = dict()  # { abspath : (size, mtime, content hash) }
+        self._dirty = False
+        self.load()
+
+    def load(self) -> None:
+        if not self.cache_path or not os.path.isfile(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, "r") as cache_file:
+                contents = json.load(cache_file)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable alpha cache {self.cache_path} ({e})")
+            return
+        if contents.get("version") != CACHE_VERSION or contents.get("tolerance") != self.tolerance:
+            return
+        self._by_hash = {
+            content_hash: AlphaAnalysis(**analysis) for content_hash, analysis in contents["analyses"].items()
+        }
+
+    def save(self) -> None:
+        if not self.cache_path or not self._dirty:
+            return
+        temp_path = f"{self.cache_path}.tmp"
+        with open(temp_path, "w") as cache_file:
+            json.dump({
+                "version": CACHE_VERSION,
+                "tolerance": self.tolerance,
+                "analyses": {content_hash: asdict(analysis) for content_hash, analysis in self._by_hash.items()},
+            }, cache_file)
+        os.replace(temp_path, self.cache_path)
+        self._dirty = False
+
+    def _hash(self, filepath: str) -> str:
+        stat = os.stat(filepath)
+        known = self._by_path.get(filepath)
+        if known and known[:2] == (stat.st_size, stat.st_mtime):
+            return known[2]
+        content_hash = hash_file(filepath)
+        self._by_path[filepath] = (stat.st_size, stat.st_mtime, content_hash)
+        return content_hash
+
+    @staticmethod
+    def _read_alpha(filepath: str, alpha_filepath: str = None) -> tuple[bytes, int] | None:
+        """
+        :return: The alpha byte of each pixel & the number of channels of the image.
+        """
+        image = PNMImage()
+        if not image.read(Filename.fromOsSpecific(filepath)):
+            return None
+        if alpha_filepath:
+            alpha_image = PNMImage()
+            if not alpha_image.read(Filename.fromOsSpecific(alpha_filepath)):
+                return None
+            if (alpha_image.getXSize(), alpha_image.getYSize()) != (image.getXSize(), image.getYSize()):
+                logging.warning(f"{alpha_filepath} isn't the same size as {filepath}, ignoring it")
+            else:
+                image.addAlpha()
+                image.copyChannel(alpha_image, 0, image.getNumChannels() - 1)
+        # One byte per value. Loaded into a Texture (unlike Texture.read, this doesn't rescale the image)
+        # to get all of its alpha values in one go.
+        image.setMaxval(255)
+        texture = Texture()
+        texture.load(image)
+        return bytes(texture.getRamImageAs("A")), image.getNumChannels()
+
+    def analyze(self, filepath: str, alpha_filepath: str = None) -> AlphaAnalysis | None:
+        """
+        :param str alpha_filepath: Separate alpha image, as given by an EggTexture's alpha file.
+        :return: None if the image can't be read.
+        """
+        filepath = os.path.abspath(filepath)
+        try:
+            content_hash = self._hash(filepath)
+            if alpha_filepath:
+                alpha_filepath = os.path.abspath(alpha_filepath)
+                content_hash += self._hash(alpha_filepath)
+        except OSError as e:
+            logging.warning(f"Can't analyze the alpha of {filepath} ({e})")
+            return None
+        analysis = self._by_hash.get(content_hash)
+        if analysis is None:
+            image_alpha = self._read_alpha(filepath, alpha_filepath)
+            if image_alpha is None:
+                logging.warning(f"Can't analyze the alpha of {filepath}, the image could not be read")
+                return None
+            alpha, channels = image_alpha
+            analysis = self._by_hash[content_hash] = count_alpha(alpha, self.tolerance, channels)
+            self._dirty = True
+        return analysis
+
+    def get_alpha_mode(self, analysis: AlphaAnalysis) -> str:
+        """
+        :return: off, binary, dual or blend
+        """
+        if analysis.partial_pixels:
+            if analysis.partial_pixels <= analysis.total_pixels * self.dual_threshold:
+                return "dual"
+            return "blend"
+        if analysis.transparent_pixels:
+            return "binary"
+        return "off"
+
+    @staticmethod
+    def get_bin(alpha_mode: str) -> str | None:
+        """
+        Only blended textures have to be depth sorted.
+
+        :return: None for dual, the egg loader already splits those between the opaque & transparent bins.
+        """
+        if alpha_mode == "dual":
+            return None
+        return "transparent" if alpha_mode == "blend" else "opaque"
@@ -0,0 +1,180 @@
+"""
+Rewrites textures that have an alpha channel without using it as plain RGB(/grayscale) images,
+and updates the eggs that use them.
+"""
+from __future__ import annotations
+
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from panda3d.core import Filename, PNMImage
+from panda3d.egg import EggRenderMode, EggTexture
+
+from eggtools.utils.EggAlphaAnalyzer import EggAlphaAnalyzer
+
+# Texture formats that ask for an alpha channel, and what they become without one
+OPAQUE_FORMATS = {
+    EggTexture.F_rgba: EggTexture.F_rgb,
+    EggTexture.F_rgbm: EggTexture.F_rgb,
+    EggTexture.F_rgba12: EggTexture.F_rgb12,
+    EggTexture.F_rgba8: EggTexture.F_rgb8,
+    EggTexture.F_rgba5: EggTexture.F_rgb5,
+    EggTexture.F_rgba4: EggTexture.F_rgb5,
+    EggTexture.F_luminance_alpha: EggTexture.F_luminance,
+    EggTexture.F_luminance_alphamask: EggTexture.F_luminance,
+}
+
+
+@dataclass
+class AlphaStripReport:
+    # [(source path, stripped image path)]
+    stripped_files: list = field(default_factory=list)
+    # Difference in file size, on disk
+    disk_bytes_saved: int = field(default_factory=lambda: 0)
+    # One byte per pixel, not counting mipmaps
+    memory_bytes_saved: int = field(default_factory=lambda: 0)
+    updated_eggs: list = field(default_factory=list)
+    updated_textures: int = field(default_factory=lambda: 0)
+
+    def format(self) -> str:
+        lines = list()
+        for source, destination in self.stripped_files:
+            lines.append(source if source == destination else f"{source} -> {destination}")
+        lines.append(
+            f"{len(self.stripped_files)} textures stripped, {self.updated_textures} textures updated in "
+            f"{len(self.updated_eggs)} eggs. Saved {self.disk_bytes_saved} bytes on disk and "
+            f"{self.memory_bytes_saved} bytes of texture memory."
+        )
+        return "\n".join(lines)
+
+
+class EggAlphaStripper:
+    def __init__(self, analyzer: EggAlphaAnalyzer = None, workers: int = 4):
+        """
+        :param EggAlphaAnalyzer analyzer: Decides which images are fully opaque, share it to reuse its cache.
+        :param int workers: Number of images analyzed & rewritten at once.
+        """
+        self.analyzer = analyzer or EggAlphaAnalyzer()
+        self.workers = workers
+
+    def _map(self, func, items: list) -> list:
+        if self.workers > 1 and len(items) > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                return list(executor.map(func, items))
+        return [func(item) for item in items]
+
+    def _is_redundant(self, filepath: str) -> bool:
+        analysis = self.analyzer.analyze(filepath)
+        return bool(analysis and analysis.has_alpha_channel and analysis.opaque_pixels == analysis.total_pixels)
+
+    @staticmethod
+    def strip_image(source: str, destination: str) -> int:
+        """
+        Writes the image without its alpha channel. The destination may be the source.
+
+        :return: Number of pixels in the image
+        """
+        image = PNMImage()
+        if not image.read(Filename.fromOsSpecific(source)):
+            raise OSError(f"Could not read {source}")
+        image.removeAlpha()
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        # Same extension, PNMImage picks the image type from it
+        root, extension = os.path.splitext(destination)
+        temp_path = f"{root}.alpha_tmp{extension}"
+        if not image.write(Filename.fromOsSpecific(temp_path)):
+            raise OSError(f"Could not write {destination}")
+        os.replace(temp_path, destination)
+        return image.getXSize() * image.getYSize()
+
+    @staticmethod
+    def _update_texture(egg_texture: EggTexture) -> None:
+        egg_texture.setFormat(OPAQUE_FORMATS.get(egg_texture.getFormat(), egg_texture.getFormat()))
+        if egg_texture.getAlphaMode() not in (EggRenderMode.AM_unspecified, EggRenderMode.AM_off):
+            egg_texture.setAlphaMode(EggRenderMode.AM_off)
+
+    def strip_eggs(self, eggman, output_dir: str = None, root: str = None, dryrun: bool = False) -> AlphaStripReport:
+        """
+        Strips the redundant alpha channel of every texture used by the eggs registered with the EggMan.
+
+        Textures with a separate alpha file are left alone. Eggs are updated & marked dirty but not written.
+
+        :param EggMan eggman: Eggs whose textures should be looked at.
+        :param str output_dir: Write the stripped images here instead of over the originals,
+            keeping their path relative to root. The eggs are repathed to the new images.
+        :param str root: See output_dir, defaults to the deepest folder all of the textures are in.
+        :param bool dryrun: Only fill in the report, without writing images or touching the eggs.
+        """
+        texture_index = eggman.get_texture_index()
+        egg_textures = dict()  # { EggData : { absolute texture path } }
+        for egg_data, ctx in eggman.egg_datas.items():
+            egg_textures[egg_data] = {
+                eggman.get_texture_abspath(ctx, ref.filepath) for ref in texture_index.get_egg_textures(egg_data)
+            }
+        filepaths = sorted({filepath for filepaths in egg_textures.values() for filepath in filepaths})
+        redundant_paths = {
+            filepath for filepath, redundant in zip(filepaths, self._map(self._is_redundant, filepaths)) if redundant
+        }
+        self.analyzer.save()
+
+        # Separate alpha files replace the image's own alpha, so those textures keep it.
+        # Prescans don't know about alpha files, the eggs have to be loaded to tell.
+        for egg_data, texture_paths in egg_textures.items():
+            if texture_paths.isdisjoint(redundant_paths):
+                continue
+            ctx = eggman.load_egg(egg_data)
+            for egg_texture in ctx.egg_textures:
+                if egg_texture.hasAlphaFilename():
+                    redundant_paths.discard(eggman.get_texture_abspath(ctx, egg_texture.getFilename()))
+        filepaths = sorted(redundant_paths)
+
+        if output_dir and filepaths and not root:
+            root = os.path.commonpath([os.path.dirname(filepath) for filepath in filepaths])
+        path_mapping = dict()  # { source path : stripped image path }
+        for filepath in filepaths:
+            path_mapping[filepath] = filepath
+            if output_dir:
+                path_mapping[filepath] = os.path.join(os.path.abspath(output_dir), os.path.relpath(filepath, root))
+
+        report = AlphaStripReport()
+        if dryrun:
+            for filepath in filepaths:
+                analysis = self.analyzer.analyze(filepath)
+                report.stripped_files.append((filepath, path_mapping[filepath]))
+                report.memory_bytes_saved += analysis.total_pixels
+            return report
+
+        old_sizes = {filepath: os.path.getsize(filepath) for filepath in filepaths}
+
+        def strip(filepath):
+            try:
+                return self.strip_image(filepath, path_mapping[filepath])
+            except OSError as e:
+                logging.error(f"Failed to strip the alpha of {filepath} ({e})")
+                return None
+
+        for filepath, pixels in zip(filepaths, self._map(strip, filepaths)):
+            if pixels is None:
+                del path_mapping[filepath]
+                continue
+            report.stripped_files.append((filepath, path_mapping[filepath]))
+            report.disk_bytes_saved += old_sizes[filepath] - os.path.getsize(path_mapping[filepath])
+            report.memory_bytes_saved += pixels
+
+        for egg_data, texture_paths in egg_textures.items():
+            if texture_paths.isdisjoint(path_mapping):
+                continue
+            ctx = eggman.load_egg(egg_data)
+            updated = 0
+            for egg_texture in ctx.egg_textures:
+                if eggman.get_texture_abspath(ctx, egg_texture.getFilename()) in path_mapping:
+                    self._update_texture(egg_texture)
+                    updated += 1
+            if output_dir:
+                eggman.repath_texture_files(egg_data, path_mapping)
+            eggman.mark_dirty(ctx)
+            report.updated_eggs.append(egg_data)
+            report.updated_textures += updated
+        return report
@@ -0,0 +1,77 @@
+"""
+Converts eggs into .bam files in-process, through Panda's egg loader. No window or graphics engine is needed.
+"""
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+
+from panda3d.core import DSearchPath, Filename, NodePath, getModelPath
+from panda3d.egg import EggData, loadEggData
+
+from eggtools.utils.EggFileWriter import _replace, _temp_path
+
+
+@dataclass
+class BamConversionReport:
+    # [(egg path, bam path)] for every egg that was converted
+    converted_files: list = field(default_factory=list)
+    # Eggs whose .bam was already newer than the egg
+    skipped_files: list = field(default_factory=list)
+    failed_files: dict = field(default_factory=dict)  # { egg path : reason }
+
+
+def get_bam_path(egg_filepath: str, output_dir: str = None, root: str = None) -> str:
+    """
+    :param str output_dir: Directory the .bam goes into, keeping its path relative to root.
+        Defaults to the egg's own directory.
+    :param str root: See output_dir, defaults to the egg's own directory.
+    :return: Where the .bam of an .egg or .egg.pz file goes.
+    """
+    bam_path = egg_filepath
+    for extension in (".pz", ".egg"):
+        if bam_path.endswith(extension):
+            bam_path = bam_path[:-len(extension)]
+    bam_path += ".bam"
+    if output_dir:
+        root = root or os.path.dirname(egg_filepath) or os.curdir
+        bam_path = os.path.join(output_dir, os.path.relpath(bam_path, root))
+    return bam_path
+
+
+def is_bam_up_to_date(egg_filepath: str, bam_path: str) -> bool:
+    """
+    :return: True if the .bam exists and was written after the egg file was last modified.
+    """
+    try:
+        return os.path.getmtime(bam_path) >= os.path.getmtime(egg_filepath)
+    except OSError:
+        return False
+
+
+def convert_egg_data(egg_data: EggData, bam_path: str) -> str | None:
+    """
+    Loads the EggData into a scene graph and writes it out as a .bam file.
+
+    The egg loader takes the contents of the EggData, so pass in a copy of any egg that is still needed.
+
+    :return: Why the egg could not be converted, or None if it was.
+    """
+    # Textures are looked up next to the egg first, the same way loading the egg file would
+    search_path = DSearchPath(getModelPath().getValue())
+    search_path.prependDirectory(egg_data.getEggFilename().getDirname())
+    egg_data.resolveFilenames(search_path)
+    node = loadEggData(egg_data)
+    if not node:
+        return "The egg loader could not load the egg"
+    output_dir = os.path.dirname(bam_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    # Write next to the target and rename it over, so an interrupted conversion never leaves half a .bam behind
+    temp_path = _temp_path(bam_path)
+    if not NodePath(node).writeBamFile(Filename.fromOsSpecific(temp_path)):
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return "The .bam file could not be written"
+    _replace(temp_path, bam_path)
+    return None
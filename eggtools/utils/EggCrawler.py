@@ -0,0 +1,134 @@
+"""
+Recursive asset crawler used to gather egg files (or any other assets) from a directory tree.
+"""
+from __future__ import annotations
+
+import fnmatch
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+EGG_EXTENSIONS = (".egg", ".egg.pz")
+
+
+def is_egg_file(filename: str) -> bool:
+    return filename.lower().endswith(EGG_EXTENSIONS)
+
+
+class EggCrawler:
+    def __init__(self, includes: list[str] = None, excludes: list[str] = None, eggs_only: bool = True,
+                 workers: int = 1, follow_symlinks: bool = True):
+        """
+        Walks directory trees with os.scandir.
+
+        Glob patterns are matched against both the file name and the path relative to the crawled root
+        (with forward slashes). Directories matching an exclude pattern are not entered at all.
+
+        :param list includes: If given, only files matching at least one of these globs are returned.
+        :param list excludes: Files & directories matching any of these globs are skipped.
+        :param bool eggs_only: Only return .egg and .egg.pz files.
+        :param int workers: If above 1, directories are scanned by a thread pool of this size.
+        :param bool follow_symlinks: Enter symlinked directories, each directory is still only walked once so
+            symlink loops are harmless. Symlinked files are always returned.
+        """
+        self.includes = includes or list()
+        self.excludes = excludes or list()
+        self.eggs_only = eggs_only
+        self.workers = workers
+        self.follow_symlinks = follow_symlinks
+
+    @staticmethod
+    def _matches(patterns: list[str], name: str, rel_path: str) -> bool:
+        return any(fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(rel_path, pattern) for pattern in patterns)
+
+    @staticmethod
+    def _dir_key(stat: os.stat_result) -> tuple[int, int]:
+        return stat.st_dev, stat.st_ino
+
+    def _scan_dir(self, root: str, directory: str) -> tuple[list, list]:
+        """
+        :return: [(file path, file size)] and [(subdirectory, directory key)] found directly under the directory
+        """
+        files = list()
+        subdirs = list()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return files, subdirs
+        for entry in entries:
+            rel_path = os.path.relpath(entry.path, root).replace(os.sep, "/")
+            if self.excludes and self._matches(self.excludes, entry.name, rel_path):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=self.follow_symlinks):
+                    subdirs.append((entry.path, self._dir_key(entry.stat())))
+                    continue
+                if not entry.is_file():
+                    continue
+            except OSError:
+                continue
+            if self.eggs_only and not is_egg_file(entry.name):
+                continue
+            if self.includes and not self._matches(self.includes, entry.name, rel_path):
+                continue
+            try:
+                size = entry.stat().st_size
+            except OSError:
+                size = 0
+            files.append((entry.path, size))
+        return files, subdirs
+
+    def crawl_with_sizes(self, root: str) -> list[tuple[str, int]]:
+        """
+        :return: [(absolute file path, file size)] sorted by path
+        """
+        root = os.path.abspath(root)
+        results = list()
+        frontier = [root]
+        # Directories already walked, a symlink back up the tree would otherwise send the walk in circles
+        try:
+            visited = {self._dir_key(os.stat(root))}
+        except OSError:
+            visited = set()
+
+        def enter(subdirs):
+            for directory, key in subdirs:
+                if key not in visited:
+                    visited.add(key)
+                    yield directory
+
+        if self.workers > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                while frontier:
+                    next_frontier = list()
+                    for files, subdirs in executor.map(lambda directory: self._scan_dir(root, directory), frontier):
+                        results += files
+                        next_frontier += enter(subdirs)
+                    frontier = next_frontier
+        else:
+            while frontier:
+                files, subdirs = self._scan_dir(root, frontier.pop())
+                results += files
+                frontier += enter(subdirs)
+        # Keep the output stable no matter how the walk was scheduled
+        results.sort(key=lambda result: result[0])
+        return results
+
+    def crawl(self, root: str, sort_by_size: bool = False) -> list[str]:
+        """
+        :param bool sort_by_size: Largest files first instead of sorting by path.
+            Handy for spreading work evenly between workers.
+        :return: Absolute paths of every matching file under root.
+        """
+        results = self.crawl_with_sizes(root)
+        if sort_by_size:
+            # sort() is stable, so files of equal size stay sorted by path
+            results.sort(key=lambda result: result[1], reverse=True)
+        return [filepath for filepath, _ in results]
+
+
+def crawl_eggs(root: str, **kwargs) -> list[str]:
+    """
+    Shorthand for EggCrawler(**kwargs).crawl(root)
+    """
+    sort_by_size = kwargs.pop("sort_by_size", False)
+    return EggCrawler(**kwargs).crawl(root, sort_by_size=sort_by_size)
@@ -0,0 +1,329 @@
+"""
+Plans texture file moves & copies up front, then carries them out in parallel behind a journal,
+so that an interrupted run can be rolled back or resumed.
+"""
+from __future__ import annotations
+
+import errno
+import json
+import logging
+import os
+import shutil
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+
+# Linux ioctl cloning the extents of a file into another one (btrfs, XFS, ...)
+FICLONE = 0x40049409
+
+TEMP_SUFFIX = ".fileop_tmp"
+
+
+@dataclass
+class FileOp:
+    # "move" or "copy"
+    op: str
+    source: str
+    destination: str
+    # pending, started, done, skipped, failed or rolled_back
+    status: str = "pending"
+    # How the op was carried out: rename, link, reflink or copy
+    method: str = ""
+    # Directories created for the destination, outermost first
+    made_dirs: list = field(default_factory=list)
+    error: str = ""
+
+
+def _path_key(filepath: str) -> str:
+    return os.path.normcase(os.path.abspath(filepath))
+
+
+def _reflink(source: str, destination: str) -> None:
+    if not sys.platform.startswith("linux"):
+        raise OSError(errno.EOPNOTSUPP, "Reflinks are only attempted on Linux")
+    import fcntl
+    try:
+        with open(source, "rb") as source_file, open(destination, "wb") as destination_file:
+            fcntl.ioctl(destination_file.fileno(), FICLONE, source_file.fileno())
+    except OSError:
+        if os.path.exists(destination):
+            os.remove(destination)
+        raise
+    shutil.copystat(source, destination)
+
+
+class EggFileOpPlanner:
+    def __init__(self, journal_path: str = None, workers: int = 8, hardlink_copies: bool = False):
+        """
+        Collects file moves & copies, then runs them all at once with execute().
+
+        Moves are plain renames when both ends are on the same device. Copies are reflinked when the filesystem
+        supports it, and are always written to a temporary file first, so a destination either is complete or
+        doesn't exist. Every op is appended to the journal right before it touches the files and again once it
+        has finished, so an op cut short by a crash is known to have been started.
+
+        :param str journal_path: Where to keep the journal. Without one, rollback() still works within this
+            process but an interrupted run can't be resumed.
+        :param int workers: Number of file ops run at once.
+        :param bool hardlink_copies: Hardlink copies instead of duplicating the data, when possible.
+            Only use this if neither copy is going to be edited in place.
+        """
+        self.journal_path = journal_path
+        self.workers = workers
+        self.hardlink_copies = hardlink_copies
+        self.ops = list()  # [FileOp]
+        # Ops that were not planned because they clash with ones that were
+        self.conflicts = list()  # [(op type, source, destination, reason)]
+        self._ops_by_destination = dict()  # { path key : FileOp }
+        self._ops_by_source = dict()  # { path key : [FileOp] }
+        self._journal_started = False
+        self._journal_lock = threading.Lock()
+
+    @classmethod
+    def from_journal(cls, journal_path: str, **kwargs) -> "EggFileOpPlanner":
+        """
+        Picks an interrupted run back up. Call execute() to finish it or rollback() to undo it.
+        """
+        planner = cls(journal_path=journal_path, **kwargs)
+        with open(journal_path) as journal_file:
+            header = json.loads(journal_file.readline())
+            for op in header["ops"]:
+                planner._add_op(FileOp(**op))
+            for line in journal_file:
+                try:
+                    update = json.loads(line)
+                except ValueError:
+                    # Torn last line, the op it was about gets checked again
+                    continue
+                op = planner.ops[update.pop("index")]
+                for key, value in update.items():
+                    setattr(op, key, value)
+        planner._journal_started = True
+        return planner
+
+    def _add_op(self, op: FileOp) -> None:
+        self.ops.append(op)
+        self._ops_by_destination[_path_key(op.destination)] = op
+        self._ops_by_source.setdefault(_path_key(op.source), list()).append(op)
+
+    def _plan(self, op_type: str, source: str, destination: str) -> FileOp | None:
+        source = os.path.abspath(source)
+        destination = os.path.abspath(destination)
+        source_key = _path_key(source)
+        destination_key = _path_key(destination)
+        planned_op = self._ops_by_destination.get(destination_key)
+        if planned_op:
+            if planned_op.op == op_type and _path_key(planned_op.source) == source_key:
+                return planned_op
+            return self._reject(op_type, source, destination, f"it is already planned from {planned_op.source}")
+        if destination_key in self._ops_by_source or source_key in self._ops_by_destination:
+            return self._reject(op_type, source, destination, "it depends on the order of other file ops")
+        other_ops = self._ops_by_source.get(source_key, list())
+        if other_ops and (op_type == "move" or any(other_op.op == "move" for other_op in other_ops)):
+            return self._reject(op_type, source, destination, "the source is also moved elsewhere")
+        op = FileOp(op_type, source, destination)
+        if os.path.exists(destination):
+            op.status = "skipped"
+        self._add_op(op)
+        return op
+
+    def _reject(self, op_type: str, source: str, destination: str, reason: str) -> None:
+        logging.warning(f"Not planning {op_type} {source} -> {destination}, {reason}")
+        self.conflicts.append((op_type, source, destination, reason))
+        return None
+
+    def plan_move(self, source: str, destination: str) -> FileOp | None:
+        """
+        :return: The planned FileOp, or None if it clashes with the ops planned so far (see conflicts).
+        """
+        return self._plan("move", source, destination)
+
+    def plan_copy(self, source: str, destination: str) -> FileOp | None:
+        """
+        :return: The planned FileOp, or None if it clashes with the ops planned so far (see conflicts).
+        """
+        return self._plan("copy", source, destination)
+
+    @property
+    def failed_ops(self) -> list[FileOp]:
+        return [op for op in self.ops if op.status == "failed"]
+
+    def _write_journal(self, index: int = None) -> None:
+        if not self.journal_path:
+            return
+        with self._journal_lock:
+            if not self._journal_started:
+                with open(self.journal_path, "w") as journal_file:
+                    journal_file.write(json.dumps({"ops": [asdict(op) for op in self.ops]}) + "\n")
+                    journal_file.flush()
+                    os.fsync(journal_file.fileno())
+                self._journal_started = True
+            if index is None:
+                return
+            op = self.ops[index]
+            update = {"index": index, "status": op.status, "method": op.method, "made_dirs": op.made_dirs,
+                      "error": op.error}
+            with open(self.journal_path, "a") as journal_file:
+                journal_file.write(json.dumps(update) + "\n")
+                journal_file.flush()
+                os.fsync(journal_file.fileno())
+
+    def discard_journal(self) -> None:
+        """
+        Forgets about the run once its results have been committed to (e.g. the eggs have been written).
+        """
+        if self.journal_path and os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self._journal_started = False
+
+    @staticmethod
+    def _make_dirs(directory: str) -> list[str]:
+        missing = list()
+        while directory and not os.path.isdir(directory):
+            missing.insert(0, directory)
+            parent = os.path.dirname(directory)
+            if parent == directory:
+                break
+            directory = parent
+        made_dirs = list()
+        for directory in missing:
+            try:
+                os.mkdir(directory)
+                made_dirs.append(directory)
+            except FileExistsError:
+                # Another op got to it first
+                pass
+        return made_dirs
+
+    def _copy_file(self, source: str, destination: str, allow_link: bool) -> str:
+        """
+        :return: The method used
+        """
+        if allow_link:
+            try:
+                os.link(source, destination)
+                return "link"
+            except OSError:
+                pass
+        temp_path = destination + TEMP_SUFFIX
+        try:
+            try:
+                _reflink(source, temp_path)
+                method = "reflink"
+            except OSError:
+                shutil.copy2(source, temp_path)
+                method = "copy"
+            os.replace(temp_path, destination)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return method
+
+    def _move_file(self, source: str, destination: str) -> str:
+        try:
+            os.rename(source, destination)
+            return "rename"
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+        # Different devices
+        method = self._copy_file(source, destination, allow_link=False)
+        os.remove(source)
+        return method
+
+    def _run_op(self, index: int) -> None:
+        op = self.ops[index]
+        try:
+            if os.path.exists(op.destination):
+                # Either finished right before an interruption, or something else put a file there in the meantime
+                if op.op == "move" and not os.path.exists(op.source):
+                    op.status = "done"
+                elif op.op == "copy" and op.status == "started":
+                    # Copies only ever show up at their destination once complete
+                    op.status = "done"
+                else:
+                    op.status = "skipped"
+            else:
+                op.made_dirs += self._make_dirs(os.path.dirname(op.destination))
+                op.status = "started"
+                self._write_journal(index)
+                if op.op == "move":
+                    op.method = self._move_file(op.source, op.destination)
+                else:
+                    op.method = self._copy_file(op.source, op.destination, allow_link=self.hardlink_copies)
+                op.status = "done"
+            op.error = ""
+        except OSError as e:
+            logging.error(f"Failed to {op.op} {op.source} -> {op.destination} ({e})")
+            op.status = "failed"
+            op.error = str(e)
+        self._write_journal(index)
+
+    def execute(self) -> bool:
+        """
+        Runs every op that isn't done yet, including the failed ones of a previous run.
+
+        :return: True if no op failed.
+        """
+        self._write_journal()
+        indices = [index for index, op in enumerate(self.ops) if op.status in ("pending", "started", "failed")]
+        if self.workers > 1 and len(indices) > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                list(executor.map(self._run_op, indices))
+        else:
+            for index in indices:
+                self._run_op(index)
+        return not self.failed_ops
+
+    def _was_carried_out(self, op: FileOp) -> bool:
+        """
+        Whether an op that never got to record its outcome (the run was interrupted) has changed the files.
+        """
+        if op.op == "move":
+            return os.path.exists(op.destination) and not os.path.exists(op.source)
+        # Copies never leave a partial destination, only the temporary file
+        temp_path = op.destination + TEMP_SUFFIX
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return op.status == "started" and os.path.exists(op.destination)
+
+    def rollback(self) -> bool:
+        """
+        Undoes every finished op, newest first: moved files are moved back and copies are removed.
+        Ops that were cut short by an interruption are checked on disk and undone if they went through.
+
+        :return: True if everything was undone.
+        """
+        self._write_journal()
+        success = True
+        made_dirs = list()
+        for index in reversed(range(len(self.ops))):
+            op = self.ops[index]
+            if op.status not in ("done", "started", "pending"):
+                continue
+            try:
+                if op.status == "done" or self._was_carried_out(op):
+                    if op.op == "move":
+                        self._move_file(op.destination, op.source)
+                    else:
+                        os.remove(op.destination)
+                elif op.status == "pending":
+                    # Never ran
+                    continue
+                made_dirs.extend(op.made_dirs)
+                op.status = "rolled_back"
+            except OSError as e:
+                logging.error(f"Failed to roll back {op.op} {op.source} -> {op.destination} ({e})")
+                op.error = str(e)
+                success = False
+            self._write_journal(index)
+        # Ops ran in parallel, so a folder may have been made by one op and filled by others.
+        # Only remove folders once every file has been put back, deepest first.
+        for directory in sorted(set(made_dirs), key=lambda directory: directory.count(os.sep), reverse=True):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                # Not empty (or already gone), something else lives there too
+                pass
+        return success
@@ -0,0 +1,230 @@
+"""
+Writes serialized eggs to disk, leaving files alone when their contents would not change.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import zlib
+from typing import Iterable, Iterator
+
+from panda3d.core import StringStream
+from panda3d.egg import EggComment, EggGroupNode, EggNode, EggVertexPool
+
+from eggtools.utils.EggScanCache import hash_file
+
+# Same default as Panda's compressed (.pz) file writer
+PZ_COMPRESSION_LEVEL = 6
+# Streamed egg text is gathered into blocks of about this size before being hashed, compressed & written
+STREAM_BLOCK_SIZE = 1 << 20
+# Stands in for a group's children while working out the text that goes around them
+_CHILDREN_MARKER = "eggtools-children-marker"
+
+
+def is_compressed(filepath: str) -> bool:
+    return filepath.endswith(".pz")
+
+
+def read_contents(filepath: str) -> bytes:
+    """
+    :return: The (decompressed) contents of the file.
+    """
+    with open(filepath, "rb") as f:
+        data = f.read()
+    if is_compressed(filepath):
+        data = zlib.decompress(data)
+    return data
+
+
+def hash_contents(filepath: str, chunk_size: int = STREAM_BLOCK_SIZE) -> str:
+    """
+    Like hash_file, but hashes what's inside compressed files.
+    """
+    if not is_compressed(filepath):
+        return hash_file(filepath, chunk_size)
+    hasher = hashlib.sha1()
+    decompressor = zlib.decompressobj()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            hasher.update(decompressor.decompress(chunk))
+    hasher.update(decompressor.flush())
+    return hasher.hexdigest()
+
+
+def _node_text(node, indent_level: int) -> bytes:
+    stream = StringStream()
+    node.write(stream, indent_level)
+    return stream.getData()
+
+
+def _split_group_text(group: EggGroupNode, indent_level: int) -> tuple[bytes, bytes, int]:
+    """
+    Serializes the group with a marker in place of its children.
+
+    :return: The text before the children, the text after them, and the indent level of the children.
+    """
+    children = EggGroupNode()
+    children.stealChildren(group)
+    marker = EggComment("", _CHILDREN_MARKER)
+    try:
+        group.addChild(marker)
+        text = _node_text(group, indent_level)
+        group.removeChild(marker)
+    finally:
+        group.stealChildren(children)
+    # EggData doesn't indent its children, everything else does.
+    for child_indent_level in (indent_level + 2, indent_level):
+        marker_text = _node_text(marker, child_indent_level)
+        if text.count(marker_text) == 1:
+            prefix, suffix = text.split(marker_text)
+            return prefix, suffix, child_indent_level
+    raise ValueError(f"Could not find where the children of {group.getName()} go")
+
+
+def iter_egg_chunks(node: EggNode, indent_level: int = 0, pool_writer=None) -> Iterator[bytes]:
+    """
+    Serializes the node (usually an EggData) one node at a time.
+
+    The chunks add up to the same text as str(node), but only one node (or vertex) is held in memory at once.
+    Groups are briefly emptied while the text around their children is worked out,
+    so the egg should not be used by anything else in the meantime.
+
+    :param EggVertexPoolWriter pool_writer: Writes the vertex pools instead, with its own precision.
+    """
+    if isinstance(node, EggVertexPool) and pool_writer:
+        yield from pool_writer.iter_chunks(node, indent_level)
+    elif isinstance(node, EggVertexPool):
+        text = _node_text(EggVertexPool(node.getName()), indent_level)
+        suffix = b" " * indent_level + b"}\n"
+        yield text[:-len(suffix)]
+        for index in range(node.getHighestIndex() + 1):
+            egg_vertex = node.getVertex(index)
+            if egg_vertex is not None:
+                yield _node_text(egg_vertex, indent_level + 2)
+        yield suffix
+    elif isinstance(node, EggGroupNode) and node.getFirstChild() is not None:
+        prefix, suffix, child_indent_level = _split_group_text(node, indent_level)
+        yield prefix
+        for child in node.getChildren():
+            yield from iter_egg_chunks(child, child_indent_level, pool_writer)
+        yield suffix
+    else:
+        yield _node_text(node, indent_level)
+
+
+def _temp_path(filepath: str) -> str:
+    return f"{filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def _replace(temp_path: str, filepath: str) -> None:
+    if os.path.exists(filepath):
+        # Keep the permissions of the file we are replacing
+        os.chmod(temp_path, os.stat(filepath).st_mode)
+    os.replace(temp_path, filepath)
+
+
+def file_matches(filepath: str, data: bytes) -> bool:
+    """
+    Checks if the file on disk already holds exactly this data.
+
+    Compressed files are compared by their decompressed contents, since the same contents
+    may not always compress to the same bytes.
+    """
+    try:
+        # Most changed files give themselves away by their size, without having to read them.
+        if not is_compressed(filepath) and os.path.getsize(filepath) != len(data):
+            return False
+        return hash_contents(filepath) == hashlib.sha1(data).hexdigest()
+    except (OSError, zlib.error):
+        return False
+
+
+def replace_file(filepath: str, raw_data: bytes) -> None:
+    """
+    Writes the bytes as they are to a temporary file next to the target and renames it over the target,
+    so nothing reading the target ever sees a partially written file.
+    """
+    temp_path = _temp_path(filepath)
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(raw_data)
+        _replace(temp_path, filepath)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def write_atomic(filepath: str, data: bytes, compression_level: int = PZ_COMPRESSION_LEVEL) -> None:
+    """
+    Like replace_file, but compresses the data first if it goes into a .pz file.
+    """
+    if is_compressed(filepath):
+        data = zlib.compress(data, compression_level)
+    replace_file(filepath, data)
+
+
+def write_if_changed(filepath: str, data: bytes, compression_level: int = PZ_COMPRESSION_LEVEL) -> bool:
+    """
+    :param str filepath: Where to write the data, .pz files are compressed.
+    :param bytes data: Uncompressed contents of the file.
+    :param int compression_level: zlib level (0-9) used for .pz files.
+    :return: True if the file was written, False if it already held the data.
+    """
+    if file_matches(filepath, data):
+        return False
+    write_atomic(filepath, data, compression_level)
+    return True
+
+
+def write_chunks_if_changed(filepath: str, chunks: Iterable[bytes],
+                            compression_level: int = PZ_COMPRESSION_LEVEL) -> bool:
+    """
+    Streaming version of write_if_changed. The chunks are written to a temporary file as they come in,
+    which only replaces the target if the contents turned out to be different.
+
+    :param str filepath: Where to write the data, .pz files are compressed.
+    :param chunks: Uncompressed contents of the file.
+    :param int compression_level: zlib level (0-9) used for .pz files.
+    :return: True if the file was written, False if it already held the data.
+    """
+    hasher = hashlib.sha1()
+    compressor = zlib.compressobj(compression_level) if is_compressed(filepath) else None
+    size = 0
+    temp_path = _temp_path(filepath)
+    try:
+        with open(temp_path, "wb") as f:
+            def flush(block_chunks):
+                block = b"".join(block_chunks)
+                hasher.update(block)
+                f.write(compressor.compress(block) if compressor else block)
+
+            block_chunks = list()
+            block_size = 0
+            for chunk in chunks:
+                block_chunks.append(chunk)
+                block_size += len(chunk)
+                if block_size >= STREAM_BLOCK_SIZE:
+                    flush(block_chunks)
+                    size += block_size
+                    block_chunks, block_size = list(), 0
+            flush(block_chunks)
+            size += block_size
+            if compressor:
+                f.write(compressor.flush())
+
+        try:
+            unchanged = (is_compressed(filepath) or os.path.getsize(filepath) == size) and \
+                        hash_contents(filepath) == hasher.hexdigest()
+        except (OSError, zlib.error):
+            unchanged = False
+        if unchanged:
+            os.remove(temp_path)
+            return False
+        _replace(temp_path, filepath)
+        return True
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
@@ -1,9 +1,13 @@
-import shutil
+import logging
 import os
 
 from panda3d.core import Filename
 
 from eggtools.EggMan import EggMan
+from eggtools.EggManConfig import VertexPrecisionConfig
+from eggtools.utils.EggCrawler import crawl_eggs
+from eggtools.utils.EggFileOpPlanner import EggFileOpPlanner
+from eggtools.utils.EggFileWriter import PZ_COMPRESSION_LEVEL
 
 rename_list = {}
 
@@ -11,24 +15,65 @@ rename_list = {}
 class EggMaintenanceUtil:
 
     # might be wise to use **kwargs here for configs
-    def __init__(self, file_list: list, custom_rename_list: dict = None, base_path=None):
+    def __init__(self, file_list: list, custom_rename_list: dict = None, base_path=None, lazy: bool = False,
+                 compression_level: int = PZ_COMPRESSION_LEVEL):
         """
         :param dict custom_rename_list: A dictionary consisting of old_name keys & new_name values.
+        :param bool lazy: Only read egg files once they are needed. Use this for windowed maintenance.
+        :param int compression_level: zlib level (0-9) used when writing .pz eggs.
         """
         self.base_path = base_path
         if not self.base_path:
             self.base_path = GAMEASSETS_MAPS_PATH
-        self.eggman = EggMan(file_list)
+        self.eggman = EggMan(file_list, lazy=lazy, compression_level=compression_level)
         if not custom_rename_list:
             self.rename_list = rename_list
         else:
             self.rename_list = custom_rename_list
 
-    def perform_general_maintenance(self):
-        self.eggman.fix_broken_texpaths()
-        self.eggman.rename_all_trefs()
-        self.eggman.apply_all_attributes()
-        self.eggman.write_all_eggs_manually()
+    def perform_general_maintenance(self, window_size: int = 0, window_bytes: int = 0, write_workers: int = 1,
+                                    precision: VertexPrecisionConfig = None, bake: bool = False,
+                                    bam_workers: int = 1, bam_dir: str = None, bam_root: str = None):
+        """
+        :param int window_size: If given, eggs are loaded, processed, written and released this many at a time.
+        :param int window_bytes: If given, eggs are processed in windows of at most this many bytes on disk.
+        :param int write_workers: Number of eggs written at once, see EggMan.write_eggs.
+        :param VertexPrecisionConfig precision: Decimals written per vertex channel, see EggVertexPoolWriter.
+        :param bool bake: Also convert the eggs into .bam files, skipping those whose .bam is already newer.
+        :param int bam_workers: Number of processes used to convert the eggs into .bam files.
+        :param str bam_dir: Directory the .bam files go into, defaults to each egg's own directory.
+        :param str bam_root: The .bam files keep their path relative to this folder inside bam_dir,
+            defaults to the deepest folder all of the eggs are in.
+        """
+        if not (window_size or window_bytes):
+            self.eggman.fix_broken_texpaths()
+            self.eggman.rename_all_trefs()
+            self.eggman.apply_all_attributes()
+            self.eggman.write_all_eggs_manually(workers=write_workers, precision=precision)
+            if bake:
+                self.eggman.write_bams(workers=bam_workers, output_dir=bam_dir, root=bam_root)
+            return
+
+        loaded_eggs = sum(ctx.loaded for ctx in self.eggman.egg_datas.values())
+        if loaded_eggs:
+            logging.warning(f"{loaded_eggs} eggs were already read during registration, windowed maintenance only "
+                            f"keeps memory down for lazily registered eggs (lazy=True)")
+
+        # Everything that is shared between eggs (like the name resolver) lives on the EggMan and is kept around,
+        # only the egg contents are released after each window.
+        for window in self.eggman.iter_egg_windows(max_eggs=window_size, max_bytes=window_bytes):
+            self.eggman.load_eggs(window)
+            for egg_data in window:
+                self.eggman.fix_broken_texpaths(egg_data)
+                self.eggman.rename_trefs(egg_data)
+                self.eggman.apply_attributes(egg_data)
+            self.eggman.write_eggs(window, manually=True, workers=write_workers, precision=precision)
+            if bake:
+                # The window is released right after, so the egg loader can have the eggs instead of copies
+                self.eggman.write_bams(window, workers=bam_workers, output_dir=bam_dir, root=bam_root,
+                                       release=True)
+            for egg_data in window:
+                self.eggman.unload_egg(egg_data)
 
     def perform_rename_operations(
             self,
@@ -36,82 +81,135 @@ class EggMaintenanceUtil:
             put_into_tex_folder=False,
             copy_only=False,
             partial_replace=False,
+            journal_path=None,
+            file_workers=8,
     ):
+        """
+        Texture files are moved (or copied) all at once after every egg has been repathed, and the eggs are only
+        written if all of them succeeded. Otherwise, the files are put back where they were.
+
+        :param str journal_path: Keeps track of the file operations, see EggFileOpPlanner.
+        :param int file_workers: Number of file operations run at once.
+        """
         subfolder = ""
         allTextures = self.rename_list
+        texture_index = self.eggman.get_texture_index()
+
+        # Only the eggs that use one of the renamed textures are touched.
+        renames = dict()  # { EggData : [(texture basename, new texture name)] }
+        for texbase in texture_index.get_basenames(include_extension=False):
+            for textureEntry in allTextures.keys():
+                newTexture = ""
+                if partial_replace and textureEntry in texbase:
+                    newTexture = texbase.replace(textureEntry, allTextures[textureEntry])
+                elif texbase == textureEntry:
+                    newTexture = allTextures[texbase]
+                if not newTexture:
+                    continue
+                for egg_obj in texture_index.get_eggs_using(texbase, include_extension=False):
+                    renames.setdefault(egg_obj, list()).append((texbase, newTexture))
+
+        planner = EggFileOpPlanner(journal_path=journal_path, workers=file_workers)
+        repaths = list()  # [(EggData, EggTexture, new texture path, description)]
         for egg_obj in self.eggman.egg_datas.keys():
-            eggctx = self.eggman.egg_datas[egg_obj]
-            for texbase in self.eggman.get_texture_basenames(egg_obj, include_extension=False):
-                for textureEntry in allTextures.keys():
-                    newTexture = ""
-                    if partial_replace and textureEntry in texbase:
-                        newTexture = texbase.replace(textureEntry, allTextures[textureEntry])
-                    elif texbase == textureEntry:
-                        newTexture = allTextures[texbase]
-                    if not newTexture:
+            if egg_obj not in renames:
+                continue
+            # Prescanned eggs get their EggTextures indexed once they are loaded
+            eggctx = self.eggman.load_egg(egg_obj)
+            for texbase, newTexture in renames[egg_obj]:
+                texture_refs = texture_index.find_in_egg(egg_obj, texbase, include_extension=False)
+                if not texture_refs:
+                    continue
+                egg_texture = texture_refs[0].egg_texture
+                _old_eggtex = egg_texture.getFullpath()
+
+                self.base_path = eggctx.filename.getDirname()
+                if put_into_tex_folder:
+                    # The planner creates the folder when needed
+                    subfolder = "tex"
+                else:
+                    subfolder = egg_texture.getFullpath().getDirname()
+
+                rebase_texture = f"{subfolder}/{newTexture}.png"
+
+                old_texture_source = Filename.toOsSpecific(Filename.fromOsSpecific(
+                    os.path.join(eggctx.filename.getDirname(), _old_eggtex)
+                ))
+                rebase_texture_source = Filename.toOsSpecific(Filename.fromOsSpecific(
+                    os.path.join(eggctx.filename.getDirname(), rebase_texture)
+                ))
+
+                if rename_texture_file and \
+                        os.path.isfile(old_texture_source) and not \
+                        os.path.isfile(rebase_texture_source):
+                    if not self._plan_texture_op(planner, copy_only, old_texture_source, rebase_texture_source):
+                        print(f"not repathing {eggctx.filename} ({texbase}), its texture can't be moved there")
                         continue
+                repaths.append((egg_obj, egg_texture, rebase_texture, f"{texbase} --> {newTexture}"))
 
-                    egg_texture = self.eggman.get_texture_by_name(egg_obj, texbase)
-                    _old_eggtex = egg_texture.getFullpath()
-
-                    self.base_path = eggctx.filename.getDirname()
-                    if put_into_tex_folder:
-                        os.makedirs(
-                            os.path.join(Filename.toOsSpecific(Filename.fromOsSpecific(self.base_path)), "tex"),
-                            exist_ok=True
-                        )
-                        subfolder = "tex"
-                    else:
-                        subfolder = egg_texture.getFullpath().getDirname()
-
-                    rebase_texture = f"{subfolder}/{newTexture}.png"
-
-                    old_texture_source = Filename.toOsSpecific(Filename.fromOsSpecific(
-                        os.path.join(eggctx.filename.getDirname(), _old_eggtex)
-                    ))
-                    rebase_texture_source = Filename.toOsSpecific(Filename.fromOsSpecific(
-                        os.path.join(eggctx.filename.getDirname(), rebase_texture)
-                    ))
-
-                    if rename_texture_file and \
-                            os.path.isfile(old_texture_source) and not \
-                            os.path.isfile(rebase_texture_source):
-                        if copy_only:
-                            print(f"copying image {_old_eggtex} -> {rebase_texture}")
-                            shutil.copy(
-                                old_texture_source,
-                                rebase_texture_source
-                            )
-                        else:
-                            print(f"moving image {_old_eggtex} -> {rebase_texture}")
-                            shutil.move(
-                                old_texture_source,
-                                rebase_texture_source
-                            )
-                    print(f"repathing {eggctx.filename} ({texbase} --> {newTexture})")
-                    self.eggman.repath_egg_texture(egg_obj, egg_texture, Filename.fromOsSpecific(rebase_texture))
+        repathed_eggs = self._repath_textures(repaths)
+        if not self._run_file_ops(planner):
+            return
+        for egg_obj in repathed_eggs:
             self.eggman.write_egg_manually(egg_obj)
+        planner.discard_journal()
+
+    @staticmethod
+    def _plan_texture_op(planner: EggFileOpPlanner, copy_only: bool, source: str, destination: str) -> bool:
+        """
+        :return: False if the op clashes with the ones planned before it.
+        """
+        if copy_only:
+            print(f"copying image {source} -> {destination}")
+            return planner.plan_copy(source, destination) is not None
+        print(f"moving image {source} -> {destination}")
+        return planner.plan_move(source, destination) is not None
+
+    def _repath_textures(self, repaths: list) -> list:
+        """
+        Only called once every file op has been planned, so a clash never leaves the eggs half-repathed.
+
+        :param list repaths: [(EggData, EggTexture, new texture path, description)]
+        :return: The repathed eggs, in order.
+        """
+        repathed_eggs = dict()
+        for egg_obj, egg_texture, rebase_texture, description in repaths:
+            print(f"repathing {self.eggman.egg_datas[egg_obj].filename} ({description})")
+            self.eggman.repath_egg_texture(egg_obj, egg_texture, Filename.fromOsSpecific(rebase_texture))
+            repathed_eggs[egg_obj] = None
+        return list(repathed_eggs)
 
-    def perform_texpath_fixes(self, put_into_tex_folder=True, copy_only=False):
+    @staticmethod
+    def _run_file_ops(planner: EggFileOpPlanner) -> bool:
+        """
+        :return: False if any file operation failed, in which case all of them have been rolled back.
+        """
+        if planner.execute():
+            return True
+        print(f"{len(planner.failed_ops)} file operations failed, rolling back and leaving the eggs unwritten")
+        planner.rollback()
+        return False
+
+    def perform_texpath_fixes(self, put_into_tex_folder=True, copy_only=False, journal_path=None, file_workers=8):
         """
         For each texture in an egg file, it will try to locate the texture by the defined texpath
         If it can find the texture, it will relocate it to be next to the model (or in a tex/ folder)
 
         This is ideal for cloud/drive asset management but not for asset repositories.
+
+        Like perform_rename_operations, the files are only relocated once every egg has been repathed.
         """
 
         # Like a ninja... silent.
         subfolder = ""
+        planner = EggFileOpPlanner(journal_path=journal_path, workers=file_workers)
+        repaths = list()
         for egg_obj in self.eggman.egg_datas.keys():
             eggctx = self.eggman.egg_datas[egg_obj]
             for texbase in self.eggman.get_texture_basenames(egg_obj, include_extension=False):
                 self.base_path = eggctx.filename.getDirname()
                 if put_into_tex_folder:
                     print(f"moving {eggctx.filename}")
-                    os.makedirs(
-                        os.path.join(Filename.toOsSpecific(Filename.fromOsSpecific(self.base_path)), "tex"),
-                        exist_ok=True
-                    )
                     subfolder = "tex/"
                 rebase_texture = f"{subfolder}{texbase}.png"
                 egg_texture = self.eggman.get_texture_by_name(egg_obj, texbase)
@@ -125,21 +223,17 @@ class EggMaintenanceUtil:
                 ))
 
                 if os.path.isfile(old_texture_source) and not os.path.isfile(rebase_texture_source):
-                    if copy_only:
-                        print(f"copying image {_old_eggtex} -> {rebase_texture}")
-                        shutil.copy(
-                            old_texture_source,
-                            rebase_texture_source
-                        )
-                    else:
-                        print(f"moving image {_old_eggtex} -> {rebase_texture}")
-                        shutil.move(
-                            old_texture_source,
-                            rebase_texture_source
-                        )
-                print(f"repathing {eggctx.filename} ({texbase} --> {rebase_texture})")
-                self.eggman.repath_egg_texture(egg_obj, egg_texture, Filename.fromOsSpecific(rebase_texture))
+                    if not self._plan_texture_op(planner, copy_only, old_texture_source, rebase_texture_source):
+                        print(f"not repathing {eggctx.filename} ({texbase}), its texture can't be moved there")
+                        continue
+                repaths.append((egg_obj, egg_texture, rebase_texture, f"{texbase} --> {rebase_texture}"))
+
+        self._repath_textures(repaths)
+        if not self._run_file_ops(planner):
+            return
+        for egg_obj in self.eggman.egg_datas.keys():
             self.eggman.write_egg(egg_obj)
+        planner.discard_journal()
 
 
 """
@@ -149,14 +243,9 @@ Test module
 if __name__ == "__main__":
     from eggtools.config.EggVariableConfig import GAMEASSETS_MODELS_PATH, GAMEASSETS_MAPS_PATH
 
-    file_list = []
-
     target_path = os.getcwd()
-    for dirpath, _, filenames in os.walk(os.path.join(target_path)):
-        for file in filenames:
-            if file.endswith(".egg"):
-                print(f"adding file {file}")
-                file_list.append(os.path.abspath(os.path.join(dirpath, file)))
+    file_list = crawl_eggs(target_path)
+    print(f"found {len(file_list)} egg files")
 
     eggmaint = EggMaintenanceUtil(file_list, base_path=target_path)
 
@@ -167,15 +256,9 @@ Sample Implementation
 if 0:
     from eggtools.config.EggVariableConfig import GAMEASSETS_MODELS_PATH, GAMEASSETS_MAPS_PATH
 
-    file_list = []
-
     # target_path = "C:\\Path\\To\\Assets"
     target_path = GAMEASSETS_MODELS_PATH
-    for dirpath, _, filenames in os.walk(os.path.join(target_path)):
-        for file in filenames:
-            if file.endswith(".egg"):
-                print(f"adding file {file}")
-                file_list.append(os.path.abspath(os.path.join(dirpath, file)))
+    file_list = crawl_eggs(target_path)
 
     eggmaint = EggMaintenanceUtil(file_list, base_path=target_path)
     # Use put_into_tex_folder if we are operating on storing assets individually
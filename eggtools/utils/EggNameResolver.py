@@ -1,24 +1,48 @@
+from __future__ import annotations
+
+import functools
+import json
 import os
 import logging
 
 from panda3d.core import Filename
 
+from eggtools.EggManConfig import NameRewriteRule
+
+# Resolved names remembered by each resolver
+RESOLVE_CACHE_SIZE = 4096
 
-class EggNameResolver:
-    _search_paths = list()
 
+class EggNameResolver:
     # Default old->new prefixes
     OLD_PREFIX = "ttcc"
     NEW_PREFIX = "cc"
 
-    def __init__(self, search_paths, loglevel=logging.CRITICAL, old_prefix="", new_prefix=""):
+    def __init__(self, search_paths, loglevel=logging.CRITICAL, old_prefix="", new_prefix="", auto_refresh=False,
+                 rules: list[NameRewriteRule | dict] = None):
         """
         Utility class to try and resolve certain texture names automatically
+
+        The files directly inside of each search path are indexed once, so finding a file is a dictionary lookup.
+
+        :param bool auto_refresh: If a file can't be found, rescan the search paths that were modified since
+            they were indexed before giving up. Use this when textures may be added while the resolver is in use.
+        :param list rules: Ordered rewrite rules tried by try_different_names, see set_rules.
+            Defaults to swapping the old prefix for the new one.
         """
-        if not old_prefix:
-            self.old_prefix = self.OLD_PREFIX
-        if not new_prefix:
-            self.new_prefix = self.NEW_PREFIX
+        self.old_prefix = old_prefix or self.OLD_PREFIX
+        self.new_prefix = new_prefix or self.NEW_PREFIX
+        self.auto_refresh = auto_refresh
+        # Bumped whenever the search paths or rules change, which invalidates every cached resolution
+        self.generation = 0
+        self.rules = None  # [NameRewriteRule], None for the default prefix rules
+        self._resolve_cached = functools.lru_cache(maxsize=RESOLVE_CACHE_SIZE)(self._resolve_name)
+        if rules:
+            self.set_rules(rules)
+        self._search_paths = list()
+        self._file_index = dict()  # { normcased basename : [full path, in search path order] }
+        self._dir_files = dict()  # { search path : { normcased basename : full path } }
+        self._dir_mtimes = dict()  # { search path : mtime when it was indexed }
         self.search_paths = search_paths
         logging.basicConfig(level=loglevel)
 
@@ -28,25 +52,142 @@ class EggNameResolver:
 
     @search_paths.setter
     def search_paths(self, path: list):
+        self._search_paths = list()
+        self._dir_files = dict()
+        self._dir_mtimes = dict()
+        self.add_search_paths(path)
+
+    def add_search_paths(self, path: list) -> None:
+        """
+        Adds search paths after the existing ones. Paths that are already searched are skipped.
+        """
         if type(path) is not list:
             path = [path]
+        known_paths = {self._path_key(sp) for sp in self._search_paths}
         for sp in path:
+            key = self._path_key(sp)
+            if key in known_paths:
+                continue
+            known_paths.add(key)
             self._search_paths.append(sp)
+            self._scan_search_path(sp)
+        self._rebuild_file_index()
+        self.generation += 1
 
-    def try_different_names(self, filename: str, prefix_type: str = "t") -> str:
-        # Replace: toontown_background --> tt_t_background
-        new_filename = filename.replace(f"{self.old_prefix}_", f"{self.new_prefix}_{prefix_type}_")
-        if not new_filename.startswith(f"{self.new_prefix}_{prefix_type}_"):
-            new_filename = f"{self.new_prefix}_{prefix_type}_{filename}"
-
-        for filepath in self.search_paths:
-            # We have to convert back into Filename because os.path can't find files with like
-            # /f/path/to/assets\mytexture.png
-            if os.path.isfile(Filename.fromOsSpecific(os.path.join(filepath, new_filename))):
+    @staticmethod
+    def _path_key(search_path) -> str:
+        if isinstance(search_path, Filename):
+            search_path = search_path.toOsSpecific()
+        return os.path.normcase(os.path.abspath(search_path))
+
+    def _scan_search_path(self, search_path) -> None:
+        key = self._path_key(search_path)
+        files = dict()
+        try:
+            self._dir_mtimes[key] = os.stat(key).st_mtime
+            with os.scandir(key) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_file():
+                            files[os.path.normcase(entry.name)] = entry.path
+                    except OSError:
+                        continue
+        except OSError as e:
+            logging.debug(f"Can't index search path {search_path} ({e})")
+            self._dir_mtimes[key] = None
+        self._dir_files[key] = files
+
+    def _rebuild_file_index(self) -> None:
+        self._file_index = dict()
+        for sp in self._search_paths:
+            for name, full_path in self._dir_files.get(self._path_key(sp), dict()).items():
+                self._file_index.setdefault(name, list()).append(full_path)
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Rescans the search paths whose modification time changed since they were indexed.
+
+        :param bool force: Rescan every search path regardless.
+        :return: True if anything was rescanned.
+        """
+        rescanned = False
+        for sp in self._search_paths:
+            key = self._path_key(sp)
+            try:
+                mtime = os.stat(key).st_mtime
+            except OSError:
+                mtime = None
+            if force or mtime != self._dir_mtimes.get(key):
+                self._scan_search_path(sp)
+                rescanned = True
+        if rescanned:
+            self._rebuild_file_index()
+            self.generation += 1
+        return rescanned
+
+    def find_files(self, filename: str) -> list:
+        """
+        :return: Full paths of every file named filename directly inside of a search path, in search path order.
+        """
+        name = os.path.normcase(filename)
+        full_paths = self._file_index.get(name)
+        if not full_paths and self.auto_refresh and self.refresh():
+            full_paths = self._file_index.get(name)
+        return list(full_paths or list())
+
+    def find_file(self, filename: str) -> str | None:
+        """
+        :return: Full path of the file in the first search path that has it, or None.
+        """
+        full_paths = self.find_files(filename)
+        return full_paths[0] if full_paths else None
+
+    def set_rules(self, rules: list[NameRewriteRule | dict]) -> None:
+        """
+        Replaces the rewrite rules. Rules are tried in order, the first rewritten name found in a search path wins.
+
+        :param list rules: NameRewriteRules, or dicts like {"type": "prefix", "pattern": "a_", "replacement": "b_"}
+        """
+        self.rules = [
+            rule if isinstance(rule, NameRewriteRule) else NameRewriteRule.from_dict(rule) for rule in rules
+        ]
+        self.generation += 1
+
+    def load_rules(self, config_path: str) -> None:
+        """
+        Loads the rewrite rules from a JSON file holding a list of rule dicts, see set_rules.
+        """
+        with open(config_path) as config_file:
+            self.set_rules(json.load(config_file))
+
+    def _default_rules(self, filename: str, prefix_type: str) -> list[NameRewriteRule]:
+        # Replace: toontown_background --> tt_t_background, otherwise just add the new prefix.
+        # Only one of the two is ever tried, names with the old prefix don't get the new one added in front.
+        old_prefix = f"{self.old_prefix}_"
+        new_prefix = f"{self.new_prefix}_{prefix_type}_"
+        if filename.startswith(old_prefix):
+            return [NameRewriteRule("prefix", old_prefix, new_prefix)]
+        return [NameRewriteRule("prefix", "", new_prefix)]
+
+    def _resolve_name(self, filename: str, prefix_type: str, generation: int) -> str:
+        rules = self.rules if self.rules is not None else self._default_rules(filename, prefix_type)
+        for rule in rules:
+            new_filename = rule.rewrite(filename)
+            if new_filename and os.path.normcase(new_filename) in self._file_index:
                 logging.info(f"found similar texture name to {filename}: {new_filename}")
                 return new_filename
         # can't find any hits, just return em back
         return filename
 
+    def try_different_names(self, filename: str, prefix_type: str = "t") -> str:
+        """
+        :param str prefix_type: Goes in between the new prefix and the name, for the default rules.
+        :return: The first rewritten filename that exists in a search path, or filename if there is none.
+            Results are cached until the search paths or rules change.
+        """
+        new_filename = self._resolve_cached(filename, prefix_type, self.generation)
+        if new_filename == filename and self.auto_refresh and self.refresh():
+            new_filename = self._resolve_cached(filename, prefix_type, self.generation)
+        return new_filename
 
     # Todo: Search via md5 hash?
@@ -0,0 +1,141 @@
+"""
+Lookup tables for the nodes of an egg, so that operations targeting a few nodes don't have to walk the whole tree.
+"""
+from __future__ import annotations
+
+from panda3d.egg import EggData, EggGroupNode, EggNode, EggPolygon, EggTexture
+
+
+class EggNodeIndex:
+    def __init__(self):
+        """
+        Holds name -> nodes, node type -> nodes, TRef -> polygons & node -> parent lookups for a single egg.
+
+        Lookups return nodes in the order a recursive walk of the egg would reach them.
+        Anything that restructures the egg (adding/removing nodes, flattening, triangulating...) must mark the
+        index as stale, it gets rebuilt the next time it's needed.
+        """
+        self.nodes_by_name = dict()  # { str : { EggNode : None } }
+        self.nodes_by_type = dict()  # { type : { EggNode : None } }
+        self.polygons_by_texture = dict()  # { EggTexture : { EggPolygon : None } }
+        self.parents = dict()  # { EggNode : EggGroupNode }
+        # Position of each node in a recursive walk of the egg
+        self.order = dict()  # { EggNode : int }
+        self.stale = True
+
+    def clear(self) -> None:
+        self.nodes_by_name = dict()
+        self.nodes_by_type = dict()
+        self.polygons_by_texture = dict()
+        self.parents = dict()
+        self.order = dict()
+        self.stale = True
+
+    def build(self, egg: EggData) -> None:
+        """
+        Indexes the whole egg in one walk. Only needed when the index wasn't filled while scanning the egg.
+        """
+        self.clear()
+
+        def traverse_egg(egg_node: EggGroupNode):
+            for child in egg_node.getChildren():
+                self.add_node(child, egg_node)
+                if isinstance(child, EggGroupNode):
+                    traverse_egg(child)
+
+        traverse_egg(egg)
+        self.stale = False
+
+    def add_node(self, egg_node: EggNode, parent: EggGroupNode) -> None:
+        """
+        Adds a node to the index. Parents must be added before their children.
+        """
+        self.order[egg_node] = len(self.order)
+        self.parents[egg_node] = parent
+        self.nodes_by_name.setdefault(egg_node.getName(), dict())[egg_node] = None
+        self.nodes_by_type.setdefault(type(egg_node), dict())[egg_node] = None
+        if isinstance(egg_node, EggPolygon):
+            for egg_texture in egg_node.getTextures():
+                self.polygons_by_texture.setdefault(egg_texture, dict())[egg_node] = None
+
+    def _sorted(self, egg_nodes) -> list:
+        return sorted(egg_nodes, key=self.order.__getitem__)
+
+    def get_nodes_by_name(self, name: str) -> list[EggNode]:
+        return self._sorted(self.nodes_by_name.get(name, dict()))
+
+    def get_nodes_by_type(self, node_type: type) -> list[EggNode]:
+        """
+        :param type node_type: Subclasses of node_type are included as well.
+        """
+        return self._sorted(
+            egg_node
+            for indexed_type, egg_nodes in self.nodes_by_type.items() if issubclass(indexed_type, node_type)
+            for egg_node in egg_nodes
+        )
+
+    def find_nodes(self, name_configs: list) -> list[EggNode]:
+        """
+        :param list name_configs: [NodeNameConfig]
+        :return: Every node with a name accepted by any of the configs.
+        """
+        return self._sorted(
+            egg_node
+            for name, egg_nodes in self.nodes_by_name.items()
+            if any(name_config.check(name) for name_config in name_configs)
+            for egg_node in egg_nodes
+        )
+
+    def get_polygons(self, egg_texture: EggTexture) -> list[EggPolygon]:
+        return self._sorted(self.polygons_by_texture.get(egg_texture, dict()))
+
+    def find_polygons(self, tref_configs: list) -> list[EggPolygon]:
+        """
+        :param list tref_configs: [NodeNameConfig]
+        :return: Every polygon referencing a texture with a TRef name accepted by any of the configs.
+        """
+        return self._sorted({
+            egg_polygon: None
+            for egg_texture, egg_polygons in self.polygons_by_texture.items()
+            if any(tref_config.check(egg_texture.getName()) for tref_config in tref_configs)
+            for egg_polygon in egg_polygons
+        })
+
+    def get_parent(self, egg_node: EggNode) -> EggGroupNode | None:
+        return self.parents.get(egg_node)
+
+    def get_ancestors(self, egg_node: EggNode) -> list[EggGroupNode]:
+        """
+        :return: Parents of the node from the closest one up to the EggData.
+        """
+        ancestors = list()
+        parent = self.parents.get(egg_node)
+        while parent is not None:
+            ancestors.append(parent)
+            parent = self.parents.get(parent)
+        return ancestors
+
+    def rename_node(self, egg_node: EggNode, new_name: str) -> None:
+        old_name = egg_node.getName()
+        if old_name == new_name:
+            return
+        egg_nodes = self.nodes_by_name.get(old_name, dict())
+        egg_nodes.pop(egg_node, None)
+        if not egg_nodes:
+            self.nodes_by_name.pop(old_name, None)
+        egg_node.setName(new_name)
+        self.nodes_by_name.setdefault(new_name, dict())[egg_node] = None
+
+    def update_polygon_textures(self, egg_polygon: EggPolygon, old_textures: list[EggTexture]) -> None:
+        """
+        Moves a polygon from its old textures to the ones it holds now.
+        """
+        for egg_texture in old_textures:
+            egg_polygons = self.polygons_by_texture.get(egg_texture)
+            if egg_polygons is None:
+                continue
+            egg_polygons.pop(egg_polygon, None)
+            if not egg_polygons:
+                del self.polygons_by_texture[egg_texture]
+        for egg_texture in egg_polygon.getTextures():
+            self.polygons_by_texture.setdefault(egg_texture, dict())[egg_polygon] = None
@@ -0,0 +1,207 @@
+"""
+Streaming prescan of egg files.
+
+Reads an egg (or a pzipped egg) in chunks and only looks at the entries that describe what the egg references:
+<Texture>, <File>, <ObjectType>, <Material> and <Scalar> uv-name. Geometry bodies such as <VertexPool> are
+skipped by counting braces, so no egg objects are ever built.
+"""
+from __future__ import annotations
+
+import codecs
+import re
+import zlib
+
+from panda3d.core import Filename
+
+from eggtools.utils.EggScanCache import EggScanRecord
+
+# Entries that can't hold anything we are looking for. Their bodies are skipped without being tokenized.
+SKIPPED_ENTRIES = {
+    "vertexpool",
+    "polygon",
+    "trianglestrip",
+    "trianglefan",
+    "patch",
+    "line",
+    "pointlight",
+    "nurbscurve",
+    "nurbssurface",
+    "table",
+}
+
+_TOKEN_RE = re.compile(
+    r'\s+'  # whitespace
+    r'|//[^\n]*'  # line comment
+    r'|/\*.*?\*/'  # block comment
+    r'|"(?:[^"\\]|\\.)*"'  # quoted string
+    r'|<[^>]*>'  # <Keyword>
+    r'|[{}]'
+    r'|[^\s{}"<]+',  # bare word / number
+    re.DOTALL
+)
+_BRACE_RE = re.compile(r'[{}]')
+
+# Matches a run of text & balanced {} blocks nested up to 5 levels deep, which covers vertex pool contents.
+_BALANCED_RE = r'\{[^{}]*\}'
+for _ in range(4):
+    _BALANCED_RE = r'\{[^{}]*(?:' + _BALANCED_RE + r'[^{}]*)*\}'
+_BODY_RE = re.compile(r'[^{}]*(?:' + _BALANCED_RE + r'[^{}]*)*')
+
+
+def _iter_chunks(filepath: str, chunk_size: int, hasher=None):
+    """
+    Yields the decoded text of an egg file, decompressing pzipped files on the fly.
+
+    :param hasher: hashlib object that is fed the file's bytes as they are read.
+    """
+    decompressor = zlib.decompressobj() if filepath.endswith(".pz") else None
+    # Multibyte characters can be split between two chunks
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    with open(filepath, "rb") as egg_file:
+        while True:
+            data = egg_file.read(chunk_size)
+            if not data:
+                break
+            if hasher:
+                hasher.update(data)
+            if decompressor:
+                data = decompressor.decompress(data)
+            yield decoder.decode(data)
+        tail = decompressor.flush() if decompressor else b""
+        yield decoder.decode(tail, final=True)
+
+
+class _EggScanFrame:
+    __slots__ = ("keyword", "name", "contents")
+
+    def __init__(self, keyword: str, name: str):
+        self.keyword = keyword
+        self.name = name
+        self.contents = list()
+
+
+class EggPrescanner:
+    def __init__(self, chunk_size: int = 1 << 20):
+        """
+        Builds EggScanRecords straight from egg files, without building any EggData.
+
+        :param int chunk_size: Number of bytes read from the file at a time.
+        """
+        self.chunk_size = chunk_size
+
+    def prescan(self, filename: Filename | str, hasher=None) -> EggScanRecord:
+        """
+        :param hasher: hashlib object that is fed the file's bytes as they are read, see EggScanCache.put.
+        """
+        if isinstance(filename, Filename):
+            filename = filename.toOsSpecific()
+
+        textures = dict()
+        uv_names = set()
+        materials = set()
+        ext_file_refs = set()
+        object_types = set()
+
+        stack = list()
+        pending_keyword = None
+        pending_name = ""
+        # When skipping an entry body, this is how many braces deep we are into it.
+        skip_depth = 0
+
+        def close_frame(frame: _EggScanFrame):
+            value = frame.contents[0] if frame.contents else ""
+            if frame.keyword == "texture":
+                textures[frame.name] = value
+            elif frame.keyword == "scalar" and frame.name == "uv-name":
+                if stack and stack[-1].keyword == "texture" and value:
+                    uv_names.add(value)
+            elif frame.keyword == "file":
+                ext_file_refs.add(value)
+            elif frame.keyword == "objecttype":
+                object_types.add(value)
+            elif frame.keyword == "material":
+                materials.add(frame.name)
+
+        buffer = ""
+        for chunk in self._iter_buffers(filename, hasher):
+            buffer += chunk
+            at_eof = chunk == ""
+            pos = 0
+            while pos < len(buffer):
+                if skip_depth:
+                    pos, skip_depth = self._skip_body(buffer, pos, skip_depth)
+                    if skip_depth:
+                        break
+                    continue
+                match = _TOKEN_RE.match(buffer, pos)
+                # Tokens touching the end of the buffer might continue in the next chunk.
+                if not match or (match.end() == len(buffer) and not at_eof):
+                    break
+                pos = match.end()
+                token = match.group()
+                first = token[0]
+                if first.isspace() or token.startswith("//") or token.startswith("/*"):
+                    continue
+                if first == "<":
+                    pending_keyword = token[1:-1].strip().lower()
+                    pending_name = ""
+                elif token == "{":
+                    if pending_keyword in SKIPPED_ENTRIES:
+                        skip_depth = 1
+                    else:
+                        stack.append(_EggScanFrame(pending_keyword, pending_name))
+                    pending_keyword = None
+                elif token == "}":
+                    if stack:
+                        close_frame(stack.pop())
+                else:
+                    if first == '"':
+                        token = token[1:-1]
+                    if pending_keyword is not None:
+                        pending_name = token
+                    elif stack:
+                        stack[-1].contents.append(token)
+            buffer = buffer[pos:]
+
+        return EggScanRecord(
+            textures=textures,
+            uv_names=sorted(uv_names),
+            materials=sorted(materials),
+            ext_file_refs=sorted(ext_file_refs),
+            object_types=sorted(object_types),
+        )
+
+    def _iter_buffers(self, filename: str, hasher=None):
+        yield from _iter_chunks(filename, self.chunk_size, hasher)
+        # Empty chunk to let the tokenizer know there is nothing left to wait for.
+        yield ""
+
+    @staticmethod
+    def _skip_body(buffer: str, pos: int, depth: int) -> tuple[int, int]:
+        """
+        Skips over an entry body by counting braces.
+
+        :return: The position to continue from and the remaining depth (0 once the body has been closed).
+        """
+        while True:
+            if depth == 1:
+                # Let the regex engine jump over whole nested entries (<Vertex>, <UV>, ...) at once.
+                pos = _BODY_RE.match(buffer, pos).end()
+                if pos == len(buffer):
+                    return pos, depth
+                if buffer[pos] == "}":
+                    return pos + 1, 0
+            # Nested deeper than _BODY_RE handles, or cut off by the end of the buffer: go brace by brace.
+            for match in _BRACE_RE.finditer(buffer, pos):
+                depth += 1 if match.group() == "{" else -1
+                if depth == 1:
+                    pos = match.end()
+                    break
+            else:
+                return len(buffer), depth
+
+    def prescan_all(self, filenames: list[Filename | str]) -> dict:
+        """
+        :return: { filename : EggScanRecord }
+        """
+        return {filename: self.prescan(filename) for filename in filenames}
@@ -0,0 +1,147 @@
+"""
+Reading & recompressing pzipped (.pz) eggs.
+
+Panda's .pz files are plain zlib streams. zlib lets go of the GIL while it works, so the next eggs can be
+decompressed in a background thread while the current one is being read & scanned, and a whole tree can be
+recompressed on several threads at once.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from panda3d.core import Filename, StringStream
+from panda3d.egg import EggData
+
+from eggtools.utils.EggCrawler import crawl_eggs
+from eggtools.utils.EggFileWriter import PZ_COMPRESSION_LEVEL, is_compressed, replace_file
+
+
+@dataclass
+class PzipReport:
+    # [(path, size before, size after)] for every file that was (or would be, for a dryrun) recompressed
+    recompressed_files: list = field(default_factory=list)
+    # Files that were already compressed like that
+    unchanged_files: list = field(default_factory=list)
+    failed_files: dict = field(default_factory=dict)  # { path : reason }
+
+    @property
+    def bytes_saved(self) -> int:
+        return sum(old_size - new_size for _, old_size, new_size in self.recompressed_files)
+
+
+def read_egg_contents(egg_data: EggData, filename: Filename, data: bytes) -> bool:
+    """
+    Reads the decompressed contents of an egg file into the EggData, the same way EggData.read reads the file.
+    """
+    egg_data.setEggFilename(filename)
+    try:
+        egg_data.setEggTimestamp(int(os.path.getmtime(filename.toOsSpecific())))
+    except OSError:
+        pass
+    return egg_data.read(StringStream(data))
+
+
+class EggPzipIO:
+    def __init__(self, workers: int = 4, compression_level: int = PZ_COMPRESSION_LEVEL, prefetch: int = 2):
+        """
+        :param int workers: Number of files recompressed at once.
+        :param int compression_level: zlib level (0-9) that files are recompressed with.
+        :param int prefetch: Number of .pz files decompressed ahead of the one being read.
+        """
+        self.workers = workers
+        self.compression_level = compression_level
+        self.prefetch = prefetch
+
+    @staticmethod
+    def _decompress(filename: Filename) -> tuple[bytes | None, str | None]:
+        try:
+            with open(filename.toOsSpecific(), "rb") as f:
+                return zlib.decompress(f.read()), None
+        except (OSError, zlib.error) as e:
+            return None, f"Could not decompress the file ({e})"
+
+    def iter_contents(self, filenames: list[Filename]) -> Iterator[tuple[Filename, bytes | None, str | None]]:
+        """
+        Decompresses .pz files in a background thread, a few files ahead of the caller.
+
+        :return: Generator of (Filename, decompressed contents, why it could not be decompressed).
+            The contents are None for files that aren't compressed, those are best read with EggData.read.
+        """
+        filenames = iter(filenames)
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            def queue_next():
+                for filename in filenames:
+                    future = None
+                    if is_compressed(filename.getFullpath()):
+                        future = executor.submit(self._decompress, filename)
+                    pending.append((filename, future))
+                    return
+
+            for _ in range(max(self.prefetch, 1)):
+                queue_next()
+            while pending:
+                filename, future = pending.popleft()
+                queue_next()
+                yield (filename, *future.result()) if future else (filename, None, None)
+
+    @staticmethod
+    def _recompress_file(filepath: str, compression_level: int, dryrun: bool) -> tuple[int, int, bool]:
+        """
+        :return: Size of the file before & after, and whether its bytes changed.
+        """
+        with open(filepath, "rb") as f:
+            old_data = f.read()
+        new_data = zlib.compress(zlib.decompress(old_data), compression_level)
+        changed = new_data != old_data
+        if changed and not dryrun:
+            replace_file(filepath, new_data)
+        return len(old_data), len(new_data), changed
+
+    def recompress(self, filepaths: list[str], compression_level: int = None, dryrun: bool = False) -> PzipReport:
+        """
+        Recompresses .pz files on a thread pool. Files are only rewritten if their compressed bytes change.
+
+        :param int compression_level: zlib level (0-9), defaults to the one given to EggPzipIO.
+        :param bool dryrun: Only fill in the report.
+        """
+        if compression_level is None:
+            compression_level = self.compression_level
+        filepaths = [filepath for filepath in filepaths if is_compressed(filepath)]
+        report = PzipReport()
+
+        def recompress_file(filepath):
+            try:
+                return self._recompress_file(filepath, compression_level, dryrun), None
+            except (OSError, zlib.error) as e:
+                return None, str(e)
+
+        if self.workers > 1 and len(filepaths) > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                results = list(executor.map(recompress_file, filepaths))
+        else:
+            results = [recompress_file(filepath) for filepath in filepaths]
+
+        for filepath, (result, error) in zip(filepaths, results):
+            if error:
+                logging.error(f"Failed to recompress {filepath} ({error})")
+                report.failed_files[filepath] = error
+                continue
+            old_size, new_size, changed = result
+            if changed:
+                report.recompressed_files.append((filepath, old_size, new_size))
+            else:
+                report.unchanged_files.append(filepath)
+        return report
+
+    def recompress_tree(self, root: str, compression_level: int = None, dryrun: bool = False) -> PzipReport:
+        """
+        Recompresses every .pz egg under the root directory, see recompress.
+        """
+        return self.recompress(crawl_eggs(root, workers=self.workers), compression_level, dryrun)
@@ -0,0 +1,152 @@
+"""
+Persistent cache of what EggMan learns about an egg when it registers it.
+
+Entries are keyed by the egg's path and validated against its size & mtime, plus its content hash when the bytes
+were at hand while scanning, so read-only queries on unchanged eggs can be answered without reading them again.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass, field, asdict
+
+from panda3d.core import Filename
+
+# Bump this whenever EggScanRecord changes shape, old caches will be thrown away.
+CACHE_VERSION = 1
+
+
+@dataclass
+class EggScanRecord:
+    """
+    Serializable summary of an egg's registration scan.
+    """
+
+    # { tref name : texture filename }
+    textures: dict = field(default_factory=dict)
+    uv_names: list = field(default_factory=list)
+    materials: list = field(default_factory=list)
+    ext_file_refs: list = field(default_factory=list)
+    object_types: list = field(default_factory=list)
+
+    @classmethod
+    def from_context(cls, ctx) -> EggScanRecord:
+        """
+        :param EggContext ctx: A context that has been filled by EggMan's registration scan.
+        """
+        return cls(
+            textures={egg_texture.getName(): egg_texture.getFilename().getFullpath()
+                      for egg_texture in ctx.egg_textures},
+            uv_names=sorted({attribute.uv_name for attribute in ctx.egg_attributes if hasattr(attribute, "uv_name")}),
+            materials=sorted(material.getName() for material in ctx.egg_materials),
+            ext_file_refs=sorted(ext_ref.getFilename().getFullpath() for ext_ref in ctx.egg_ext_file_refs),
+            object_types=sorted(ctx.egg_object_types),
+        )
+
+    def get_texture_filepaths(self) -> list[Filename]:
+        return [Filename(texture_path) for texture_path in self.textures.values()]
+
+
+def hash_file(filepath: str, chunk_size: int = 1 << 20) -> str:
+    hasher = hashlib.sha1()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class EggScanCache:
+    def __init__(self, cache_path: str):
+        """
+        On-disk cache of EggScanRecords.
+
+        An entry is trusted as long as the egg's size & mtime are unchanged. If only the mtime changed,
+        the content hash decides whether the entry is still good, entries stored without one are dropped.
+        Stale entries are dropped automatically.
+
+        :param str cache_path: JSON file to load from & save to. Created on the first save if missing.
+        """
+        self.cache_path = cache_path
+        self._entries = dict()  # { os-specific abspath : { size, mtime, hash, record } }
+        self._dirty = False
+        self.load()
+
+    @staticmethod
+    def _key(filename: Filename | str) -> str:
+        if isinstance(filename, Filename):
+            filename = filename.toOsSpecific()
+        return os.path.abspath(filename)
+
+    def load(self) -> None:
+        self._entries = dict()
+        if not os.path.isfile(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, "r") as cache_file:
+                contents = json.load(cache_file)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable scan cache {self.cache_path} ({e})")
+            return
+        if contents.get("version") != CACHE_VERSION:
+            logging.info(f"Scan cache {self.cache_path} is from another version, starting over")
+            return
+        self._entries = contents.get("entries", dict())
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        temp_path = f"{self.cache_path}.tmp"
+        with open(temp_path, "w") as cache_file:
+            json.dump({"version": CACHE_VERSION, "entries": self._entries}, cache_file)
+        os.replace(temp_path, self.cache_path)
+        self._dirty = False
+
+    def get(self, filename: Filename | str) -> EggScanRecord | None:
+        """
+        :return: The cached record for the egg, or None if there is no valid entry for it.
+        """
+        key = self._key(filename)
+        entry = self._entries.get(key)
+        if not entry:
+            return None
+        try:
+            stat = os.stat(key)
+        except OSError:
+            self.invalidate(filename)
+            return None
+        if stat.st_size != entry["size"]:
+            self.invalidate(filename)
+            return None
+        if stat.st_mtime != entry["mtime"]:
+            # Touched, but it might not have actually changed.
+            if not entry["hash"] or hash_file(key) != entry["hash"]:
+                self.invalidate(filename)
+                return None
+            entry["mtime"] = stat.st_mtime
+            self._dirty = True
+        return EggScanRecord(**entry["record"])
+
+    def put(self, filename: Filename | str, record: EggScanRecord, file_hash: str = None) -> None:
+        """
+        :param str file_hash: sha1 of the file's bytes, if the caller already went through them.
+            The file is never read here just to hash it.
+        """
+        key = self._key(filename)
+        try:
+            stat = os.stat(key)
+        except OSError as e:
+            logging.warning(f"Not caching scan of {key} ({e})")
+            return
+        self._entries[key] = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "hash": file_hash,
+            "record": asdict(record),
+        }
+        self._dirty = True
+
+    def invalidate(self, filename: Filename | str) -> None:
+        if self._entries.pop(self._key(filename), None) is not None:
+            self._dirty = True
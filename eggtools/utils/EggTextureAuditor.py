@@ -0,0 +1,153 @@
+"""
+Read-only audit of the texture paths used by the eggs registered with an EggMan.
+"""
+from __future__ import annotations
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from panda3d.core import Filename
+
+
+@dataclass
+class EggTextureAudit:
+    """
+    Texture paths of one egg that need attention, as written in the egg.
+    """
+    egg_filename: Filename
+    missing: list = field(default_factory=list)
+    absolute: list = field(default_factory=list)
+    # Absolute paths on another drive than the egg, these can't be made relative
+    cross_drive: list = field(default_factory=list)
+    # [(texture path, path of the file on disk)] for files that only exist with different casing
+    case_mismatch: list = field(default_factory=list)
+
+    @property
+    def has_issues(self) -> bool:
+        return bool(self.missing or self.absolute or self.cross_drive or self.case_mismatch)
+
+
+@dataclass
+class TextureAuditReport:
+    # { egg filepath : EggTextureAudit }, only eggs with issues
+    eggs: dict = field(default_factory=dict)
+    checked_eggs: int = field(default_factory=lambda: 0)
+    checked_files: int = field(default_factory=lambda: 0)
+
+    def format(self) -> str:
+        lines = list()
+        for egg_path, audit in self.eggs.items():
+            lines.append(egg_path)
+            for texture_path in audit.missing:
+                lines.append(f"  missing: {texture_path}")
+            for texture_path in audit.absolute:
+                lines.append(f"  absolute: {texture_path}")
+            for texture_path in audit.cross_drive:
+                lines.append(f"  cross-drive: {texture_path}")
+            for texture_path, disk_path in audit.case_mismatch:
+                lines.append(f"  case mismatch: {texture_path} (on disk: {disk_path})")
+        lines.append(
+            f"{len(self.eggs)} of {self.checked_eggs} eggs have texture issues, "
+            f"{self.checked_files} texture files checked."
+        )
+        return "\n".join(lines)
+
+
+class EggTextureAuditor:
+    def __init__(self, workers: int = 8):
+        """
+        Checks that the textures of every registered egg exist, without modifying or loading any egg.
+
+        Texture paths are gathered from the EggMan texture index, so lazily registered eggs are only prescanned.
+        Every distinct file is looked up once on a thread pool. Lookups go through cached directory listings,
+        which is what lets casing mistakes show up even on case-insensitive filesystems.
+
+        :param int workers: Number of files looked up at once.
+        """
+        self.workers = workers
+        self._dir_listings = dict()  # { directory : { name : None } | None }
+
+    def _list_dir(self, directory: str) -> dict | None:
+        if directory not in self._dir_listings:
+            try:
+                with os.scandir(directory) as entries:
+                    self._dir_listings[directory] = {entry.name: None for entry in entries}
+            except OSError:
+                self._dir_listings[directory] = None
+        return self._dir_listings[directory]
+
+    def find_on_disk(self, filepath: str, base_dir: str = None) -> str | None:
+        """
+        :param str filepath: Absolute, normalized file path.
+        :param str base_dir: Directory the path was given relative to (the egg's directory). The part of the path
+            it shares with this directory is taken as spelled, only what comes below it is matched.
+        :return: The path of the file as it is spelled on disk, matched case-insensitively, or None if there's
+            no such file.
+        """
+        drive, rest = os.path.splitdrive(filepath)
+        current = drive + os.sep
+        if base_dir:
+            try:
+                common_dir = os.path.commonpath([filepath, base_dir])
+            except ValueError:
+                # On another drive
+                common_dir = None
+            if common_dir and os.path.isdir(common_dir):
+                current = common_dir
+                rest = os.path.relpath(filepath, common_dir)
+        for part in rest.split(os.sep):
+            if not part:
+                continue
+            names = self._list_dir(current)
+            if names is None:
+                return None
+            if part not in names:
+                matches = [name for name in names if name.lower() == part.lower()]
+                if not matches:
+                    return None
+                part = matches[0]
+            current = os.path.join(current, part)
+        return current if os.path.isfile(current) else None
+
+    def audit(self, eggman) -> TextureAuditReport:
+        """
+        :param EggMan eggman: Eggs to audit.
+        """
+        report = TextureAuditReport()
+        texture_index = eggman.get_texture_index()
+        egg_refs = list()  # [(EggContext, texture path, absolute texture path)]
+        for egg_data, ctx in eggman.egg_datas.items():
+            report.checked_eggs += 1
+            for ref in texture_index.get_egg_textures(egg_data):
+                egg_refs.append((ctx, ref.filepath, eggman.get_texture_abspath(ctx, ref.filepath)))
+
+        report.checked_files = len({abspath for _, _, abspath in egg_refs})
+        # The same file may be spelled differently relative to eggs in different directories
+        lookups = sorted({
+            (abspath, os.path.dirname(os.path.abspath(ctx.filename.toOsSpecific()))) for ctx, _, abspath in egg_refs
+        })
+        self._dir_listings = dict()
+        if self.workers > 1 and len(lookups) > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                disk_paths = dict(zip(lookups, executor.map(lambda lookup: self.find_on_disk(*lookup), lookups)))
+        else:
+            disk_paths = {lookup: self.find_on_disk(*lookup) for lookup in lookups}
+
+        for ctx, texture_path, abspath in egg_refs:
+            egg_path = ctx.filename.toOsSpecific()
+            audit = report.eggs.get(egg_path) or EggTextureAudit(ctx.filename)
+            disk_path = disk_paths[(abspath, os.path.dirname(os.path.abspath(egg_path)))]
+            if disk_path is None:
+                audit.missing.append(texture_path)
+            elif disk_path != abspath:
+                audit.case_mismatch.append((texture_path, disk_path))
+            if os.path.isabs(Filename(texture_path).toOsSpecific()):
+                egg_drive = os.path.splitdrive(os.path.abspath(egg_path))[0]
+                if os.path.normcase(os.path.splitdrive(abspath)[0]) != os.path.normcase(egg_drive):
+                    audit.cross_drive.append(texture_path)
+                else:
+                    audit.absolute.append(texture_path)
+            if audit.has_issues:
+                report.eggs[egg_path] = audit
+        return report
@@ -0,0 +1,152 @@
+"""
+Finds byte-identical texture files and points every egg at a single copy of each.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from eggtools.utils.EggScanCache import hash_file
+
+# Bytes hashed from the start of each file before committing to a full hash
+PREFIX_SIZE = 1 << 16
+
+
+def hash_file_prefix(filepath: str, prefix_size: int = PREFIX_SIZE) -> str:
+    with open(filepath, "rb") as f:
+        return hashlib.sha1(f.read(prefix_size)).hexdigest()
+
+
+@dataclass
+class TextureDedupeReport:
+    # [[canonical path, duplicate paths...]]
+    duplicate_groups: list = field(default_factory=list)
+    # Bytes taken up by the duplicates on disk
+    duplicate_bytes: int = field(default_factory=lambda: 0)
+    # Eggs that had texture paths rewritten
+    rewritten_eggs: list = field(default_factory=list)
+    repathed_textures: int = field(default_factory=lambda: 0)
+    hardlinked_files: int = field(default_factory=lambda: 0)
+
+
+class EggTextureDeduplicator:
+    def __init__(self, workers: int = 4):
+        """
+        Finds identical textures by content.
+
+        Files are first bucketed by size, then by a hash of their first bytes, and only files that still collide
+        are hashed completely. Hashing runs on a thread pool, hashlib releases the GIL while it works.
+
+        :param int workers: Number of files hashed at once.
+        """
+        self.workers = workers
+
+    def _map(self, func, items: list) -> list:
+        if self.workers > 1 and len(items) > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                return list(executor.map(func, items))
+        return [func(item) for item in items]
+
+    def _split_by(self, func, groups: list) -> list:
+        """
+        Splits every group of files by the result of func, dropping files that end up alone (or can't be read).
+        """
+        filepaths = [filepath for group in groups for filepath in group]
+
+        def safe_func(filepath):
+            try:
+                return func(filepath)
+            except OSError as e:
+                logging.warning(f"Skipping {filepath} ({e})")
+                return None
+
+        results = dict(zip(filepaths, self._map(safe_func, filepaths)))
+        split_groups = list()
+        for group in groups:
+            buckets = dict()
+            for filepath in group:
+                if results[filepath] is not None:
+                    buckets.setdefault(results[filepath], list()).append(filepath)
+            split_groups += [bucket for bucket in buckets.values() if len(bucket) > 1]
+        return split_groups
+
+    def find_duplicates(self, filepaths: list[str]) -> list[list[str]]:
+        """
+        :return: [[canonical path, duplicate paths...]] for every set of identical files.
+            The canonical copy is the first of the group in sorted order.
+        """
+        unique_paths = sorted({os.path.abspath(filepath) for filepath in filepaths})
+        # Size first, it comes for free with the stat
+        size_buckets = dict()
+        for filepath in unique_paths:
+            try:
+                size_buckets.setdefault(os.path.getsize(filepath), list()).append(filepath)
+            except OSError:
+                continue
+        groups = [group for group in size_buckets.values() if len(group) > 1]
+        groups = self._split_by(hash_file_prefix, groups)
+        groups = self._split_by(hash_file, groups)
+        return sorted(sorted(group) for group in groups)
+
+    @staticmethod
+    def hardlink(canonical_path: str, duplicate_path: str) -> bool:
+        """
+        Replaces a duplicate file with a hardlink to the canonical one.
+        """
+        if os.path.samefile(canonical_path, duplicate_path):
+            return False
+        temp_path = f"{duplicate_path}.dedupe_tmp"
+        try:
+            os.link(canonical_path, temp_path)
+            os.replace(temp_path, duplicate_path)
+        except OSError as e:
+            logging.warning(f"Could not hardlink {duplicate_path} to {canonical_path} ({e})")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return False
+        return True
+
+    def dedupe_eggs(self, eggman, extra_files: list[str] = None, hardlink: bool = False) -> TextureDedupeReport:
+        """
+        Points the textures of every egg registered with the EggMan at one canonical copy of each duplicate file.
+
+        Eggs are repathed through EggMan and marked dirty, writing them is up to the caller.
+
+        :param EggMan eggman: Eggs to dedupe the textures of.
+        :param list extra_files: Other image files to consider, for instance every texture in the asset tree.
+        :param bool hardlink: Also replace the duplicate files with hardlinks to the canonical copy.
+        """
+        texture_index = eggman.get_texture_index()
+        egg_textures = dict()  # { EggData : [absolute texture path] }
+        for egg_data, ctx in eggman.egg_datas.items():
+            egg_textures[egg_data] = {
+                eggman.get_texture_abspath(ctx, ref.filepath) for ref in texture_index.get_egg_textures(egg_data)
+            }
+        filepaths = [filepath for filepaths in egg_textures.values() for filepath in filepaths]
+        filepaths += extra_files or list()
+
+        report = TextureDedupeReport()
+        path_mapping = dict()  # { duplicate path : canonical path }
+        for group in self.find_duplicates(filepaths):
+            report.duplicate_groups.append(group)
+            canonical_path = group[0]
+            for duplicate_path in group[1:]:
+                path_mapping[duplicate_path] = canonical_path
+                report.duplicate_bytes += os.path.getsize(duplicate_path)
+
+        for egg_data, texture_paths in egg_textures.items():
+            if texture_paths.isdisjoint(path_mapping):
+                continue
+            repathed = eggman.repath_texture_files(egg_data, path_mapping)
+            if repathed:
+                report.rewritten_eggs.append(egg_data)
+                report.repathed_textures += repathed
+
+        if hardlink:
+            for duplicate_path, canonical_path in path_mapping.items():
+                if self.hardlink(canonical_path, duplicate_path):
+                    report.hardlinked_files += 1
+        return report
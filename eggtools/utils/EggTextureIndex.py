@@ -0,0 +1,102 @@
+"""
+Inverted index of the textures used by every egg registered with an EggMan.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from panda3d.core import Filename
+from panda3d.egg import EggData, EggTexture
+
+
+@dataclass
+class EggTextureRef:
+    """
+    A single <Texture> entry of an egg.
+    """
+    egg_data: EggData
+    # None for eggs that have only been prescanned, they have no EggTextures until they are loaded.
+    egg_texture: EggTexture | None
+    tref: str
+    # Texture path as written in the egg
+    filepath: str
+
+    @property
+    def basename(self) -> str:
+        return Filename(self.filepath).getBasename()
+
+    @property
+    def basename_wo_extension(self) -> str:
+        return Filename(self.filepath).getBasenameWoExtension()
+
+
+class EggTextureIndex:
+    def __init__(self):
+        """
+        Looks up which eggs use a texture by its path or basename, without going through every egg.
+
+        Eggs are indexed & reindexed as a whole, whenever their textures change.
+        """
+        self.egg_refs = dict()  # { EggData : [EggTextureRef] }
+        self.refs_by_path = dict()  # { str : { EggData : [EggTextureRef] } }
+        self.refs_by_basename = dict()  # { str : { EggData : [EggTextureRef] } }
+        self.refs_by_basename_wo_ext = dict()  # { str : { EggData : [EggTextureRef] } }
+
+    def __contains__(self, egg_data: EggData) -> bool:
+        return egg_data in self.egg_refs
+
+    def _lookups(self, ref: EggTextureRef):
+        yield self.refs_by_path, ref.filepath
+        yield self.refs_by_basename, ref.basename
+        yield self.refs_by_basename_wo_ext, ref.basename_wo_extension
+
+    def set_egg(self, egg_data: EggData, refs: list[EggTextureRef]) -> None:
+        """
+        (Re)indexes all of the textures of an egg.
+        """
+        self.remove_egg(egg_data)
+        self.egg_refs[egg_data] = refs
+        for ref in refs:
+            for lookup, key in self._lookups(ref):
+                lookup.setdefault(key, dict()).setdefault(egg_data, list()).append(ref)
+
+    def remove_egg(self, egg_data: EggData) -> None:
+        for ref in self.egg_refs.pop(egg_data, list()):
+            for lookup, key in self._lookups(ref):
+                eggs = lookup.get(key)
+                if not eggs:
+                    continue
+                eggs.pop(egg_data, None)
+                if not eggs:
+                    del lookup[key]
+
+    def get_egg_textures(self, egg_data: EggData) -> list[EggTextureRef]:
+        return list(self.egg_refs.get(egg_data, list()))
+
+    @staticmethod
+    def _flatten(eggs: dict | None) -> list[EggTextureRef]:
+        if not eggs:
+            return list()
+        return [ref for refs in eggs.values() for ref in refs]
+
+    def find_by_path(self, filepath: Filename | str) -> list[EggTextureRef]:
+        if isinstance(filepath, Filename):
+            filepath = filepath.getFullpath()
+        return self._flatten(self.refs_by_path.get(filepath))
+
+    def find_by_basename(self, basename: str, include_extension: bool = True) -> list[EggTextureRef]:
+        if include_extension:
+            return self._flatten(self.refs_by_basename.get(basename))
+        return self._flatten(self.refs_by_basename_wo_ext.get(basename))
+
+    def find_in_egg(self, egg_data: EggData, basename: str, include_extension: bool = True) -> list[EggTextureRef]:
+        lookup = self.refs_by_basename if include_extension else self.refs_by_basename_wo_ext
+        return list(lookup.get(basename, dict()).get(egg_data, list()))
+
+    def get_eggs_using(self, basename: str, include_extension: bool = True) -> list[EggData]:
+        lookup = self.refs_by_basename if include_extension else self.refs_by_basename_wo_ext
+        return list(lookup.get(basename, dict()))
+
+    def get_basenames(self, include_extension: bool = True) -> list[str]:
+        lookup = self.refs_by_basename if include_extension else self.refs_by_basename_wo_ext
+        return list(lookup)
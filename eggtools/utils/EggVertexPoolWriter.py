@@ -0,0 +1,451 @@
+"""
+Writes vertex pools with a fixed number of decimals per vertex channel, instead of Panda's 6 significant digits.
+
+Vertices are written straight from their position, normal, color & UVs. Panda doesn't tell Python which UV sets
+or morphs a vertex has, so each vertex is compared against a copy made of just those. Vertices that don't match
+(morphs or UV sets that weren't seen yet) or have aux data are written by Panda instead, with the numbers of the
+channels listed in VertexPrecisionConfig filled back in from the vertex itself.
+Python can't list the vertices of a joint either, they are read from each joint's <VertexRef>s once per egg.
+
+The numbers are formatted a batch of vertices at a time, each channel with a single string formatting operation.
+See tests/bench_vertex_pool_writer.py for how this compares to having Panda write every vertex.
+"""
+from __future__ import annotations
+
+from typing import Iterator
+
+from panda3d.core import StringStream
+from panda3d.egg import EggGroup, EggGroupNode, EggTexture, EggVertex, EggVertexPool, EggVertexUV
+
+from eggtools.EggManConfig import VertexPrecisionConfig
+
+# Vertices formatted (and yielded) together
+BATCH_SIZE = 4096
+
+# Position getters for each number of dimensions, the position keeps its number of dimensions when set again
+_GET_POSITION = {
+    1: lambda egg_vertex: (egg_vertex.getPos1(),),
+    2: EggVertex.getPos2,
+    3: EggVertex.getPos3,
+    4: EggVertex.getPos4,
+}
+
+
+def format_groups(values: list, counts: list, places: int) -> list:
+    """
+    Formats the values with the given number of decimals, leaving out trailing zeros like Panda does.
+
+    :param list counts: Number of values in each group, the values of a group are joined by spaces.
+    :return: One string per group.
+    """
+    if not counts:
+        return list()
+    number_format = f"%.{places}f "
+    group_formats = {count: number_format * count for count in set(counts)}
+    # Every number is followed by a space, the groups are separated by newlines
+    text = "\n".join(map(group_formats.__getitem__, counts)) % tuple(values)
+    if places > 0:
+        # Whole numbers are marked first, so that stripping zeros never reaches into them
+        text = text.replace("." + "0" * places + " ", "\0 ")
+        for zeros in range(places - 1, 0, -1):
+            text = text.replace("0" * zeros + " ", " ")
+        text = text.replace("\0", "")
+    text = text.replace("-0 ", "0 ")
+    return text[:-1].split(" \n")
+
+
+def format_values(values: list, places: int) -> list:
+    """
+    Formats the values with the given number of decimals, leaving out trailing zeros like Panda does.
+    """
+    return format_groups(values, [1] * len(values), places)
+
+
+class _VertexLayout:
+    """
+    The text of every vertex with the same channels, minus its index.
+    """
+
+    def __init__(self):
+        self.template = ""
+        # Channel of each %s in the template
+        self.channels = tuple()
+
+    def add_text(self, text: str) -> None:
+        self.template += text.replace("%", "%%")
+
+    def add_values(self, channel: str, line_start: str, line_end: str) -> None:
+        self.template += f"{line_start}%s{line_end}"
+        self.channels += (channel,)
+
+
+class _VertexBatch:
+    """
+    The text of a batch of vertices, with a %s wherever a group of values still has to be formatted.
+    """
+
+    def __init__(self, channels: tuple):
+        self.template = list()
+        # Channel of each %s in the template
+        self.order = list()
+        self.values = {channel: list() for channel in channels}
+        self.counts = {channel: list() for channel in channels}
+
+    def add_text(self, text: str) -> None:
+        self.template.append(text.replace("%", "%%"))
+
+    def add_values(self, channel: str, values, line_start: str, line_end: str) -> None:
+        self.template.append(f"{line_start}%s{line_end}")
+        self.order.append(channel)
+        self.values[channel].extend(values)
+        self.counts[channel].append(len(values))
+
+    def add_layout(self, text: str, layout: _VertexLayout, values: list) -> None:
+        """
+        :param str text: Escaped text written right before the layout.
+        :param list values: The groups of values of the layout, in order.
+        """
+        self.template.append(text + layout.template)
+        self.order.extend(layout.channels)
+        for channel, group in zip(layout.channels, values):
+            self.values[channel].extend(group)
+            self.counts[channel].append(len(group))
+
+    def format(self, precision: VertexPrecisionConfig) -> str:
+        groups = {
+            channel: iter(format_groups(values, self.counts[channel], getattr(precision, channel)))
+            for channel, values in self.values.items() if values
+        }
+        return "".join(self.template) % tuple(map(next, map(groups.__getitem__, self.order)))
+
+
+class EggVertexPoolWriter:
+    # Channel names, each has its own precision
+    POSITION = "POSITION"
+    NORMAL = "NORMAL"
+    UV = "UV"
+    COLOR = "COLOR"
+
+    def __init__(self, precision: VertexPrecisionConfig = None):
+        """
+        :param VertexPrecisionConfig precision: Decimals per channel, defaults to VertexPrecisionConfig().
+        """
+        self.precision = precision or VertexPrecisionConfig()
+        # UV sets looked for on every vertex, sorted like Panda writes them.
+        # The UV sets of the egg's textures are added per egg, the others once Panda has written them.
+        self.uv_names = [""]
+        # { vertex index : [EggGroup] } of every group with a <VertexRef> to a vertex of that index, in any pool
+        self._ref_groups = dict()
+        self._root_pointer = None
+        # Compared against each vertex, see _write_vertex
+        self._probe = EggVertex()
+        self._probe_uvs = dict()
+        # { (indent level, channels) : _VertexLayout }
+        self._layouts = dict()
+
+    @staticmethod
+    def _node_text(node, indent_level: int) -> str:
+        stream = StringStream()
+        node.write(stream, indent_level)
+        return stream.getData().decode("utf-8")
+
+    @staticmethod
+    def _uv_values(egg_vertex: EggVertex, uv_name: str, tag: str):
+        egg_uv = egg_vertex.getUvObj(uv_name)
+        if egg_uv is None:
+            return None
+        if tag == "<UV>":
+            return egg_uv.getUvw() if egg_uv.hasW() else egg_uv.getUv()
+        if tag == "<Tangent>":
+            if egg_uv.hasTangent4():
+                return egg_uv.getTangent4()
+            return egg_uv.getTangent() if egg_uv.hasTangent() else None
+        return egg_uv.getBinormal() if egg_uv.hasBinormal() else None
+
+    def _add_uv_name(self, uv_name: str) -> None:
+        if uv_name not in self.uv_names:
+            self.uv_names = sorted(self.uv_names + [uv_name])
+
+    def _add_vertex_refs(self, egg_group: EggGroup) -> None:
+        """
+        Reads the vertex indices out of the group's <VertexRef>s, Panda has no other way of listing them.
+        """
+        # Only the group itself is written, its children are put back right after
+        children = EggGroupNode()
+        children.stealChildren(egg_group)
+        try:
+            text = self._node_text(egg_group, 0)
+        finally:
+            egg_group.stealChildren(children)
+        if "<VertexRef>" not in text:
+            return
+        in_vertex_ref = False
+        for line in text.splitlines():
+            stripped = line.strip()
+            if stripped.startswith("<VertexRef>"):
+                in_vertex_ref = True
+            elif stripped.startswith("<"):
+                # <Scalar> membership & <Ref> { pool } come after the indices
+                in_vertex_ref = False
+            elif in_vertex_ref:
+                for index in stripped.split():
+                    self._ref_groups.setdefault(int(index), list()).append(egg_group)
+
+    def _scan_egg(self, egg_vertex_pool: EggVertexPool) -> None:
+        """
+        Looks up the UV sets of the textures and the vertices referenced by groups, once for each egg.
+        """
+        root = egg_vertex_pool
+        while root.getParent() is not None:
+            root = root.getParent()
+        if root.this == self._root_pointer:
+            return
+        self._root_pointer = root.this
+        self._ref_groups = dict()
+        nodes = [root]
+        while nodes:
+            node = nodes.pop()
+            if isinstance(node, EggTexture) and node.hasUvName():
+                self._add_uv_name(node.getUvName())
+            elif isinstance(node, EggGroup):
+                self._add_vertex_refs(node)
+            if isinstance(node, EggGroupNode):
+                nodes.extend(node.getChildren())
+
+    def _get_probe_uv(self, uv_name: str) -> EggVertexUV:
+        probe_uv = self._probe_uvs.get(uv_name)
+        if probe_uv is None:
+            probe_uv = self._probe_uvs[uv_name] = EggVertexUV(uv_name, (0, 0))
+        return probe_uv
+
+    def _get_layout(self, indent_level: int, key: tuple) -> _VertexLayout:
+        """
+        :param tuple key: (((uv name, tangent?, binormal?), ...), normal?, color?)
+        """
+        layout = self._layouts.get((indent_level, key))
+        if layout is not None:
+            return layout
+        uv_keys, has_normal, has_color = key
+        layout = self._layouts[(indent_level, key)] = _VertexLayout()
+        indent = " " * indent_level
+        inner_indent = indent + "  "
+        layout.add_text(" {\n")
+        layout.add_values(self.POSITION, inner_indent, "\n")
+        for uv_name, has_tangent, has_binormal in uv_keys:
+            uv_tag = f"{inner_indent}<UV> {uv_name} {{" if uv_name else f"{inner_indent}<UV> {{"
+            if not has_tangent and not has_binormal:
+                layout.add_text(uv_tag)
+                layout.add_values(self.UV, " ", " }\n")
+                continue
+            layout.add_text(uv_tag + "\n")
+            layout.add_values(self.UV, inner_indent + "  ", "\n")
+            if has_tangent:
+                layout.add_values(self.NORMAL, f"{inner_indent}  <Tangent> {{ ", " }\n")
+            if has_binormal:
+                layout.add_values(self.NORMAL, f"{inner_indent}  <Binormal> {{ ", " }\n")
+            layout.add_text(f"{inner_indent}}}\n")
+        if has_normal:
+            layout.add_values(self.NORMAL, f"{inner_indent}<Normal> {{ ", " }\n")
+        if has_color:
+            layout.add_values(self.COLOR, f"{inner_indent}<RGBA> {{ ", " }\n")
+        return layout
+
+    @staticmethod
+    def _membership_comment(egg_vertex: EggVertex, egg_groups: list, indent: str) -> str | None:
+        """
+        :return: The comment Panda writes under a vertex that belongs to groups (an empty string if it doesn't),
+            or None if two of its groups share a name. Panda only lists one of those and Python can't tell which.
+        """
+        egg_groups = [egg_group for egg_group in egg_groups if egg_vertex.hasGref(egg_group)]
+        if not egg_groups:
+            return ""
+        # Panda keeps a vertex's groups ordered by name
+        egg_groups.sort(key=EggGroup.getName)
+        names = [egg_group.getName() for egg_group in egg_groups]
+        if len(set(names)) != len(names):
+            return None
+        memberships = " ".join(
+            f"{name}:{egg_group.getVertexMembership(egg_vertex):g}" for name, egg_group in zip(names, egg_groups)
+        )
+        return f"{indent}  // {memberships}\n"
+
+    def _write_vertex(self, egg_vertex: EggVertex, indent_level: int, batch: _VertexBatch) -> bool:
+        """
+        Adds the vertex to the batch without Panda writing it first.
+
+        :return: False if the vertex has more than a position, normal, color & known UV sets, nothing is added then.
+        """
+        if egg_vertex.hasAux():
+            return False
+        probe = self._probe
+        position = _GET_POSITION[egg_vertex.getNumDimensions()](egg_vertex)
+        probe.setExternalIndex(egg_vertex.getExternalIndex())
+        probe.setPos(position[0] if len(position) == 1 else position)
+        probe.clearUv()
+        values = [position]
+        uv_keys = list()
+        for uv_name in self.uv_names:
+            egg_uv = egg_vertex.getUvObj(uv_name)
+            if egg_uv is None:
+                continue
+            # Not a copy of egg_uv, that would bring its morphs along
+            probe_uv = self._get_probe_uv(uv_name)
+            if egg_uv.hasW():
+                uv = egg_uv.getUvw()
+                probe_uv.setUvw(uv)
+            else:
+                uv = egg_uv.getUv()
+                probe_uv.setUv(uv)
+            values.append(uv)
+            has_tangent = True
+            if egg_uv.hasTangent4():
+                tangent = egg_uv.getTangent4()
+                probe_uv.setTangent4(tangent)
+                values.append(tangent)
+            elif egg_uv.hasTangent():
+                tangent = egg_uv.getTangent()
+                probe_uv.setTangent(tangent)
+                values.append(tangent)
+            else:
+                # clearTangent() alone would leave the flag of a 4-component tangent behind
+                probe_uv.setTangent((0, 0, 0))
+                probe_uv.clearTangent()
+                has_tangent = False
+            has_binormal = egg_uv.hasBinormal()
+            if has_binormal:
+                binormal = egg_uv.getBinormal()
+                probe_uv.setBinormal(binormal)
+                values.append(binormal)
+            else:
+                probe_uv.clearBinormal()
+            probe.setUvObj(probe_uv)
+            uv_keys.append((uv_name, has_tangent, has_binormal))
+        has_normal = egg_vertex.hasNormal()
+        if has_normal:
+            normal = egg_vertex.getNormal()
+            probe.setNormal(normal)
+            values.append(normal)
+        else:
+            probe.clearNormal()
+        has_color = egg_vertex.hasColor()
+        if has_color:
+            color = egg_vertex.getColor()
+            probe.setColor(color)
+            values.append(color)
+        else:
+            probe.clearColor()
+        # Anything the probe is missing (morphs, other UV sets) makes them differ, group memberships don't count
+        if egg_vertex.compareTo(probe) != 0:
+            return False
+
+        indent = " " * indent_level
+        index = egg_vertex.getIndex()
+        egg_groups = self._ref_groups.get(index)
+        comment = self._membership_comment(egg_vertex, egg_groups, indent) if egg_groups else ""
+        if comment is None:
+            return False
+        layout = self._get_layout(indent_level, (tuple(uv_keys), has_normal, has_color))
+        batch.add_layout(f"{indent}<Vertex> {index}", layout, values)
+        batch.add_text(f"{comment}{indent}}}\n")
+        return True
+
+    def _parse_vertex(self, egg_vertex: EggVertex, indent_level: int, batch: _VertexBatch) -> None:
+        """
+        Adds the text Panda writes for the vertex to the batch, with the numbers of the known channels left out.
+        """
+        text = self._node_text(egg_vertex, indent_level)
+        # (tag, name) of the blocks the current line is in
+        blocks = list()
+
+        for line in text.splitlines(keepends=True):
+            stripped = line.strip()
+            indent = line[:len(line) - len(line.lstrip())]
+            values = channel = None
+            if stripped.startswith("<Vertex>"):
+                blocks.append(("<Vertex>", ""))
+                batch.add_text(line)
+                continue
+            if stripped == "}":
+                blocks.pop()
+                batch.add_text(line)
+                continue
+            if stripped.startswith("//"):
+                # Comments, like the joints a vertex belongs to
+                batch.add_text(line)
+                continue
+
+            if not stripped.startswith("<"):
+                # A bare row of numbers, belonging to the block it's in
+                tag, name = blocks[-1]
+                if tag == "<Vertex>":
+                    channel = self.POSITION
+                    values = list(egg_vertex.getPos4())[:egg_vertex.getNumDimensions()]
+                elif tag == "<UV>":
+                    channel = self.UV
+                    values = self._uv_values(egg_vertex, name, tag)
+                elif tag == "<Normal>" and egg_vertex.hasNormal():
+                    channel, values = self.NORMAL, egg_vertex.getNormal()
+                elif tag == "<RGBA>" and egg_vertex.hasColor():
+                    channel, values = self.COLOR, egg_vertex.getColor()
+                if values is not None and len(values) == len(stripped.split()):
+                    batch.add_values(channel, values, indent, "\n")
+                else:
+                    batch.add_text(line)
+                continue
+
+            tag, _, rest = stripped.partition(" ")
+            name = rest[:rest.index("{")].strip() if "{" in rest else ""
+            if tag == "<UV>":
+                # Later vertices with this UV set can be written without Panda
+                self._add_uv_name(name)
+            if stripped.endswith("{"):
+                # Opens a block, its numbers are on the next line
+                blocks.append((tag, name))
+                batch.add_text(line)
+                continue
+
+            if tag == "<UV>":
+                channel = self.UV
+                values = self._uv_values(egg_vertex, name, tag)
+            elif tag in ("<Tangent>", "<Binormal>") and blocks[-1][0] == "<UV>":
+                channel = self.NORMAL
+                values = self._uv_values(egg_vertex, blocks[-1][1], tag)
+            elif tag == "<Normal>" and egg_vertex.hasNormal():
+                channel, values = self.NORMAL, egg_vertex.getNormal()
+            elif tag == "<RGBA>" and egg_vertex.hasColor():
+                channel, values = self.COLOR, egg_vertex.getColor()
+            inline_values = stripped[stripped.index("{") + 1:stripped.rindex("}")].split() if "{" in stripped else []
+            if values is not None and len(values) == len(inline_values):
+                batch.add_text(line[:line.index("{") + 1])
+                batch.add_values(channel, values, " ", " }\n")
+            else:
+                # Morphs, aux data & anything else are written the way Panda wrote them
+                batch.add_text(line)
+
+    def _format_batch(self, egg_vertices: list, indent_level: int) -> str:
+        batch = _VertexBatch((self.POSITION, self.NORMAL, self.UV, self.COLOR))
+        for egg_vertex in egg_vertices:
+            if not self._write_vertex(egg_vertex, indent_level, batch):
+                self._parse_vertex(egg_vertex, indent_level, batch)
+        return batch.format(self.precision)
+
+    def iter_chunks(self, egg_vertex_pool: EggVertexPool, indent_level: int = 0) -> Iterator[bytes]:
+        """
+        Serializes the vertex pool, BATCH_SIZE vertices per chunk.
+        """
+        self._scan_egg(egg_vertex_pool)
+        text = self._node_text(EggVertexPool(egg_vertex_pool.getName()), indent_level)
+        suffix = " " * indent_level + "}\n"
+        yield text[:-len(suffix)].encode("utf-8")
+        batch = list()
+        for index in range(egg_vertex_pool.getHighestIndex() + 1):
+            egg_vertex = egg_vertex_pool.getVertex(index)
+            if egg_vertex is None:
+                continue
+            batch.append(egg_vertex)
+            if len(batch) >= BATCH_SIZE:
+                yield self._format_batch(batch, indent_level + 2).encode("utf-8")
+                batch = list()
+        if batch:
+            yield self._format_batch(batch, indent_level + 2).encode("utf-8")
+        yield suffix.encode("utf-8")
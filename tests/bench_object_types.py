@@ -0,0 +1,94 @@
+"""
+Benchmark for <ObjectType> expansion during registration.
+
+coll_test.egg has no <ObjectType>s of its own, so copies of it are merged together & every group is given one.
+The eggs are then registered with the current expansion (only the declaring group's subtree is visited) and with
+the old one (every attribute walks the whole egg, after looking up the egg by its context).
+
+Run from the repository root: python -m tests.bench_object_types [copies]
+"""
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import time
+
+from panda3d.core import Filename
+from panda3d.egg import EggData, EggGroup, EggGroupNode
+
+from eggtools.AttributeDefs import ObjectTypeDefs
+from eggtools.EggMan import EggMan, EggContext
+
+if not os.path.isfile('tests/coll_test.egg'):
+    test_dir = os.getcwd()
+else:
+    test_dir = os.path.join(os.getcwd(), 'tests')
+
+
+class WholeEggEggMan(EggMan):
+    """
+    EggMan with the <ObjectType> expansion it used to have.
+    """
+
+    def _replace_object_types(self, ctx: EggContext, target_node: EggGroup) -> None:
+        if not hasattr(target_node, "getObjectTypes"):
+            return
+        egg_base = list(filter(lambda x: self.egg_datas[x] == ctx, self.egg_datas))[0]
+        for object_type_name in target_node.getObjectTypes():
+            object_type_def = ObjectTypeDefs.get(object_type_name, list())
+            if not object_type_def:
+                continue
+            for attribute in object_type_def:
+                attribute.apply(egg_base, ctx, node_entries=[target_node.getName()])
+            target_node.removeObjectType(object_type_name)
+            ctx.dirty = True
+
+
+def make_object_type_egg(filename: Filename, copies: int) -> None:
+    egg_data = EggData()
+    for _ in range(copies):
+        egg_copy = EggData()
+        egg_copy.read(Filename.fromOsSpecific(os.path.join(test_dir, 'coll_test.egg')))
+        egg_data.merge(egg_copy)
+
+    def traverse_egg(egg):
+        for child in egg.getChildren():
+            if isinstance(child, EggGroup):
+                child.addObjectType("barrier")
+                child.addObjectType("surface-grass")
+            if isinstance(child, EggGroupNode):
+                traverse_egg(child)
+
+    traverse_egg(egg_data)
+    egg_data.writeEgg(filename)
+
+
+def time_registration(eggman_type, filename: Filename, repeat: int = 3) -> tuple[float, str]:
+    best = None
+    output = ""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        eggman = eggman_type([filename])
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        output = str(list(eggman.egg_datas.keys())[0])
+    return best, output
+
+
+def run_benchmark(copies: int = 8) -> None:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        filename = Filename.fromOsSpecific(os.path.join(temp_dir, "coll_test_object_types.egg"))
+        make_object_type_egg(filename, copies)
+
+        old_time, old_output = time_registration(WholeEggEggMan, filename)
+        new_time, new_output = time_registration(EggMan, filename)
+
+    assert old_output == new_output, "Expanded eggs differ"
+    print(f"{copies} copies of coll_test.egg, 2 <ObjectType>s per group")
+    print(f"whole egg walks: {old_time * 1000:.1f} ms")
+    print(f"group subtrees:  {new_time * 1000:.1f} ms ({old_time / new_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 8)
@@ -0,0 +1,106 @@
+"""
+Benchmark for writing vertex pools with a precision.
+
+The vertex pools of test_spot.egg.pz are written by EggVertexPoolWriter as it is (vertices written straight from
+their channels) and the way it used to be (Panda writes every vertex, the numbers are filled back into its text).
+The same egg is then rigged to a few joints, so that every vertex has a membership comment too.
+Panda's own writer is timed as a reference, it can't be given a precision.
+
+Run from the repository root: python -m tests.bench_vertex_pool_writer
+"""
+from __future__ import annotations
+
+import os
+import time
+
+from panda3d.core import Filename, StringStream
+from panda3d.egg import EggData, EggGroup, EggGroupNode, EggVertexPool
+
+from eggtools.EggManConfig import VertexPrecisionConfig
+from eggtools.utils.EggVertexPoolWriter import EggVertexPoolWriter
+
+if not os.path.isfile('tests/coll_test.egg'):
+    test_dir = os.getcwd()
+else:
+    test_dir = os.path.join(os.getcwd(), 'tests')
+
+
+class ParsingPoolWriter(EggVertexPoolWriter):
+    """
+    EggVertexPoolWriter with the vertex writing it used to have.
+    """
+
+    def _write_vertex(self, egg_vertex, indent_level, batch) -> bool:
+        return False
+
+
+def find_pools(egg_node, pools: list) -> list[EggVertexPool]:
+    for child in egg_node.getChildren():
+        if isinstance(child, EggVertexPool):
+            pools.append(child)
+        elif isinstance(child, EggGroupNode):
+            find_pools(child, pools)
+    return pools
+
+
+def rig_egg(egg_data: EggData, joint_count: int = 8) -> None:
+    joints = list()
+    for i in range(joint_count):
+        joint = EggGroup(f"joint{i}")
+        joint.setGroupType(EggGroup.GT_joint)
+        egg_data.addChild(joint)
+        joints.append(joint)
+    for pool in find_pools(egg_data, []):
+        for index in range(pool.getHighestIndex() + 1):
+            egg_vertex = pool.getVertex(index)
+            if egg_vertex is None:
+                continue
+            joints[index % joint_count].refVertex(egg_vertex, 0.75)
+            joints[(index + 1) % joint_count].refVertex(egg_vertex, 0.25)
+
+
+def time_writer(writer_type, egg_data: EggData, repeat: int = 3) -> tuple[float, bytes]:
+    pools = find_pools(egg_data, [])
+    best = None
+    output = b""
+    for _ in range(repeat):
+        writer = writer_type(VertexPrecisionConfig())
+        start = time.perf_counter()
+        output = b"".join(chunk for pool in pools for chunk in writer.iter_chunks(pool))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, output
+
+
+def time_panda(egg_data: EggData, repeat: int = 3) -> float:
+    pools = find_pools(egg_data, [])
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for pool in pools:
+            pool.write(StringStream(), 0)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_benchmark() -> None:
+    egg_data = EggData()
+    egg_data.read(Filename.fromOsSpecific(os.path.join(test_dir, 'models', 'test_spot.egg.pz')))
+    vertex_count = sum(len(pool) for pool in find_pools(egg_data, []))
+
+    for label in ("test_spot.egg.pz", "rigged to 8 joints"):
+        if label != "test_spot.egg.pz":
+            rig_egg(egg_data)
+        old_time, old_output = time_writer(ParsingPoolWriter, egg_data)
+        new_time, new_output = time_writer(EggVertexPoolWriter, egg_data)
+        panda_time = time_panda(egg_data)
+        assert old_output == new_output, "Written vertex pools differ"
+        print(f"{label}, {vertex_count} vertices")
+        print(f"  Panda writes & is parsed: {old_time * 1000:.1f} ms")
+        print(f"  written from channels:    {new_time * 1000:.1f} ms ({old_time / new_time:.1f}x)")
+        print(f"  Panda, no precision:      {panda_time * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    run_benchmark()
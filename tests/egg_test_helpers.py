@@ -0,0 +1,21 @@
+"""
+Helpers shared by the test modules.
+"""
+from __future__ import annotations
+
+from panda3d.core import Filename
+from panda3d.egg import EggData, EggPolygon, EggTexture
+
+
+def write_texture_egg(egg_path: str, texture_paths: list[str]) -> None:
+    """
+    Writes an egg with one textured polygon per texture path.
+    """
+    egg_data = EggData()
+    for i, texture_path in enumerate(texture_paths):
+        egg_texture = EggTexture(f"texture{i}", texture_path)
+        egg_polygon = EggPolygon()
+        egg_polygon.addTexture(egg_texture)
+        egg_data.addChild(egg_texture)
+        egg_data.addChild(egg_polygon)
+    egg_data.writeEgg(Filename.fromOsSpecific(egg_path))
@@ -0,0 +1,86 @@
+import os
+import struct
+import tempfile
+import zlib
+
+from panda3d.core import Filename, PNMImage
+from panda3d.egg import EggData, EggPolygon, EggRenderMode, EggTexture
+
+from eggtools.EggMan import EggMan
+from eggtools.utils.EggAlphaStripper import EggAlphaStripper
+
+
+def write_rgba_png(filepath: str, size: int, alpha: int) -> None:
+    """
+    PNMImage drops alpha channels that are fully opaque when it writes an image, so this one is written by hand.
+    """
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff)
+
+    rows = b"".join(b"\x00" + bytes([128, 64, 32, alpha]) * size for _ in range(size))
+    with open(filepath, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", size, size, 8, 6, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(rows)))
+        f.write(chunk(b"IEND", b""))
+
+
+def read_channels(filepath: str) -> int:
+    image = PNMImage()
+    assert image.read(Filename.fromOsSpecific(filepath))
+    return image.getNumChannels()
+
+
+def test_alpha_strip():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        maps_dir = os.path.join(temp_dir, "maps")
+        os.makedirs(maps_dir)
+        write_rgba_png(os.path.join(maps_dir, "opaque.png"), 32, 255)
+        write_rgba_png(os.path.join(maps_dir, "glass.png"), 32, 128)
+
+        egg_data = EggData()
+        for texture_name in ("opaque", "glass"):
+            egg_texture = EggTexture(texture_name, f"maps/{texture_name}.png")
+            egg_texture.setFormat(EggTexture.F_rgba)
+            egg_texture.setAlphaMode(EggRenderMode.AM_dual)
+            egg_data.addChild(egg_texture)
+            egg_polygon = EggPolygon()
+            egg_polygon.addTexture(egg_texture)
+            egg_data.addChild(egg_polygon)
+        egg_path = os.path.join(temp_dir, "strip.egg")
+        egg_data.writeEgg(Filename.fromOsSpecific(egg_path))
+
+        eggman = EggMan([egg_path], lazy=True)
+        egg = eggman.get_egg_by_filename("strip.egg")
+        stripper = EggAlphaStripper(workers=2)
+
+        dryrun_report = stripper.strip_eggs(eggman, dryrun=True)
+        assert dryrun_report.stripped_files == [(os.path.join(maps_dir, "opaque.png"),) * 2]
+        assert dryrun_report.memory_bytes_saved == 32 * 32
+        assert not eggman.egg_datas[egg].dirty
+
+        # Written somewhere else, the originals stay as they are
+        output_dir = os.path.join(temp_dir, "stripped")
+        report = stripper.strip_eggs(eggman, output_dir=output_dir)
+        stripped_path = os.path.join(output_dir, "opaque.png")
+        assert report.stripped_files == [(os.path.join(maps_dir, "opaque.png"), stripped_path)]
+        assert report.updated_eggs == [egg]
+        assert report.updated_textures == 1
+        assert report.disk_bytes_saved == os.path.getsize(os.path.join(maps_dir, "opaque.png")) - \
+               os.path.getsize(stripped_path)
+        assert read_channels(stripped_path) == 3
+        assert f"{report.disk_bytes_saved} bytes on disk" in report.format()
+        assert read_channels(os.path.join(maps_dir, "opaque.png")) == 4
+
+        opaque_texture = eggman.get_texture_by_name(egg, "opaque.png")
+        assert opaque_texture.getFilename().getFullpath() == "stripped/opaque.png"
+        assert opaque_texture.getFormat() == EggTexture.F_rgb
+        assert opaque_texture.getAlphaMode() == EggRenderMode.AM_off
+        glass_texture = eggman.get_texture_by_name(egg, "glass.png")
+        assert glass_texture.getFormat() == EggTexture.F_rgba
+        assert glass_texture.getAlphaMode() == EggRenderMode.AM_dual
+        assert eggman.egg_datas[egg].dirty
+
+
+if __name__ == "__main__":
+    test_alpha_strip()
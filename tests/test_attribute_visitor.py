@@ -0,0 +1,93 @@
+import os
+
+from panda3d.core import Filename
+from panda3d.egg import EggData
+
+from eggtools.attributes import EggAlpha, EggBin, EggCollide, EggDecal, EggModel, EggTag
+from eggtools.attributes.EggAttributeVisitor import EggAttributeVisitor
+from eggtools.attributes.EggAutoAlphaAttribute import EggAutoAlpha
+from eggtools.attributes.EggDepthWriteAttribute import EggDepthWrite
+from eggtools.attributes.EggFlattenTransformAttribute import EggFlattenTransform
+from eggtools.attributes.EggUVNameAttribute import EggUVNameAttribute
+from eggtools.attributes.EggVisibilityAttribute import EggVisibility
+
+if not os.path.isfile('tests/coll_test.egg'):
+    test_dir = os.getcwd()
+else:
+    test_dir = os.path.join(os.getcwd(), 'tests')
+
+
+def make_attribute_entries():
+    return [
+        (EggAlpha("binary", True), ["pixel_white"]),
+        (EggCollide("polygon", "descend", preserve_uv_data=False), ["TILE_GHOST"]),
+        # Would see the alpha of TILES when visiting TILE_TT_PIE if they shared a traversal
+        (EggAlpha("dual"), ["TILE_TT_PIE"]),
+        (EggAlpha("blend"), ["TILES"]),
+        (EggTag("TestKey", "TestValue"), ["pCube1", "pSphere1"]),
+        (EggAlpha("dual"), ["pCube1"]),
+        (EggBin("fixed"), ["pCylinder1"]),
+        (EggAlpha("blend", True), ["p"]),
+        (EggCollide("polyset", ["descend"]), ["pTorus1"]),
+        (EggCollide("polygon", "descend", preserve_uv_data=False), ["pCube1"]),
+        (EggDecal(True), ["pDisc1"]),
+        (EggDepthWrite("off"), ["pPlane1"]),
+        (EggVisibility("hidden"), ["pCone1"]),
+        (EggModel(), ["pCone1"]),
+        (EggFlattenTransform(), ["cube_1_unfrozen", "dcs_net_unfrozen"]),
+        (EggUVNameAttribute("", "Hehe"), ["pPlane1"]),
+    ]
+
+
+def test_attribute_visitor():
+    for egg_name in ("coll_test.egg", "xform.egg", "test_tiles.egg"):
+        sequential_egg = EggData()
+        sequential_egg.read(os.path.join(test_dir, egg_name))
+        for attribute, node_entries in make_attribute_entries():
+            attribute.apply(sequential_egg, None, list(node_entries))
+
+        visited_egg = EggData()
+        visited_egg.read(os.path.join(test_dir, egg_name))
+        EggAttributeVisitor(
+            [(attribute, list(node_entries)) for attribute, node_entries in make_attribute_entries()]
+        ).apply(visited_egg, None)
+
+        assert str(sequential_egg) == str(visited_egg)
+
+
+def test_attribute_passes():
+    passes = EggAttributeVisitor(make_attribute_entries())._group_passes()
+    # Removing UV data reaches past the visited node, so it must get a traversal to itself
+    assert [(attribute.ident_name, len(attributes)) for attributes in passes for attribute, _ in attributes
+            if isinstance(attribute, EggCollide) and not attribute.preserve_uv_data] == [
+        ("Collide__polygon descend", 1), ("Collide__polygon descend", 1)
+    ]
+    # Every pass only holds one alpha attribute
+    for attributes in passes:
+        assert len([attribute for attribute, _ in attributes if isinstance(attribute, EggAlpha)]) <= 1
+
+
+def test_auto_alpha_passes():
+    # Automatic alpha reads the bins that EggBin sets on the ancestors, so they can't share a traversal
+    def make_entries():
+        return [(EggAutoAlpha(), None), (EggBin("opaque"), ["TILE"])]
+
+    egg_path = Filename.fromOsSpecific(os.path.join(test_dir, "test_tiles.egg"))
+    sequential_egg = EggData()
+    sequential_egg.read(egg_path)
+    for attribute, node_entries in make_entries():
+        attribute.apply(sequential_egg, None, node_entries)
+
+    visited_egg = EggData()
+    visited_egg.read(egg_path)
+    EggAttributeVisitor(make_entries()).apply(visited_egg, None)
+
+    assert "<Scalar> bin { opaque }" in str(sequential_egg)
+    assert str(sequential_egg) == str(visited_egg)
+    assert len(EggAttributeVisitor(make_entries())._group_passes()) == 2
+
+
+if __name__ == "__main__":
+    test_attribute_visitor()
+    test_attribute_passes()
+    test_auto_alpha_passes()
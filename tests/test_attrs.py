@@ -1,4 +1,5 @@
 from eggtools.attributes.EggAlphaAttribute import EggAlpha, EggAlphaAttribute
+from eggtools.attributes.EggAutoAlphaAttribute import EggAutoAlpha, EggAutoAlphaAttribute
 from eggtools.attributes.EggBackstageAttribute import EggBackstage, EggBackstageAttribute
 from eggtools.attributes.EggBillboardAttribute import EggBillboard, EggBillboardAttribute
 from eggtools.attributes.EggBinAttribute import EggBin, EggBinAttribute
@@ -15,6 +16,7 @@ from eggtools.attributes.EggExtFileAttribute import EggExtFile, EggExtFileAttrib
 
 def test_egg_attrs():
     EggAlphaAttribute("Dual")
+    EggAutoAlphaAttribute()
     EggBackstageAttribute()
     EggBillboardAttribute("axis")
     EggBinAttribute("ground")
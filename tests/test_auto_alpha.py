@@ -0,0 +1,101 @@
+import os
+import tempfile
+
+from panda3d.core import Filename, PNMImage
+from panda3d.egg import EggData, EggPolygon, EggRenderMode, EggTexture
+
+from eggtools.EggMan import EggMan
+from eggtools.attributes.EggAutoAlphaAttribute import EggAutoAlpha
+from eggtools.utils.EggAlphaAnalyzer import EggAlphaAnalyzer, count_alpha
+
+
+def write_image(filepath: str, alphas: list, channels: int = 4) -> None:
+    """
+    A 10x10 image whose rows have the given alpha values.
+    """
+    image = PNMImage(10, 10, channels)
+    for y in range(10):
+        for x in range(10):
+            image.setXel(x, y, 0.5, 0.5, 0.5)
+            if image.hasAlpha():
+                image.setAlpha(x, y, alphas[y])
+    image.write(Filename.fromOsSpecific(filepath))
+
+
+def test_auto_alpha():
+    analysis = count_alpha(bytes([0, 0, 128, 255]))
+    assert (analysis.transparent_pixels, analysis.partial_pixels, analysis.opaque_pixels) == (2, 1, 1)
+    assert count_alpha(bytes([3, 128, 252]), tolerance=4).partial_pixels == 1
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.makedirs(os.path.join(temp_dir, "maps"))
+        images = {
+            "opaque": [1.0] * 10,
+            "opaque_copy": [1.0] * 10,
+            "cutout": [0.0] * 5 + [1.0] * 5,
+            "soft_cutout": [0.0] * 5 + [0.5] + [1.0] * 4,
+            "glass": [0.5] * 10,
+        }
+        for image_name, alphas in images.items():
+            write_image(os.path.join(temp_dir, "maps", f"{image_name}.png"), alphas)
+        write_image(os.path.join(temp_dir, "maps", "rgb.png"), list(), channels=3)
+
+        egg_data = EggData()
+        texture_names = list(images) + ["rgb"]
+        for texture_name in texture_names:
+            egg_texture = EggTexture(texture_name, f"maps/{texture_name}.png")
+            egg_data.addChild(egg_texture)
+            egg_polygon = EggPolygon(texture_name)
+            egg_polygon.addTexture(egg_texture)
+            if texture_name == "glass":
+                # Set by hand, left alone
+                egg_polygon.setAlphaMode(EggRenderMode.AM_binary)
+            egg_data.addChild(egg_polygon)
+        # The most demanding texture decides
+        multi_polygon = EggPolygon("multi")
+        multi_polygon.addTexture(egg_data.findChild("opaque"))
+        multi_polygon.addTexture(egg_data.findChild("cutout"))
+        egg_data.addChild(multi_polygon)
+        egg_path = os.path.join(temp_dir, "alpha.egg")
+        egg_data.writeEgg(Filename.fromOsSpecific(egg_path))
+
+        cache_path = os.path.join(temp_dir, "alpha_cache.json")
+        analyzer = EggAlphaAnalyzer(cache_path=cache_path)
+        eggman = EggMan([egg_path])
+        egg = eggman.get_egg_by_filename("alpha.egg")
+        eggman.apply_attributes(egg, {EggAutoAlpha(analyzer): None})
+
+        polygons = {child.getName(): child for child in egg.getChildren() if isinstance(child, EggPolygon)}
+        assert polygons["opaque"].getAlphaMode() == EggRenderMode.AM_off
+        assert polygons["opaque"].getBin() == "opaque"
+        assert polygons["rgb"].getAlphaMode() == EggRenderMode.AM_off
+        assert polygons["cutout"].getAlphaMode() == EggRenderMode.AM_binary
+        assert polygons["cutout"].getBin() == "opaque"
+        assert polygons["soft_cutout"].getAlphaMode() == EggRenderMode.AM_dual
+        assert not polygons["soft_cutout"].getBin()
+        assert polygons["glass"].getAlphaMode() == EggRenderMode.AM_binary
+        assert polygons["multi"].getAlphaMode() == EggRenderMode.AM_binary
+
+        # Textures that were swapped for copies outside of the egg are still found next to it
+        detached_egg = EggData()
+        assert detached_egg.read(Filename.fromOsSpecific(egg_path))
+        detached_polygon = [
+            child for child in detached_egg.getChildren() if isinstance(child, EggPolygon) and child.getName() == "cutout"
+        ][0]
+        detached_polygon.clearTexture()
+        detached_polygon.addTexture(EggTexture("cutout_copy", "maps/cutout.png"))
+        EggAutoAlpha(analyzer).apply(detached_egg, None)
+        assert detached_polygon.getAlphaMode() == EggRenderMode.AM_binary
+
+        # Identical images are only analyzed once, and the results survive between runs.
+        # (Fully opaque images are written without an alpha channel, so opaque, opaque_copy & rgb are the same)
+        assert len(analyzer._by_hash) == len(texture_names) - 2
+        analyzer.save()
+        cached_analyzer = EggAlphaAnalyzer(cache_path=cache_path)
+        glass_analysis = cached_analyzer._by_hash[analyzer._hash(os.path.join(temp_dir, "maps", "glass.png"))]
+        assert cached_analyzer.get_alpha_mode(glass_analysis) == "blend"
+        assert cached_analyzer.get_bin("blend") == "transparent"
+
+
+if __name__ == "__main__":
+    test_auto_alpha()
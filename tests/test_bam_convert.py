@@ -0,0 +1,106 @@
+import os
+import shutil
+import tempfile
+import zlib
+
+from panda3d.core import Filename, Loader, LoaderOptions, NodePath
+from panda3d.egg import EggGroup
+
+from eggtools.EggMan import EggMan
+from eggtools.utils.EggBamConverter import get_bam_path
+from eggtools.utils.EggMaintenanceUtil import EggMaintenanceUtil
+
+if not os.path.isfile('tests/coll_test.egg'):
+    test_dir = os.getcwd()
+else:
+    test_dir = os.path.join(os.getcwd(), 'tests')
+
+
+def load_bam(bam_path):
+    options = LoaderOptions(LoaderOptions.LF_no_cache | LoaderOptions.LF_report_errors)
+    node = Loader.getGlobalPtr().loadSync(Filename.fromOsSpecific(bam_path), options)
+    assert node
+    return NodePath(node)
+
+
+def test_bam_convert():
+    assert get_bam_path(os.path.join("models", "a.egg.pz")) == os.path.join("models", "a.bam")
+    assert get_bam_path(os.path.join("models", "a.egg"), "built") == os.path.join("built", "a.bam")
+    assert get_bam_path(os.path.join("models", "a", "tree.egg"), "built", "models") == \
+        os.path.join("built", "a", "tree.bam")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        shutil.copytree(os.path.join(test_dir, "maps"), os.path.join(temp_dir, "maps"))
+        tiles_path = os.path.join(temp_dir, "test_tiles.egg")
+        coll_path = os.path.join(temp_dir, "coll_test.egg")
+        shutil.copy(os.path.join(test_dir, "test_tiles.egg"), tiles_path)
+        shutil.copy(os.path.join(test_dir, "coll_test.egg"), coll_path)
+        tiles_bam = get_bam_path(tiles_path)
+
+        # Loaded eggs are converted from a copy, what's in memory stays as it was
+        eggman = EggMan([tiles_path, coll_path])
+        egg = eggman.get_egg_by_filename("test_tiles.egg")
+        egg_text = str(egg)
+        report = eggman.write_bams()
+        assert not report.failed_files
+        assert report.converted_files == [(tiles_path, tiles_bam), (coll_path, get_bam_path(coll_path))]
+        assert str(egg) == egg_text
+        model = load_bam(tiles_bam)
+        assert not model.find("**/TILE_TT_CATCH_GRAB").isEmpty()
+        assert all(texture.getFullpath().exists() for texture in model.findAllTextures())
+
+        # Dirty eggs are converted again from memory, clean eggs with a newer .bam are skipped
+        egg.addChild(EggGroup("added_group"))
+        eggman.mark_dirty(egg)
+        report = eggman.write_bams()
+        assert report.converted_files == [(tiles_path, tiles_bam)]
+        assert report.skipped_files == [coll_path]
+        assert not load_bam(tiles_bam).find("**/added_group").isEmpty()
+        assert not os.path.exists(os.path.join(temp_dir, "added_group.egg"))
+
+        # Eggs that changed on disk are read again in the worker processes
+        past_time = os.path.getmtime(coll_path) - 10
+        os.utime(get_bam_path(coll_path), (past_time, past_time))
+        eggman.write_egg_manually(egg)
+        lazy_eggman = EggMan([tiles_path, coll_path], lazy=True)
+        report = lazy_eggman.write_bams(workers=2, output_dir=os.path.join(temp_dir, "bams"))
+        assert not report.failed_files and len(report.converted_files) == 2
+        assert not load_bam(os.path.join(temp_dir, "bams", "test_tiles.bam")).find("**/added_group").isEmpty()
+        # Both eggs are now newer than their .bam, one got written & the other's .bam is older
+        report = eggman.write_bams()
+        assert [egg_path for egg_path, _ in report.converted_files] == [tiles_path, coll_path]
+        assert eggman.write_bams().skipped_files == [tiles_path, coll_path]
+
+        # Prepping & baking in one pass, eggs handed to the loader are released along with the window
+        maintainer = EggMaintenanceUtil([tiles_path, coll_path], lazy=True)
+        os.remove(tiles_bam)
+        maintainer.perform_general_maintenance(window_size=1, bake=True)
+        assert os.path.isfile(tiles_bam)
+        assert not any(ctx.loaded for ctx in maintainer.eggman.egg_datas.values())
+
+        # Eggs with the same name keep their folders inside the output directory
+        for folder in ("a", "b"):
+            os.makedirs(os.path.join(temp_dir, folder))
+            shutil.copy(coll_path, os.path.join(temp_dir, folder, "tree.egg"))
+        tree_paths = [os.path.join(temp_dir, folder, name) for folder, name in
+                      (("a", "tree.egg"), ("b", "tree.egg"), ("a", "tree.egg.pz"))]
+        tree_eggman = EggMan(tree_paths[:2] + [coll_path], lazy=True)
+        report = tree_eggman.write_bams(workers=2, output_dir=os.path.join(temp_dir, "trees"))
+        assert sorted(bam_path for _, bam_path in report.converted_files) == [
+            os.path.join(temp_dir, "trees", "a", "tree.bam"),
+            os.path.join(temp_dir, "trees", "b", "tree.bam"),
+            os.path.join(temp_dir, "trees", "coll_test.bam"),
+        ]
+        # Eggs that would write the same .bam are refused, whichever window they are in
+        with open(coll_path, "rb") as f:
+            coll_data = f.read()
+        with open(tree_paths[2], "wb") as f:
+            f.write(zlib.compress(coll_data))
+        tree_eggman = EggMan(tree_paths, lazy=True)
+        report = tree_eggman.write_bams([tree_eggman.get_egg_by_filename("tree.egg.pz")], force=True)
+        assert list(report.failed_files) == [tree_paths[2]]
+        assert not report.converted_files
+
+
+if __name__ == "__main__":
+    test_bam_convert()
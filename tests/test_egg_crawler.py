@@ -0,0 +1,56 @@
+import os
+import tempfile
+
+from eggtools.utils.EggCrawler import EggCrawler, crawl_eggs
+
+if not os.path.isfile('tests/coll_test.egg'):
+    test_dir = os.getcwd()
+else:
+    test_dir = os.path.join(os.getcwd(), 'tests')
+
+
+def test_egg_crawler():
+    egg_files = crawl_eggs(test_dir)
+    egg_names = [os.path.basename(egg_file) for egg_file in egg_files]
+    assert "coll_test.egg" in egg_names
+    assert "test_spot.egg.pz" in egg_names
+    assert not any(name.endswith(".png") for name in egg_names)
+    assert egg_files == sorted(egg_files)
+
+    # Parallel walking gives back the same thing
+    assert crawl_eggs(test_dir, workers=4) == egg_files
+
+    # Excluded directories are not entered
+    assert "test_spot.egg.pz" not in [os.path.basename(f) for f in crawl_eggs(test_dir, excludes=["models"])]
+
+    sized = crawl_eggs(test_dir, sort_by_size=True)
+    sizes = [os.path.getsize(egg_file) for egg_file in sized]
+    assert sizes == sorted(sizes, reverse=True)
+
+    textures = EggCrawler(includes=["maps/*.png"], eggs_only=False).crawl(test_dir)
+    assert [os.path.basename(t) for t in textures] == ["pixel_white.png", "spot_texture.png", "tt_t_background.png"]
+
+
+def test_egg_crawler_symlinks():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        models_dir = os.path.join(temp_dir, "models")
+        os.makedirs(models_dir)
+        with open(os.path.join(temp_dir, "real.egg"), "w") as f:
+            f.write("")
+        try:
+            os.symlink(os.path.join(temp_dir, "real.egg"), os.path.join(models_dir, "linked.egg"))
+            # Points back up the tree
+            os.symlink(temp_dir, os.path.join(models_dir, "loop"), target_is_directory=True)
+        except (OSError, NotImplementedError):
+            # No symlink support (e.g. Windows without the privilege)
+            return
+
+        egg_names = sorted(os.path.basename(egg_file) for egg_file in crawl_eggs(temp_dir))
+        assert egg_names == ["linked.egg", "real.egg"]
+        assert crawl_eggs(temp_dir, workers=4) == crawl_eggs(temp_dir)
+        assert len(crawl_eggs(temp_dir, follow_symlinks=False)) == 2
+
+
+if __name__ == "__main__":
+    test_egg_crawler()
+    test_egg_crawler_symlinks()
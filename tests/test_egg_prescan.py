@@ -0,0 +1,29 @@
+import os
+
+from eggtools.EggMan import EggMan
+from eggtools.utils.EggPrescanner import EggPrescanner
+from eggtools.utils.EggScanCache import EggScanRecord
+
+if not os.path.isfile('tests/coll_test.egg'):
+    test_dir = os.getcwd()
+else:
+    test_dir = os.path.join(os.getcwd(), 'tests')
+
+test_eggs = [
+    os.path.join(test_dir, 'coll_test.egg'),
+    os.path.join(test_dir, 'test_tiles.egg'),
+    os.path.join(test_dir, 'name_card.egg'),
+    os.path.join(test_dir, 'models', 'test_spot.egg.pz'),
+]
+
+
+def test_egg_prescan():
+    eggman = EggMan(test_eggs)
+    # Use a tiny chunk size to make sure entries split between chunks are handled.
+    for prescanner in (EggPrescanner(), EggPrescanner(chunk_size=97)):
+        for egg_data, ctx in eggman.egg_datas.items():
+            assert prescanner.prescan(ctx.filename) == EggScanRecord.from_context(ctx)
+
+
+if __name__ == "__main__":
+    test_egg_prescan()
@@ -0,0 +1,115 @@
+import os
+import tempfile
+
+from eggtools.utils.EggFileOpPlanner import EggFileOpPlanner
+
+
+def write_file(filepath: str, contents: str) -> None:
+    with open(filepath, "w") as f:
+        f.write(contents)
+
+
+def read_file(filepath: str) -> str:
+    with open(filepath) as f:
+        return f.read()
+
+
+def test_file_ops():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        maps_dir = os.path.join(temp_dir, "maps")
+        tex_dir = os.path.join(temp_dir, "tex")
+        os.makedirs(maps_dir)
+        for name in ("a", "b", "c", "d"):
+            write_file(os.path.join(maps_dir, f"{name}.png"), name)
+        journal_path = os.path.join(temp_dir, "fileops.journal")
+
+        planner = EggFileOpPlanner(journal_path=journal_path, workers=4)
+        planner.plan_move(os.path.join(maps_dir, "a.png"), os.path.join(tex_dir, "a.png"))
+        # Planning the same op twice is harmless, another file to the same destination is skipped
+        planner.plan_move(os.path.join(maps_dir, "a.png"), os.path.join(tex_dir, "a.png"))
+        assert planner.plan_copy(os.path.join(maps_dir, "b.png"), os.path.join(tex_dir, "a.png")) is None
+        planner.plan_copy(os.path.join(maps_dir, "b.png"), os.path.join(tex_dir, "b.png"))
+        planner.plan_move(os.path.join(maps_dir, "c.png"), os.path.join(tex_dir, "deeper", "c.png"))
+        planner.plan_move(os.path.join(maps_dir, "d.png"), os.path.join(tex_dir, "d.png"))
+        # Ops whose outcome depends on the order they run in are left out & reported, not raised
+        assert planner.plan_move(os.path.join(tex_dir, "a.png"), os.path.join(tex_dir, "e.png")) is None
+        assert planner.plan_move(os.path.join(maps_dir, "c.png"), os.path.join(tex_dir, "c.png")) is None
+        assert [conflict[1] for conflict in planner.conflicts] == [
+            os.path.join(maps_dir, "b.png"), os.path.join(tex_dir, "a.png"), os.path.join(maps_dir, "c.png")
+        ]
+        assert len(planner.ops) == 4
+
+        # d.png disappears before the run, so the run fails halfway
+        os.rename(os.path.join(maps_dir, "d.png"), os.path.join(temp_dir, "d.png"))
+        assert not planner.execute()
+        assert [op.status for op in planner.ops] == ["done", "done", "done", "failed"]
+        assert read_file(os.path.join(tex_dir, "b.png")) == "b"
+        assert os.path.isfile(os.path.join(maps_dir, "b.png"))
+        assert not os.path.exists(os.path.join(maps_dir, "c.png"))
+
+        # Resuming from the journal only reruns what didn't finish
+        os.rename(os.path.join(temp_dir, "d.png"), os.path.join(maps_dir, "d.png"))
+        resumed = EggFileOpPlanner.from_journal(journal_path)
+        assert [op.status for op in resumed.ops] == ["done", "done", "done", "failed"]
+        assert resumed.execute()
+        assert read_file(os.path.join(tex_dir, "d.png")) == "d"
+
+        # Rolling back puts every file back, and removes the folders that were made for them
+        rolled_back = EggFileOpPlanner.from_journal(journal_path)
+        assert rolled_back.rollback()
+        assert sorted(os.listdir(maps_dir)) == ["a.png", "b.png", "c.png", "d.png"]
+        assert not os.path.exists(tex_dir)
+        rolled_back.discard_journal()
+        assert not os.path.exists(journal_path)
+
+
+def interrupt_ops(temp_dir: str) -> str:
+    """
+    Plans a few ops, then leaves things as if the process died right after each file op,
+    before its outcome made it into the journal.
+
+    :return: The journal path
+    """
+    maps_dir = os.path.join(temp_dir, "maps")
+    tex_dir = os.path.join(temp_dir, "tex")
+    os.makedirs(maps_dir)
+    for name in ("a", "b", "c"):
+        write_file(os.path.join(maps_dir, f"{name}.png"), name)
+    journal_path = os.path.join(temp_dir, "fileops.journal")
+
+    planner = EggFileOpPlanner(journal_path=journal_path, workers=1)
+    planner.plan_move(os.path.join(maps_dir, "a.png"), os.path.join(tex_dir, "a.png"))
+    planner.plan_move(os.path.join(maps_dir, "b.png"), os.path.join(tex_dir, "b.png"))
+    planner.plan_copy(os.path.join(maps_dir, "c.png"), os.path.join(tex_dir, "c.png"))
+    planner._write_journal()
+    os.makedirs(tex_dir)
+    # a.png & c.png got their "started" record, b.png is from a journal that never had one
+    planner.ops[0].status = "started"
+    planner._write_journal(0)
+    os.rename(os.path.join(maps_dir, "a.png"), os.path.join(tex_dir, "a.png"))
+    os.rename(os.path.join(maps_dir, "b.png"), os.path.join(tex_dir, "b.png"))
+    planner.ops[2].status = "started"
+    planner._write_journal(2)
+    write_file(os.path.join(tex_dir, "c.png"), "c")
+    return journal_path
+
+
+def test_interrupted_ops():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        resumed = EggFileOpPlanner.from_journal(interrupt_ops(temp_dir))
+        assert [op.status for op in resumed.ops] == ["started", "pending", "started"]
+        assert resumed.execute()
+        assert [op.status for op in resumed.ops] == ["done", "done", "done"]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # Ops that went through are undone even though the journal never heard they finished
+        rolled_back = EggFileOpPlanner.from_journal(interrupt_ops(temp_dir))
+        assert rolled_back.rollback()
+        assert [op.status for op in rolled_back.ops] == ["rolled_back"] * 3
+        assert sorted(os.listdir(os.path.join(temp_dir, "maps"))) == ["a.png", "b.png", "c.png"]
+        assert os.listdir(os.path.join(temp_dir, "tex")) == []
+
+
+if __name__ == "__main__":
+    test_file_ops()
+    test_interrupted_ops()
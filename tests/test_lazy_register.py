@@ -0,0 +1,71 @@
+import os
+import tempfile
+
+from panda3d.core import Filename
+
+from eggtools.EggMan import EggMan
+
+if not os.path.isfile('tests/coll_test.egg'):
+    test_dir = os.getcwd()
+else:
+    test_dir = os.path.join(os.getcwd(), 'tests')
+
+test_eggs = [
+    Filename.fromOsSpecific(os.path.join(test_dir, 'coll_test.egg')),
+    Filename.fromOsSpecific(os.path.join(test_dir, 'test_tiles.egg')),
+]
+
+
+def test_lazy_register():
+    eager_eggman = EggMan(test_eggs)
+    lazy_eggman = EggMan(test_eggs, lazy=True)
+
+    coll_egg = lazy_eggman.get_egg_by_filename("coll_test.egg")
+    tiles_egg = lazy_eggman.get_egg_by_filename("test_tiles.egg")
+    assert not lazy_eggman.egg_datas[coll_egg].loaded
+    assert lazy_eggman.egg_datas[coll_egg].file_size == os.path.getsize(test_eggs[0].toOsSpecific())
+
+    # Nothing is dirty, so nothing should get read or written.
+    lazy_eggman.write_egg(coll_egg)
+    assert not lazy_eggman.egg_datas[coll_egg].loaded
+
+    # Texture queries are answered by a prescan, without loading the egg.
+    eager_tiles_egg = eager_eggman.get_egg_by_filename("test_tiles.egg")
+    assert sorted(lazy_eggman.get_texture_basenames(tiles_egg)) == \
+           sorted(eager_eggman.get_texture_basenames(eager_tiles_egg))
+    assert not lazy_eggman.egg_datas[tiles_egg].loaded
+
+    # Touching one egg only loads that egg, and fills the placeholder in place.
+    assert len(lazy_eggman.get_current_textures(tiles_egg)) == len(eager_eggman.get_current_textures(eager_tiles_egg))
+    assert lazy_eggman.egg_datas[tiles_egg].loaded
+    assert not lazy_eggman.egg_datas[coll_egg].loaded
+    assert lazy_eggman.egg_datas[tiles_egg].dirty == eager_eggman.egg_datas[eager_tiles_egg].dirty
+    assert str(tiles_egg) == str(eager_tiles_egg)
+
+    # An egg that can't be read is reported, and never written over its file
+    with tempfile.TemporaryDirectory() as temp_dir:
+        broken_path = os.path.join(temp_dir, "broken.egg")
+        broken_contents = "<Group> broken {\n  <Polygon> {\n"
+        with open(broken_path, "w") as broken_file:
+            broken_file.write(broken_contents)
+        broken_fp = Filename.fromOsSpecific(broken_path)
+        broken_eggman = EggMan([broken_path], lazy=True)
+        broken_egg = broken_eggman.get_egg_by_filename("broken.egg")
+        broken_eggman.load_eggs([broken_egg])
+        assert broken_fp in broken_eggman.failed_eggs
+        assert broken_eggman.egg_datas[broken_egg].failed
+        broken_eggman.mark_dirty(broken_egg)
+        assert not broken_eggman.egg_datas[broken_egg].dirty
+
+        # Also when the egg was already dirty before anything tried to read it
+        broken_eggman = EggMan([broken_path], lazy=True)
+        broken_egg = broken_eggman.get_egg_by_filename("broken.egg")
+        broken_eggman.mark_dirty(broken_egg)
+        assert list(broken_eggman.write_eggs([broken_egg], manually=True)) == [broken_fp]
+        assert broken_fp in broken_eggman.failed_writes
+        with open(broken_path) as broken_file:
+            assert broken_file.read() == broken_contents
+
+
+if __name__ == "__main__":
+    test_lazy_register()
@@ -0,0 +1,50 @@
+import os
+import tempfile
+
+from eggtools.utils.EggNameResolver import EggNameResolver
+
+
+def test_name_resolver_index():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        first_path = os.path.join(temp_dir, "first")
+        second_path = os.path.join(temp_dir, "second")
+        os.makedirs(os.path.join(first_path, "nested"))
+        os.makedirs(second_path)
+        for filepath in (
+                os.path.join(first_path, "shared.png"),
+                os.path.join(second_path, "shared.png"),
+                os.path.join(second_path, "cc_t_background.png"),
+                os.path.join(first_path, "nested", "hidden.png"),
+        ):
+            open(filepath, "w").close()
+
+        resolver = EggNameResolver([first_path, second_path, first_path + os.sep])
+        # Duplicate search paths are dropped, and instances don't share their search paths anymore
+        assert resolver.search_paths == [first_path, second_path]
+        assert EggNameResolver([second_path]).search_paths == [second_path]
+
+        # The first search path wins, and only files directly inside a search path count
+        assert resolver.find_file("shared.png") == os.path.join(first_path, "shared.png")
+        assert resolver.find_files("shared.png") == [
+            os.path.join(first_path, "shared.png"), os.path.join(second_path, "shared.png")
+        ]
+        assert resolver.find_file("hidden.png") is None
+        assert resolver.try_different_names("ttcc_background.png") == "cc_t_background.png"
+        assert resolver.try_different_names("missing.png") == "missing.png"
+
+        # New files are picked up by refreshing
+        open(os.path.join(second_path, "new.png"), "w").close()
+        os.utime(second_path, (0, 0))
+        assert resolver.find_file("new.png") is None
+        assert resolver.refresh()
+        assert resolver.find_file("new.png") == os.path.join(second_path, "new.png")
+        assert not resolver.refresh()
+
+        auto_resolver = EggNameResolver([first_path], auto_refresh=True)
+        open(os.path.join(first_path, "later.png"), "w").close()
+        os.utime(first_path, (0, 0))
+        assert auto_resolver.find_file("later.png") == os.path.join(first_path, "later.png")
+
+
+if __name__ == "__main__":
+    test_name_resolver_index()
@@ -0,0 +1,54 @@
+import json
+import os
+import tempfile
+
+from eggtools.EggManConfig import NameRewriteRule
+from eggtools.utils.EggNameResolver import EggNameResolver
+
+
+def test_name_rules():
+    assert NameRewriteRule("prefix", "ttcc_", "cc_t_").rewrite("ttcc_wall.png") == "cc_t_wall.png"
+    assert NameRewriteRule("prefix", "", "cc_t_").rewrite("cc_t_wall.png") is None
+    assert NameRewriteRule("suffix", "_old", "_new").rewrite("wall_old.png") == "wall_new.png"
+    assert NameRewriteRule("suffix", "", "_a").rewrite("wall.png") == "wall_a.png"
+    assert NameRewriteRule("regex", r"_v\d+", "").rewrite("wall_v2.png") == "wall.png"
+    assert NameRewriteRule("regex", r"_v\d+", "").rewrite("wall.png") is None
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for texture_name in ("cc_t_background.png", "cc_t_ttcc_door.png", "floor_hi.png", "roof.png"):
+            open(os.path.join(temp_dir, texture_name), "w").close()
+
+        # The default rules swap the old prefix for the new one
+        resolver = EggNameResolver([temp_dir])
+        assert resolver.try_different_names("ttcc_background.png") == "cc_t_background.png"
+        assert resolver.try_different_names("background.png") == "cc_t_background.png"
+        # Names with the old prefix only get it swapped, like they always did
+        assert resolver.try_different_names("ttcc_door.png") == "ttcc_door.png"
+
+        rules_path = os.path.join(temp_dir, "rules.json")
+        with open(rules_path, "w") as rules_file:
+            json.dump([
+                {"type": "suffix", "pattern": "_lo", "replacement": "_hi"},
+                {"type": "regex", "pattern": r"_v\d+", "replacement": ""},
+            ], rules_file)
+        resolver.load_rules(rules_path)
+        assert resolver.try_different_names("floor_lo.png") == "floor_hi.png"
+        assert resolver.try_different_names("roof_v3.png") == "roof.png"
+        assert resolver.try_different_names("ttcc_background.png") == "ttcc_background.png"
+
+        # The same broken name across many eggs is only resolved once
+        cache_info = resolver._resolve_cached.cache_info()
+        for _ in range(100):
+            assert resolver.try_different_names("roof_v3.png") == "roof.png"
+        assert resolver._resolve_cached.cache_info().misses == cache_info.misses
+
+        # New search paths invalidate the cached resolutions
+        os.makedirs(os.path.join(temp_dir, "more"))
+        open(os.path.join(temp_dir, "more", "gutter.png"), "w").close()
+        assert resolver.try_different_names("gutter_v1.png") == "gutter_v1.png"
+        resolver.add_search_paths(os.path.join(temp_dir, "more"))
+        assert resolver.try_different_names("gutter_v1.png") == "gutter.png"
+
+
+if __name__ == "__main__":
+    test_name_rules()
@@ -0,0 +1,66 @@
+import os
+
+from panda3d.core import Filename
+from panda3d.egg import EggData, EggGroup
+
+from eggtools.EggMan import EggMan, EggGroupRenameType
+from eggtools.attributes import EggAlpha, EggTag
+from eggtools.attributes.EggAttributeVisitor import EggAttributeVisitor
+from eggtools.utils.EggNodeIndex import EggNodeIndex
+
+if not os.path.isfile('tests/coll_test.egg'):
+    test_dir = os.getcwd()
+else:
+    test_dir = os.path.join(os.getcwd(), 'tests')
+
+test_eggs = [
+    Filename.fromOsSpecific(os.path.join(test_dir, 'coll_test.egg')),
+    Filename.fromOsSpecific(os.path.join(test_dir, 'test_tiles.egg')),
+]
+
+
+def make_attributes():
+    return {
+        EggAlpha("dual"): ["TILE_TT_PIE", "pCube1"],
+        EggAlpha("binary", True): ["pixel_white"],
+        EggTag("TestKey", "TestValue"): ["TILE_GHOST", "pSphere1"],
+    }
+
+
+def index_contents(node_index: EggNodeIndex) -> tuple:
+    return (
+        {name: set(egg_nodes) for name, egg_nodes in node_index.nodes_by_name.items()},
+        {egg_texture: set(egg_polygons) for egg_texture, egg_polygons in node_index.polygons_by_texture.items()},
+        node_index.parents,
+    )
+
+
+def test_node_index():
+    eggman = EggMan(test_eggs)
+    for egg_data, ctx in eggman.egg_datas.items():
+        # Targeted application through the index has to match walking the whole egg
+        walked_egg = EggData()
+        walked_egg.read(ctx.filename)
+        attributes = make_attributes()
+        EggAttributeVisitor([(attribute, attributes[attribute]) for attribute in attributes]).apply(walked_egg, None)
+        eggman.apply_attributes(egg_data, make_attributes())
+        assert str(egg_data) == str(walked_egg)
+
+        eggman.rename_group_nodes(egg_data, EggGroupRenameType.RenamePrefixes, ["TILE_"])
+        eggman.rename_trefs(egg_data)
+
+        # Updating the index along the way has to give the same result as indexing the egg from scratch
+        fresh_index = EggNodeIndex()
+        fresh_index.build(egg_data)
+        assert index_contents(eggman.get_node_index(egg_data)) == index_contents(fresh_index)
+
+    tiles_egg = eggman.get_egg_by_filename("test_tiles.egg")
+    node_index = eggman.get_node_index(tiles_egg)
+    ghost_groups = node_index.get_nodes_by_name("GHOST")
+    assert len(ghost_groups) == 1 and isinstance(ghost_groups[0], EggGroup)
+    assert node_index.get_ancestors(ghost_groups[0])[-1] == tiles_egg
+    assert not node_index.get_nodes_by_name("TILE_GHOST")
+
+
+if __name__ == "__main__":
+    test_node_index()
@@ -0,0 +1,42 @@
+import fnmatch
+
+from eggtools.EggManConfig import NodeNameConfig, DualConfig
+
+
+def test_node_name_config():
+    # Plain terms keep matching literally
+    config = NodeNameConfig(["pCube"], NODE_STARTSWITH=["coll_"], NODE_ENDSWITH=["[1]"])
+    assert config.check("my_pCube1")
+    assert config.check("coll_floor")
+    assert not config.check("floor_coll_")
+    assert not config.check("empty")
+
+    # Terms with glob characters are globs
+    assert DualConfig.check("mama_coll_1")
+    assert DualConfig.check("tree_1")
+    assert not DualConfig.check("tree_12")
+    assert DualConfig.check("cc_t_fx_shadow_circle_big")
+
+    globs = ["wall_??", "*[0-9]_door", "[!a-c]*x", "fence"]
+    config = NodeNameConfig(list(), NODE_GLOBS=globs)
+    for name in ("wall_01", "wall_1", "front2_door", "front_door", "dx", "bx", "fence", "fence1", ""):
+        expected = any(fnmatch.fnmatchcase(name, pattern) for pattern in globs)
+        # Ask twice, the second answer comes from the memo
+        assert config.check(name) == expected
+        assert config.check(name) == expected
+
+    # Changing the terms has to be picked up
+    assert config.NODE_GLOBS == tuple(globs)
+    assert not config.check("gate")
+    config.NODE_GLOBS += ("ga*",)
+    assert config.check("gate")
+    config.NODE_GLOBS = config.NODE_GLOBS[:-1] + ("gu*",)
+    assert not config.check("gate")
+    config.NODE_GLOBS = ["gate"]
+    assert config.check("gate")
+    config.NODE_GLOBS = list()
+    assert not config.check("gate")
+
+
+if __name__ == "__main__":
+    test_node_name_config()
@@ -0,0 +1,47 @@
+import os
+
+from panda3d.core import Filename
+
+from eggtools.EggMan import EggMan
+
+if not os.path.isfile('tests/coll_test.egg'):
+    test_dir = os.getcwd()
+else:
+    test_dir = os.path.join(os.getcwd(), 'tests')
+
+test_eggs = [
+    Filename.fromOsSpecific(os.path.join(test_dir, 'coll_test.egg')),
+    Filename.fromOsSpecific(os.path.join(test_dir, 'test_tiles.egg')),
+    Filename.fromOsSpecific(os.path.join(test_dir, 'xform.egg')),
+    # Doesn't exist, should be reported without stopping the others from loading
+    Filename.fromOsSpecific(os.path.join(test_dir, 'dummy_test.egg')),
+]
+
+
+def test_parallel_register():
+    serial_eggman = EggMan(test_eggs)
+    parallel_eggman = EggMan(test_eggs, workers=2)
+
+    assert len(parallel_eggman.egg_datas) == len(serial_eggman.egg_datas) == 3
+    assert len(parallel_eggman.failed_eggs) == len(serial_eggman.failed_eggs) == 1
+
+    for serial_egg, parallel_egg in zip(serial_eggman.egg_datas, parallel_eggman.egg_datas):
+        serial_ctx = serial_eggman.egg_datas[serial_egg]
+        parallel_ctx = parallel_eggman.egg_datas[parallel_egg]
+        assert serial_ctx.filename == parallel_ctx.filename
+        assert serial_ctx.dirty == parallel_ctx.dirty
+        assert parallel_egg.getEggFilename() == parallel_ctx.filename
+        # Answered from the workers' scans, without reading the egg again
+        assert sorted(serial_eggman.get_texture_basenames(serial_egg)) == \
+               sorted(parallel_eggman.get_texture_basenames(parallel_egg))
+        assert parallel_eggman.get_scan_record(parallel_egg) == serial_eggman.get_scan_record(serial_egg)
+        assert not parallel_ctx.loaded
+
+    parallel_eggman.load_all_eggs()
+    for serial_egg, parallel_egg in zip(serial_eggman.egg_datas, parallel_eggman.egg_datas):
+        assert serial_eggman.egg_datas[serial_egg].dirty == parallel_eggman.egg_datas[parallel_egg].dirty
+        assert str(serial_egg) == str(parallel_egg)
+
+
+if __name__ == "__main__":
+    test_parallel_register()
@@ -0,0 +1,49 @@
+import os
+import shutil
+import tempfile
+
+from panda3d.core import Filename
+from panda3d.egg import EggData
+
+from eggtools.EggMan import EggMan
+
+if not os.path.isfile('tests/coll_test.egg'):
+    test_dir = os.getcwd()
+else:
+    test_dir = os.path.join(os.getcwd(), 'tests')
+
+
+def test_parallel_write():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        egg_paths = list()
+        for i in range(4):
+            egg_paths.append(os.path.join(temp_dir, f"tiles_{i}.egg"))
+            shutil.copy(os.path.join(test_dir, "test_tiles.egg"), egg_paths[-1])
+        # Something is in the way of the last egg's output
+        os.makedirs(egg_paths[-1] + ".out")
+
+        eggman = EggMan(egg_paths)
+        for egg_data in eggman.egg_datas:
+            eggman.rename_trefs(egg_data)
+        clean_egg = eggman.get_egg_by_filename("tiles_0.egg")
+        eggman.egg_datas[clean_egg].dirty = False
+
+        failures = eggman.write_all_eggs_manually(custom_suffix=".out", workers=3)
+        failed_path = Filename.fromOsSpecific(egg_paths[-1] + ".out")
+        assert list(failures) == [failed_path]
+        assert eggman.failed_writes == failures
+        assert not os.path.exists(egg_paths[0] + ".out")
+        for egg_path in egg_paths[1:3]:
+            egg_data = EggData()
+            assert egg_data.read(Filename.fromOsSpecific(egg_path + ".out"))
+
+        # Writing the egg again once the way is clear forgets about the failure
+        os.rmdir(egg_paths[-1] + ".out")
+        egg_data = eggman.get_egg_by_filename("tiles_3.egg")
+        assert eggman.write_egg(egg_data, custom_suffix=".out")
+        assert os.path.isfile(egg_paths[-1] + ".out")
+        assert not eggman.failed_writes
+
+
+if __name__ == "__main__":
+    test_parallel_write()
@@ -0,0 +1,88 @@
+import os
+import shutil
+import tempfile
+import zlib
+
+from panda3d.core import Filename
+from panda3d.egg import EggComment, EggData
+
+from eggtools.EggMan import EggMan
+from eggtools.utils.EggFileWriter import read_contents
+from eggtools.utils.EggPzipIO import EggPzipIO
+
+if not os.path.isfile('tests/coll_test.egg'):
+    test_dir = os.getcwd()
+else:
+    test_dir = os.path.join(os.getcwd(), 'tests')
+
+
+def test_pzip_io():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        models_dir = os.path.join(temp_dir, "models")
+        os.makedirs(models_dir)
+        with open(os.path.join(test_dir, "test_tiles.egg"), "rb") as f:
+            tiles_data = f.read()
+        pz_paths = list()
+        for i in range(3):
+            pz_paths.append(os.path.join(models_dir, f"tiles_{i}.egg.pz"))
+            with open(pz_paths[-1], "wb") as f:
+                f.write(zlib.compress(tiles_data, 1))
+        egg_path = os.path.join(temp_dir, "coll_test.egg")
+        shutil.copy(os.path.join(test_dir, "coll_test.egg"), egg_path)
+        broken_path = os.path.join(models_dir, "broken.egg.pz")
+        with open(broken_path, "wb") as f:
+            f.write(b"not zlib at all")
+
+        # Eggs read from prefetched contents are the same as eggs read by Panda
+        eggman = EggMan(pz_paths + [egg_path, broken_path])
+        assert list(eggman.failed_eggs) == [Filename.fromOsSpecific(broken_path)]
+        for filepath in pz_paths + [egg_path]:
+            egg = eggman.get_egg_by_filename(os.path.basename(filepath))
+            assert egg.getEggFilename() == Filename.fromOsSpecific(filepath)
+            panda_egg = EggData()
+            assert panda_egg.read(Filename.fromOsSpecific(filepath))
+            assert str(egg) == str(panda_egg)
+
+        lazy_eggman = EggMan(pz_paths + [broken_path], lazy=True)
+        lazy_eggman.load_all_eggs()
+        assert list(lazy_eggman.failed_eggs) == [Filename.fromOsSpecific(broken_path)]
+        assert all(ctx.loaded for ctx in lazy_eggman.egg_datas.values())
+        for filepath in pz_paths:
+            assert lazy_eggman.egg_datas[lazy_eggman.get_egg_by_filename(os.path.basename(filepath))].egg_textures
+        # The broken egg isn't read as an empty egg, so it can't be written over the original
+        broken_egg = lazy_eggman.get_egg_by_filename("broken.egg.pz")
+        assert lazy_eggman.egg_datas[broken_egg].failed
+        lazy_eggman.mark_dirty(broken_egg)
+        failures = lazy_eggman.write_eggs(list(lazy_eggman.egg_datas), manually=True)
+        assert list(failures) == list()
+        lazy_eggman.egg_datas[broken_egg].dirty = True
+        failures = lazy_eggman.write_eggs([broken_egg], manually=True)
+        assert list(failures) == [Filename.fromOsSpecific(broken_path)]
+        with open(broken_path, "rb") as f:
+            assert f.read() == b"not zlib at all"
+
+        # Writes go out at the chosen level
+        fast_eggman = EggMan(pz_paths[:1], compression_level=1)
+        egg = fast_eggman.get_egg_by_filename("tiles_0.egg.pz")
+        egg.addChild(EggComment("", "changed"))
+        fast_eggman.mark_dirty(egg)
+        assert fast_eggman.write_egg_manually(egg)
+        contents = read_contents(pz_paths[0])
+        assert contents.decode() == str(egg)
+        assert os.path.getsize(pz_paths[0]) > len(zlib.compress(contents, 9))
+
+        # Recompressing the tree only touches what changes
+        pzip = EggPzipIO(workers=2, compression_level=9)
+        report = pzip.recompress_tree(temp_dir, dryrun=True)
+        assert sorted(filepath for filepath, _, _ in report.recompressed_files) == pz_paths
+        assert os.path.getsize(pz_paths[0]) == report.recompressed_files[0][1]
+        report = pzip.recompress_tree(temp_dir)
+        assert list(report.failed_files) == [broken_path]
+        assert sorted(filepath for filepath, _, _ in report.recompressed_files) == pz_paths
+        assert report.bytes_saved > 0
+        assert read_contents(pz_paths[0]) == contents
+        assert sorted(pzip.recompress_tree(temp_dir).unchanged_files) == pz_paths
+
+
+if __name__ == "__main__":
+    test_pzip_io()
@@ -0,0 +1,54 @@
+import os
+import shutil
+import tempfile
+
+from panda3d.core import Filename
+
+from eggtools.EggMan import EggMan
+from eggtools.utils.EggScanCache import EggScanCache
+
+if not os.path.isfile('tests/test_tiles.egg'):
+    source_egg = 'test_tiles.egg'
+else:
+    source_egg = os.path.join(os.getcwd(), 'tests/test_tiles.egg')
+
+
+def test_scan_cache():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        egg_path = os.path.join(temp_dir, "test_tiles.egg")
+        shutil.copy(source_egg, egg_path)
+        test_egg = Filename.fromOsSpecific(egg_path)
+        cache_path = os.path.join(temp_dir, "scan_cache.json")
+
+        # Populate the cache with a regular registration
+        eggman = EggMan([test_egg], scan_cache=EggScanCache(cache_path))
+        egg = eggman.get_egg_by_filename("test_tiles.egg")
+        expected_basenames = sorted(eggman.get_texture_basenames(egg))
+        assert os.path.isfile(cache_path)
+
+        # A fresh run should be able to answer without reading the egg
+        lazy_eggman = EggMan([test_egg], lazy=True, scan_cache=EggScanCache(cache_path))
+        lazy_egg = lazy_eggman.get_egg_by_filename("test_tiles.egg")
+        assert sorted(lazy_eggman.get_texture_basenames(lazy_egg)) == expected_basenames
+        assert not lazy_eggman.egg_datas[lazy_egg].loaded
+        assert lazy_eggman.get_scan_record(lazy_egg).object_types
+
+        # Registration doesn't read the file again just to hash it, so touching it drops the entry
+        os.utime(egg_path, (0, 0))
+        assert EggScanCache(cache_path).get(test_egg) is None
+
+        # Prescans hash the bytes they stream through, touching the file without changing it keeps those entries
+        prescan_eggman = EggMan([test_egg], lazy=True, scan_cache=EggScanCache(cache_path))
+        assert prescan_eggman.get_scan_record(prescan_eggman.get_egg_by_filename("test_tiles.egg")).object_types
+        prescan_eggman.save_scan_cache()
+        os.utime(egg_path, (1, 1))
+        assert EggScanCache(cache_path).get(test_egg)
+
+        # Changing the contents invalidates it
+        with open(egg_path, "a") as egg_file:
+            egg_file.write("\n")
+        assert EggScanCache(cache_path).get(test_egg) is None
+
+
+if __name__ == "__main__":
+    test_scan_cache()
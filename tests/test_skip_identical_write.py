@@ -0,0 +1,53 @@
+import os
+import shutil
+import tempfile
+
+from panda3d.core import Filename
+from panda3d.egg import EggComment, EggData
+
+from eggtools.EggMan import EggMan
+from eggtools.utils.EggFileWriter import read_contents
+
+if not os.path.isfile('tests/coll_test.egg'):
+    test_dir = os.getcwd()
+else:
+    test_dir = os.path.join(os.getcwd(), 'tests')
+
+
+def test_skip_identical_write():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        egg_path = os.path.join(temp_dir, "tiles.egg")
+        shutil.copy(os.path.join(test_dir, "test_tiles.egg"), egg_path)
+
+        for manually in (False, True):
+            eggman = EggMan([egg_path])
+            egg = eggman.get_egg_by_filename("tiles.egg")
+            for suffix in ("", ".pz"):
+                eggman.mark_dirty(egg)
+                assert not eggman.write_eggs([egg], custom_suffix=suffix, manually=manually)
+                first_stat = os.stat(egg_path + suffix)
+
+                # Nothing changed, so nothing should be touched
+                os.utime(egg_path + suffix, ns=(first_stat.st_atime_ns, first_stat.st_mtime_ns - 10 ** 9))
+                old_mtime = os.stat(egg_path + suffix).st_mtime_ns
+                eggman.mark_dirty(egg)
+                assert not eggman.write_eggs([egg], custom_suffix=suffix, manually=manually)
+                assert os.stat(egg_path + suffix).st_mtime_ns == old_mtime
+                assert os.stat(egg_path + suffix).st_ino == first_stat.st_ino
+            assert read_contents(egg_path + ".pz") == read_contents(egg_path)
+
+            # Changes are written through a new file
+            old_stat = os.stat(egg_path)
+            egg.addChild(EggComment("", "changed"))
+            eggman.mark_dirty(egg)
+            assert eggman.write_egg(egg)
+            assert os.stat(egg_path).st_ino != old_stat.st_ino
+            assert os.stat(egg_path).st_size != old_stat.st_size
+            assert not eggman.egg_datas[egg].dirty
+            assert not [name for name in os.listdir(temp_dir) if name.endswith(".tmp")]
+            reread_egg = EggData()
+            assert reread_egg.read(Filename.fromOsSpecific(egg_path))
+
+
+if __name__ == "__main__":
+    test_skip_identical_write()
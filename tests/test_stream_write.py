@@ -0,0 +1,53 @@
+import os
+import shutil
+import tempfile
+
+from panda3d.core import Filename
+from panda3d.egg import EggData
+
+from eggtools.EggMan import EggMan
+from eggtools.utils import EggFileWriter
+from eggtools.utils.EggFileWriter import iter_egg_chunks, read_contents
+
+if not os.path.isfile('tests/coll_test.egg'):
+    test_dir = os.getcwd()
+else:
+    test_dir = os.path.join(os.getcwd(), 'tests')
+
+
+def test_stream_write():
+    for egg_name in ("test_tiles.egg", "coll_test.egg", os.path.join("models", "test_spot.egg.pz")):
+        egg_data = EggData()
+        assert egg_data.read(Filename.fromOsSpecific(os.path.join(test_dir, egg_name)))
+        expected = str(egg_data)
+        num_children = len(egg_data.getChildren())
+        chunks = list(iter_egg_chunks(egg_data))
+        assert len(chunks) > num_children
+        assert b"".join(chunks).decode() == expected
+        # The egg is left the way it was
+        assert len(egg_data.getChildren()) == num_children
+        assert str(egg_data) == expected
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        egg_path = os.path.join(temp_dir, "spot.egg.pz")
+        shutil.copy(os.path.join(test_dir, "models", "test_spot.egg.pz"), egg_path)
+        egg_data = EggData()
+        assert egg_data.read(Filename.fromOsSpecific(egg_path))
+
+        # Several blocks per file
+        block_size = EggFileWriter.STREAM_BLOCK_SIZE
+        EggFileWriter.STREAM_BLOCK_SIZE = 256
+        try:
+            EggMan.rewrite_egg_manually(egg_data)
+        finally:
+            EggFileWriter.STREAM_BLOCK_SIZE = block_size
+        assert read_contents(egg_path).decode() == str(egg_data)
+        assert not [name for name in os.listdir(temp_dir) if name.endswith(".tmp")]
+
+        reread_egg = EggData()
+        assert reread_egg.read(Filename.fromOsSpecific(egg_path))
+        assert str(reread_egg) == str(egg_data)
+
+
+if __name__ == "__main__":
+    test_stream_write()
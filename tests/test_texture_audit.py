@@ -0,0 +1,52 @@
+import os
+import tempfile
+
+from panda3d.core import Filename
+
+from eggtools.EggMan import EggMan
+from eggtools.utils.EggTextureAuditor import EggTextureAuditor
+from tests.egg_test_helpers import write_texture_egg
+
+
+def test_texture_audit():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.makedirs(os.path.join(temp_dir, "maps"))
+        for texture_name in ("wall.png", "Floor.png"):
+            open(os.path.join(temp_dir, "maps", texture_name), "w").close()
+        absolute_path = Filename.fromOsSpecific(os.path.join(temp_dir, "maps", "wall.png")).getFullpath()
+
+        good_egg_path = os.path.join(temp_dir, "good.egg")
+        bad_egg_path = os.path.join(temp_dir, "bad.egg")
+        write_texture_egg(good_egg_path, ["maps/wall.png"])
+        write_texture_egg(bad_egg_path, ["maps/wall.png", "maps/floor.png", "maps/gone.png", absolute_path])
+        with open(bad_egg_path) as egg_file:
+            bad_egg_text = egg_file.read()
+
+        eggman = EggMan([good_egg_path, bad_egg_path], lazy=True)
+        report = EggTextureAuditor(workers=4).audit(eggman)
+
+        assert report.checked_eggs == 2
+        assert report.checked_files == 3
+        assert list(report.eggs) == [bad_egg_path]
+        audit = report.eggs[bad_egg_path]
+        assert audit.missing == ["maps/gone.png"]
+        assert audit.case_mismatch == [("maps/floor.png", os.path.join(temp_dir, "maps", "Floor.png"))]
+        assert audit.absolute == [absolute_path]
+        assert not audit.cross_drive
+        assert "missing: maps/gone.png" in report.format()
+
+        # Only what's below the egg's directory is matched against the directory listings,
+        # the egg's directory itself is taken as it was given
+        auditor = EggTextureAuditor(workers=1)
+        floor_path = os.path.join(temp_dir, "maps", "floor.png")
+        assert auditor.find_on_disk(floor_path, temp_dir) == os.path.join(temp_dir, "maps", "Floor.png")
+        assert list(auditor._dir_listings) == [temp_dir, os.path.join(temp_dir, "maps")]
+
+        # Nothing was loaded, changed or written
+        assert not any(ctx.loaded or ctx.dirty for ctx in eggman.egg_datas.values())
+        with open(bad_egg_path) as egg_file:
+            assert egg_file.read() == bad_egg_text
+
+
+if __name__ == "__main__":
+    test_texture_audit()
@@ -0,0 +1,55 @@
+import os
+import tempfile
+
+from eggtools.EggMan import EggMan
+from eggtools.utils.EggTextureDeduplicator import EggTextureDeduplicator
+from tests.egg_test_helpers import write_texture_egg
+
+
+def test_texture_dedupe():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        textures = {
+            "maps/wall.png": b"wall" * 1000,
+            "other/wall_copy.png": b"wall" * 1000,
+            # Same size, different content
+            "other/floor.png": b"flor" * 1000,
+            "unused/wall_too.png": b"wall" * 1000,
+        }
+        for texture_path, contents in textures.items():
+            os.makedirs(os.path.join(temp_dir, os.path.dirname(texture_path)), exist_ok=True)
+            with open(os.path.join(temp_dir, texture_path), "wb") as texture_file:
+                texture_file.write(contents)
+        os.makedirs(os.path.join(temp_dir, "eggs"))
+        wall_egg_path = os.path.join(temp_dir, "wall.egg")
+        copy_egg_path = os.path.join(temp_dir, "eggs", "copy.egg")
+        write_texture_egg(wall_egg_path, ["maps/wall.png"])
+        write_texture_egg(copy_egg_path, ["../other/wall_copy.png", "../other/floor.png"])
+
+        eggman = EggMan([wall_egg_path, copy_egg_path])
+        wall_egg = eggman.get_egg_by_filename("wall.egg")
+        copy_egg = eggman.get_egg_by_filename("copy.egg")
+        deduplicator = EggTextureDeduplicator(workers=2)
+        report = deduplicator.dedupe_eggs(
+            eggman, extra_files=[os.path.join(temp_dir, "unused", "wall_too.png")], hardlink=True
+        )
+
+        canonical_path = os.path.join(temp_dir, "maps", "wall.png")
+        assert report.duplicate_groups == [[
+            canonical_path, os.path.join(temp_dir, "other", "wall_copy.png"),
+            os.path.join(temp_dir, "unused", "wall_too.png"),
+        ]]
+        assert report.duplicate_bytes == 8000
+        assert report.rewritten_eggs == [copy_egg]
+        assert report.repathed_textures == 1
+        assert report.hardlinked_files == 2
+        assert os.path.samefile(canonical_path, os.path.join(temp_dir, "unused", "wall_too.png"))
+
+        # Paths stay relative to the egg, and the texture index follows along
+        assert sorted(eggman.get_texture_basenames(copy_egg)) == ["floor.png", "wall.png"]
+        assert eggman.get_texture_index().find_by_path("../maps/wall.png")[0].egg_data == copy_egg
+        assert eggman.egg_datas[copy_egg].dirty
+        assert not eggman.egg_datas[wall_egg].dirty
+
+
+if __name__ == "__main__":
+    test_texture_dedupe()
@@ -0,0 +1,55 @@
+import os
+import shutil
+import tempfile
+
+from eggtools.utils.EggMaintenanceUtil import EggMaintenanceUtil
+
+if not os.path.isfile('tests/coll_test.egg'):
+    test_dir = os.getcwd()
+else:
+    test_dir = os.path.join(os.getcwd(), 'tests')
+
+
+def test_texture_index():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        egg_paths = list()
+        for egg_name, copy_name in (
+                ("coll_test.egg", "coll_test.egg"),
+                ("test_tiles.egg", "tiles_a.egg"),
+                ("test_tiles.egg", "tiles_b.egg"),
+        ):
+            egg_paths.append(os.path.join(temp_dir, copy_name))
+            shutil.copy(os.path.join(test_dir, egg_name), egg_paths[-1])
+
+        eggmaint = EggMaintenanceUtil(egg_paths, custom_rename_list={"pixel_white": "pixel_blank"},
+                                      base_path=temp_dir, lazy=True)
+        eggman = eggmaint.eggman
+        coll_egg = eggman.get_egg_by_filename("coll_test.egg")
+        tiles_a_egg = eggman.get_egg_by_filename("tiles_a.egg")
+        tiles_b_egg = eggman.get_egg_by_filename("tiles_b.egg")
+
+        # Lazily registered eggs are indexed from a prescan
+        texture_index = eggman.get_texture_index()
+        assert sorted(map(id, texture_index.get_eggs_using("pixel_white", include_extension=False))) == \
+               sorted(map(id, [tiles_a_egg, tiles_b_egg]))
+        assert not any(egg_data.loaded for egg_data in eggman.egg_datas.values())
+
+        eggmaint.perform_rename_operations()
+
+        # The egg without the texture was never read
+        assert not eggman.egg_datas[coll_egg].loaded
+        assert not texture_index.find_by_basename("pixel_white.png")
+        renamed_refs = texture_index.find_by_basename("pixel_blank.png")
+        assert len(renamed_refs) == 2
+        assert all(ref.egg_texture is not None and ref.tref == "pixel_blank" for ref in renamed_refs)
+        for egg_path in egg_paths[1:]:
+            with open(egg_path) as egg_file:
+                assert "pixel_blank.png" in egg_file.read()
+
+        eggman.merge_eggs(tiles_a_egg, tiles_b_egg)
+        assert texture_index.get_eggs_using("pixel_blank.png") == [tiles_a_egg]
+        assert len(texture_index.get_egg_textures(tiles_a_egg)) == len(eggman.egg_datas[tiles_a_egg].egg_textures)
+
+
+if __name__ == "__main__":
+    test_texture_index()
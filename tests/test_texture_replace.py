@@ -0,0 +1,78 @@
+import os
+import tempfile
+
+from panda3d.core import Filename
+from panda3d.egg import EggData, EggGroupNode, EggPolygon, EggTexture
+
+from eggtools.EggMan import EggMan
+
+if not os.path.isfile('tests/coll_test.egg'):
+    test_dir = os.getcwd()
+else:
+    test_dir = os.path.join(os.getcwd(), 'tests')
+
+
+def iter_polygons(egg):
+    for child in egg.getChildren():
+        if isinstance(child, EggPolygon):
+            yield child
+        if isinstance(child, EggGroupNode):
+            yield from iter_polygons(child)
+
+
+def make_multi_texture_egg() -> EggData:
+    """
+    test_tiles.egg, with its polygons spread over several textures & some of them multitextured.
+    """
+    egg_data = EggData()
+    egg_data.read(Filename.fromOsSpecific(os.path.join(test_dir, 'test_tiles.egg')))
+    egg_textures = [EggTexture(f"lambert{i}SG", f"maps/tile_{i}.png") for i in range(4)]
+    for egg_texture in egg_textures:
+        egg_data.addChild(egg_texture)
+    for i, egg_polygon in enumerate(iter_polygons(egg_data)):
+        egg_polygon.clearTexture()
+        egg_polygon.addTexture(egg_textures[i % 3])
+        if i % 2 == 0:
+            egg_polygon.addTexture(egg_textures[3])
+    return egg_data
+
+
+def rename_trefs_by_walking(eggman: EggMan, egg_data: EggData) -> None:
+    """
+    rename_trefs as it used to be: one walk over every polygon per texture.
+    """
+    for egg_tex in eggman.egg_datas[egg_data].egg_textures:
+        new_tex = eggman.rebase_egg_texture(egg_tex.getFilename().getBasenameWoExtension(), egg_tex.getFullpath(),
+                                            egg_tex)
+        for egg_polygon in iter_polygons(egg_data):
+            eggman._replace_poly_tref(egg_polygon, new_tex, egg_tex)
+        egg_tex.assign(new_tex)
+
+
+def test_texture_replace():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        egg_path = os.path.join(temp_dir, "multi_texture.egg")
+        make_multi_texture_egg().writeEgg(Filename.fromOsSpecific(egg_path))
+
+        batched_eggman = EggMan([egg_path])
+        walked_eggman = EggMan([egg_path])
+
+    batched_egg = list(batched_eggman.egg_datas)[0]
+    walked_egg = list(walked_eggman.egg_datas)[0]
+    batched_eggman.rename_trefs(batched_egg)
+    rename_trefs_by_walking(walked_eggman, walked_egg)
+    assert str(batched_egg) == str(walked_egg)
+    assert "<TRef> { tile_2 }" in str(batched_egg)
+
+    # Repathing only moves the polygons that used the repathed texture
+    tile_1 = batched_eggman.get_texture_by_name(batched_egg, "tile_1.png")
+    tile_1_polygons = ["<TRef> { tile_1 }" in str(egg_polygon) for egg_polygon in iter_polygons(batched_egg)]
+    assert any(tile_1_polygons)
+    batched_eggman.repath_egg_texture(batched_egg, tile_1, Filename("maps/tile_one.png"))
+    assert ["<TRef> { tile_one }" in str(egg_polygon)
+            for egg_polygon in iter_polygons(batched_egg)] == tile_1_polygons
+    assert "tile_1" not in str(batched_egg)
+
+
+if __name__ == "__main__":
+    test_texture_replace()
@@ -0,0 +1,126 @@
+import os
+import shutil
+import tempfile
+
+from panda3d.core import Filename, LPoint3d, StringStream
+from panda3d.egg import EggData, EggGroup, EggGroupNode, EggPolygon, EggVertex, EggVertexPool, EggVertexUV
+
+from eggtools.EggMan import EggMan
+from eggtools.EggManConfig import VertexPrecisionConfig
+from eggtools.utils.EggFileWriter import read_contents
+from eggtools.utils.EggVertexPoolWriter import format_values
+
+if not os.path.isfile('tests/coll_test.egg'):
+    test_dir = os.getcwd()
+else:
+    test_dir = os.path.join(os.getcwd(), 'tests')
+
+
+def find_pools(egg_node, pools):
+    for child in egg_node.getChildren():
+        if isinstance(child, EggVertexPool):
+            pools.append(child)
+        elif isinstance(child, EggGroupNode):
+            find_pools(child, pools)
+    return pools
+
+
+def test_vertex_precision():
+    assert format_values([1.23456, -0.00001, 2.0, 10.5], 3) == ["1.235", "0", "2", "10.5"]
+    assert format_values([0.5, 7.0], 0) == ["0", "7"]
+
+    precision = VertexPrecisionConfig(POSITION=4, NORMAL=3, UV=5, COLOR=2)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        egg_data = EggData()
+        egg_pool = EggVertexPool("pool")
+        egg_data.addChild(egg_pool)
+        egg_polygon = EggPolygon()
+        egg_data.addChild(egg_polygon)
+        for i in range(3):
+            egg_vertex = EggVertex()
+            egg_vertex.setPos(LPoint3d(1234.56789123 + i, 0.000012345678, -1 / 3))
+            egg_vertex.setUv("", (0.123456789, 1 / 7))
+            egg_uv = EggVertexUV("lightmap", (0.5, 0.25))
+            egg_uv.setTangent((0.70710678, 0.70710678, 0))
+            egg_vertex.setUvObj(egg_uv)
+            egg_vertex.setNormal((0.70710678, 0.70710678, 0))
+            egg_vertex.setColor((0.8, 1 / 3, 1, 1))
+            egg_polygon.addVertex(egg_pool.addVertex(egg_vertex, i))
+        egg_path = os.path.join(temp_dir, "precise.egg")
+        egg_data.writeEgg(Filename.fromOsSpecific(egg_path))
+
+        eggman = EggMan([egg_path])
+        egg = eggman.get_egg_by_filename("precise.egg")
+        eggman.mark_dirty(egg)
+        assert eggman.write_egg_manually(egg, precision=precision)
+        text = read_contents(egg_path).decode()
+        assert "    1235.5679 0 -0.3333\n" in text
+        assert "<UV> { 0.12346 0.14286 }" in text
+        assert "<UV> lightmap {\n      0.5 0.25\n      <Tangent> { 0.707 0.707 0 }" in text
+        assert "<Normal> { 0.707 0.707 0 }" in text
+        assert "<RGBA> { 0.8 0.33 1 1 }" in text
+
+        reread_egg = EggData()
+        assert reread_egg.read(Filename.fromOsSpecific(egg_path))
+        egg_vertex = find_pools(reread_egg, [])[0].getVertex(2)
+        assert egg_vertex.getPos3().almostEqual(LPoint3d(1236.5679, 0, -0.3333), 1e-9)
+        assert egg_vertex.getUvObj("lightmap").hasTangent()
+
+        # A whole model comes out the same, with fewer digits
+        spot_path = os.path.join(temp_dir, "spot.egg.pz")
+        shutil.copy(os.path.join(test_dir, "models", "test_spot.egg.pz"), spot_path)
+        spot_egg = EggData()
+        assert spot_egg.read(Filename.fromOsSpecific(spot_path))
+        EggMan.rewrite_egg_manually(spot_egg, precision=precision)
+        reread_egg = EggData()
+        assert reread_egg.read(Filename.fromOsSpecific(spot_path))
+        old_pools = find_pools(spot_egg, [])
+        new_pools = find_pools(reread_egg, [])
+        assert [pool.getHighestIndex() for pool in new_pools] == [pool.getHighestIndex() for pool in old_pools]
+        for old_pool, new_pool in zip(old_pools, new_pools):
+            for index in range(old_pool.getHighestIndex() + 1):
+                if old_pool.hasVertex(index):
+                    assert new_pool.getVertex(index).getPos4().almostEqual(old_pool.getVertex(index).getPos4(), 1e-4)
+
+    # Morphs & joint memberships are kept, the rest of those vertices still gets the precision
+    egg_data = EggData()
+    assert egg_data.read(StringStream(
+        b"<VertexPool> pool {\n"
+        b"  <Vertex> 0 { 1.23456789 0 0 <Dxyz> slider { 1 0 0 } }\n"
+        b"  <Vertex> 1 { 0 1.23456789 0 <UV> { 0.5 0.5 } }\n"
+        b"  <Vertex> 2 { 0 0 1.23456789 }\n"
+        b"}\n"
+        b"<Joint> bone { <VertexRef> { 2 <Ref> { pool } } }\n"
+    ))
+    text = b"".join(EggMan.stream_egg(egg_data, precision)).decode().replace(os.linesep, "\n")
+    assert "    1.2346 0 0\n    <Dxyz> slider { 1 0 0 }\n" in text
+    assert "    0 1.2346 0\n    <UV> { 0.5 0.5 }\n" in text
+    assert "    0 0 1.2346\n    // bone:1\n" in text
+
+    # Numbers that fit Panda's digits come out the way Panda writes them, joint memberships included.
+    # Both a_1 joints are given vertex 1, Panda only lists one of them.
+    egg_data = EggData()
+    egg_pool = EggVertexPool("pool")
+    egg_data.addChild(egg_pool)
+    joints = [EggGroup(name) for name in ("b_2", "a_1", "c %s 3", "a_1")]
+    for egg_joint in joints:
+        egg_joint.setGroupType(EggGroup.GT_joint)
+        egg_data.addChild(egg_joint)
+    for i in range(8):
+        egg_vertex = EggVertex()
+        egg_vertex.setPos(LPoint3d(i, 0.5, -0.25))
+        egg_vertex.setUv("", (0.5, i / 4))
+        if i % 2:
+            egg_vertex.setNormal((0, 0, 1))
+        egg_pool.addVertex(egg_vertex, i)
+        for j, egg_joint in enumerate(joints[:3]):
+            if (i + j) % 3:
+                egg_joint.refVertex(egg_vertex, 1 / (j + 1))
+    joints[3].refVertex(egg_pool.getVertex(1), 0.5)
+    text = b"".join(EggMan.stream_egg(egg_data, precision)).decode().replace(os.linesep, "\n")
+    assert text == str(egg_data)
+    assert "    // a_1:0.5 c %s 3:0.333333\n" in text
+
+
+if __name__ == "__main__":
+    test_vertex_precision()
@@ -0,0 +1,50 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from eggtools.utils.EggMaintenanceUtil import EggMaintenanceUtil
+
+if not os.path.isfile('tests/coll_test.egg'):
+    test_dir = os.getcwd()
+else:
+    test_dir = os.path.join(os.getcwd(), 'tests')
+
+test_egg_names = ['coll_test.egg', 'test_tiles.egg', 'xform.egg', 'name_card.egg']
+
+
+def test_windowed_maintenance():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        full_dir = os.path.join(temp_dir, "full")
+        windowed_dir = os.path.join(temp_dir, "windowed")
+        for out_dir in (full_dir, windowed_dir):
+            os.makedirs(out_dir)
+            for egg_name in test_egg_names:
+                shutil.copy(os.path.join(test_dir, egg_name), out_dir)
+
+        full = EggMaintenanceUtil([os.path.join(full_dir, name) for name in test_egg_names])
+        full.perform_general_maintenance()
+
+        windowed = EggMaintenanceUtil([os.path.join(windowed_dir, name) for name in test_egg_names], lazy=True)
+        windows = list(windowed.eggman.iter_egg_windows(max_eggs=3))
+        assert [len(window) for window in windows] == [3, 1]
+        windows = list(windowed.eggman.iter_egg_windows(max_bytes=1))
+        assert [len(window) for window in windows] == [1, 1, 1, 1]
+
+        windowed.perform_general_maintenance(window_size=2)
+
+        # Eggs that were read during registration can't be kept out of memory
+        not_lazy = EggMaintenanceUtil([os.path.join(windowed_dir, test_egg_names[0])])
+        with unittest.TestCase().assertLogs(level="WARNING"):
+            not_lazy.perform_general_maintenance(window_size=2)
+        # Everything got released once it was written
+        assert not any(ctx.loaded or ctx.dirty for ctx in windowed.eggman.egg_datas.values())
+
+        for egg_name in test_egg_names:
+            with open(os.path.join(full_dir, egg_name)) as full_egg, \
+                    open(os.path.join(windowed_dir, egg_name)) as windowed_egg:
+                assert full_egg.read() == windowed_egg.read()
+
+
+if __name__ == "__main__":
+    test_windowed_maintenance()